@@ -10,6 +10,14 @@ import io
 import json
 warnings.filterwarnings('ignore')
 
+from lector_excel import leer_excel, nombres_hojas
+from detector_formatos import detectar_y_procesar
+from procesador_libros_proveedores import procesar_libro_proveedor
+from trazas import trazar, etapa, ETAPA_LECTURA
+from tipos_cambio import MONEDA_PROVEEDOR, TipoCambioNoDisponible, tasa_vigente, factor_a_usd, guardar_tipo_cambio
+from importacion_lote import importar_lote, calcular_productos_carga
+from modules.estado_sesion import guardar_productos_csv
+
 # Configuración de la página
 st.set_page_config(
     page_title="Análisis de Costos Individual",
@@ -546,6 +554,27 @@ with st.sidebar:
         
         st.success(f"✅ Tipo de cambio actualizado: ${precio_dolar:,.0f} pesos/USD")
     
+    # Tasa RMB/USD de la tabla de tipos de cambio; la tabla es compartida, así que
+    # un cambio solo se guarda (vigente desde hoy) al presionar "Guardar tasa"
+    try:
+        tasa_rmb_actual = tasa_vigente(MONEDA_PROVEEDOR)
+    except ValueError:
+        tasa_rmb_actual = 0.0
+    tasa_rmb = st.number_input(
+        "Yuanes por dólar (RMB/USD)",
+        min_value=0.0,
+        value=float(tasa_rmb_actual),
+        step=0.01,
+        format="%.2f",
+        key="tasa_rmb_home",
+        help="Tipo de cambio para convertir precios de proveedores en RMB a USD"
+    )
+    if tasa_rmb != tasa_rmb_actual:
+        st.caption(f"Tasa vigente: {tasa_rmb_actual:,.2f} RMB/USD" if tasa_rmb_actual else "Sin tasa vigente")
+        if st.button("💾 Guardar tasa", key="guardar_tasa_rmb", use_container_width=True, disabled=tasa_rmb <= 0):
+            guardar_tipo_cambio(MONEDA_PROVEEDOR, tasa_rmb)
+            st.success(f"✅ Tipo de cambio actualizado: {tasa_rmb:,.2f} RMB/USD")
+    
     st.markdown("### 🎯 Configuración de Costos (No Recuperables)")
     ddi_pct = st.number_input(
         "Derechos de Importación (%)",
@@ -661,13 +690,30 @@ with st.expander("⚙️ Configuración de Carga Masiva", expanded=False):
             help="Calcular automáticamente CBM, peso y otros valores derivados."
         )
 
+modo_carga = st.radio(
+    "Modo de carga",
+    ["📄 Un archivo", "📚 Lote de archivos"],
+    horizontal=True,
+    help="En modo lote se procesan en paralelo varias cotizaciones (o un .zip) y se cargan todas juntas."
+)
+
 col_up1, col_up2 = st.columns([2,1])
 with col_up1:
-    archivo = st.file_uploader(
-        "Selecciona un archivo Excel (.xlsx, .xls) o CSV con los productos a cargar",
-        type=["xlsx", "xls", "csv"],
-        accept_multiple_files=False
-    )
+    archivo = None
+    archivos_lote = []
+    if modo_carga == "📚 Lote de archivos":
+        archivos_lote = st.file_uploader(
+            "Selecciona varias cotizaciones (.xlsx, .xls, .csv) o un .zip con todas",
+            type=["xlsx", "xls", "csv", "zip"],
+            accept_multiple_files=True,
+            key="archivos_lote"
+        )
+    else:
+        archivo = st.file_uploader(
+            "Selecciona un archivo Excel (.xlsx, .xls) o CSV con los productos a cargar",
+            type=["xlsx", "xls", "csv"],
+            accept_multiple_files=False
+        )
 with col_up2:
     # Crear y descargar ejemplos dinámicamente
     st.markdown("**📥 Descargar Ejemplos:**")
@@ -736,166 +782,155 @@ with col_up2:
     if os.path.exists(temp_file_original):
         os.remove(temp_file_original)
 
+if archivos_lote:
+    st.info(f"📚 {len(archivos_lote)} archivos seleccionados para importar en lote")
+    if st.button("🚀 Importar Lote al Contenedor", type="primary", use_container_width=True):
+        sobrescribir = st.session_state.get('overwrite_existing', False)
+        existentes = [] if sobrescribir else list(st.session_state['productos'])
+        
+        with st.spinner(f"Procesando {len(archivos_lote)} archivos en paralelo..."):
+            inicio_lote = datetime.now()
+            try:
+                df_lote, informe_lote, errores_lote = importar_lote(
+                    [(a.name, a.getvalue()) for a in archivos_lote],
+                    productos_existentes=existentes if st.session_state.get('skip_duplicates', True) else ()
+                )
+            except TipoCambioNoDisponible as e:
+                st.error(f"❌ {e}")
+                st.info(f"💱 Ingresa la tasa 'Yuanes por dólar ({MONEDA_PROVEEDOR}/USD)' en la barra lateral, presiona '💾 Guardar tasa' y vuelve a importar el lote.")
+                st.stop()
+            nuevos = calcular_productos_carga(df_lote, {
+                'ddi_pct': st.session_state.ddi_pct,
+                'seguro_pct': st.session_state.seguro_pct,
+                'tasas_pct': st.session_state.tasas_pct,
+                'agente_pct': st.session_state.agente_pct,
+                'despachante_pct': st.session_state.despachante_pct,
+                'precio_dolar': st.session_state.precio_dolar
+            })
+        
+        # Una sola transacción: el CSV se reemplaza de forma atómica y recién después la lista en sesión
+        productos_lote = existentes + nuevos
+        guardar_productos_csv(productos_lote)
+        st.session_state['productos'] = productos_lote
+        
+        st.session_state['importacion_lote_resultado'] = {
+            'informe': informe_lote,
+            'errores': errores_lote,
+            'agregados': len(nuevos),
+            'segundos': (datetime.now() - inicio_lote).total_seconds()
+        }
+        st.rerun()
+
+# Mostrar resultado de la importación en lote si existe
+if 'importacion_lote_resultado' in st.session_state:
+    resultado_lote = st.session_state.pop('importacion_lote_resultado')
+    informe_lote = pd.DataFrame(resultado_lote['informe'])
+    
+    col_lote1, col_lote2, col_lote3, col_lote4 = st.columns(4)
+    with col_lote1:
+        st.metric("📚 Archivos Procesados", len(informe_lote), delta=f"{len(resultado_lote['errores'])} con error" if resultado_lote['errores'] else None)
+    with col_lote2:
+        st.metric("📦 Productos Agregados", resultado_lote['agregados'])
+    with col_lote3:
+        st.metric("⏭️ Duplicados Omitidos", int(informe_lote['duplicados'].sum()) if not informe_lote.empty else 0)
+    with col_lote4:
+        st.metric("⏱️ Tiempo Total", f"{resultado_lote['segundos']:.1f} s")
+    
+    for error in resultado_lote['errores']:
+        st.warning(f"⚠️ {error['archivo']}: {error['error']}")
+    
+    if not informe_lote.empty:
+        with st.expander("📋 Informe por Archivo", expanded=True):
+            st.dataframe(informe_lote.rename(columns={
+                'archivo': 'Archivo', 'formato': 'Formato', 'productos': 'Productos',
+                'duplicados': 'Duplicados', 'agregados': 'Agregados', 'errores_hojas': 'Errores por Hoja',
+                'segundos': 'Tiempo (s)'
+            }), use_container_width=True)
+
 if archivo is not None:
     try:
-        # Leer el archivo una sola vez
-        if archivo.name.endswith('.csv'):
-            df_upload = pd.read_csv(archivo)
-        else:
-            df_upload = pd.read_excel(archivo)
-        
-        # Guardar el DataFrame original para el procesamiento posterior
-        df_original = df_upload.copy()
+        # Traza de la carga: tiempo de cada etapa y filas conservadas/descartadas
+        with trazar(archivo.name) as traza_carga:
+            # Cotizaciones con varias hojas: todas las hojas y bloques se procesan en paralelo
+            hojas = [] if archivo.name.endswith('.csv') else nombres_hojas(archivo)
+            df_libro = pd.DataFrame()
+            if len(hojas) > 1:
+                with st.spinner(f"Procesando {len(hojas)} hojas..."):
+                    df_libro, info_hojas, errores_hojas = procesar_libro_proveedor(archivo)
+                for error in errores_hojas:
+                    st.warning(f"⚠️ Hoja '{error['hoja']}': {error['error']}")
         
-        # Intentar detectar el formato del archivo
-        try:
-            from procesador_formato_original import procesar_dataframe_formato_original
-            from procesador_especifico_chino import procesar_dataframe_proveedor_chino
-            
-            # Primero intentar procesar como archivo de proveedor chino
-            productos_procesados = procesar_dataframe_proveedor_chino(df_upload)
+            if not df_libro.empty:
+                df_upload = df_libro
+                productos_procesados = df_libro.to_dict('records')
+                nombre_formato = 'libro'
+                descripcion_formato = f"cotización de {len(info_hojas)} hojas"
+                filas_son_productos = False
             
-            if productos_procesados:
-                st.success(f"✅ Archivo procesado como archivo de proveedor chino")
-                st.info(f"📦 Se detectaron {len(productos_procesados)} productos")
-                
-                # Convertir a DataFrame para mostrar preview
-                df_preview = pd.DataFrame(productos_procesados)
-                
-                # Mostrar preview
-                with st.expander("👁️ Preview de Datos Procesados", expanded=True):
-                    st.dataframe(df_preview.head(10), use_container_width=True)
-                    if len(df_preview) > 10:
-                        st.info(f"Mostrando 10 de {len(df_preview)} productos")
-                
-                # Guardar los productos procesados para usar en el botón
-                st.session_state['productos_procesados'] = productos_procesados
-                st.session_state['formato_detectado'] = 'chino'
-                
-                # Continuar con el procesamiento normal
+                with st.expander("📑 Hojas procesadas", expanded=False):
+                    st.dataframe(pd.DataFrame(info_hojas), use_container_width=True)
             else:
-                # Verificar si es formato original
-                productos_procesados = procesar_dataframe_formato_original(df_upload)
-                
-                if productos_procesados:
-                    st.success(f"✅ Archivo procesado como formato original de costos")
-                    st.info(f"📦 Se detectaron {len(productos_procesados)} productos")
-                    
-                    # Convertir a DataFrame para mostrar preview
-                    df_preview = pd.DataFrame(productos_procesados)
-                    
-                    # Mostrar preview
-                    with st.expander("👁️ Preview de Datos Procesados", expanded=True):
-                        st.dataframe(df_preview.head(10), use_container_width=True)
-                        if len(df_preview) > 10:
-                            st.info(f"Mostrando 10 de {len(df_preview)} productos")
-                    
-                    # Guardar los productos procesados para usar en el botón
-                    st.session_state['productos_procesados'] = productos_procesados
-                    st.session_state['formato_detectado'] = 'original'
-                    
-                    # Continuar con el procesamiento normal
+                # Leer el archivo una sola vez
+                if archivo.name.endswith('.csv'):
+                    with etapa(ETAPA_LECTURA):
+                        df_upload = pd.read_csv(archivo)
                 else:
-                    # Verificar si es formato estándar
-                    columnas_requeridas = [
-                        'Nombre', 'Cantidad por Carton', 'Precio En USD', 'CBM', 'GW'
-                    ]
-                    
-                    if all(col in df_upload.columns for col in columnas_requeridas):
-                        st.success(f"✅ Archivo procesado como formato estándar")
-                        st.info(f"📦 Se detectaron {len(df_upload)} filas")
-                        
-                        # Mostrar preview
-                        with st.expander("👁️ Preview de Datos Procesados", expanded=True):
-                            st.dataframe(df_upload.head(10), use_container_width=True)
-                            if len(df_upload) > 10:
-                                st.info(f"Mostrando 10 de {len(df_upload)} productos")
-                        
-                        # Guardar el DataFrame para usar en el botón
-                        st.session_state['productos_procesados'] = None
-                        st.session_state['formato_detectado'] = 'estandar'
-                        
-                        # Continuar con el procesamiento normal
-                    else:
-                        st.error(f"❌ Formato de archivo no reconocido")
-                        st.error(f"Columnas encontradas: {', '.join(df_upload.columns)}")
-                        st.error("El archivo debe tener uno de los siguientes formatos:")
-                        st.error("• Formato chino: Archivos de proveedores con texto en chino")
-                        st.error("• Formato original: Nombre, SKU, Precio FOB (USD), Cantidad Total, Piezas por Caja, Peso por Caja (kg), Largo (cm), Ancho (cm), Alto (cm), DDI (%)")
-                        st.error("• Formato estándar: Nombre, Cantidad por Carton, Precio En USD, CBM, GW")
-                        st.stop()
-        except Exception as e:
-            # Manejar cualquier error
-            st.error(f"❌ Error al procesar el archivo: {str(e)}")
-            st.info("📋 Intentando procesar como archivo estándar...")
-            
-            # Columnas requeridas (formato simplificado para proveedores)
-            columnas_requeridas = [
-                'Nombre', 'Cantidad por Carton', 'Precio En USD', 'CBM', 'GW'
-            ]
-            
-            # Columnas opcionales
-            columnas_opcionales = ['SKU', 'Precio RMB']
+                    df_upload = leer_excel(archivo)
             
-            if not all(col in df_upload.columns for col in columnas_requeridas):
-                st.error(f"El archivo debe contener las siguientes columnas: {', '.join(columnas_requeridas)}")
-                st.error(f"Columnas encontradas: {', '.join(df_upload.columns)}")
-                st.stop()
-        except ImportError:
-            # Si no están disponibles los procesadores, usar método estándar
-            st.info("📋 Procesando como archivo estándar...")
-            
-            if archivo.name.endswith('.csv'):
-                df_upload = pd.read_csv(archivo)
-            else:
-                df_upload = pd.read_excel(archivo)
-            
-            # Columnas requeridas (formato simplificado para proveedores)
-            columnas_requeridas = [
-                'Nombre', 'Cantidad por Carton', 'Precio En USD', 'CBM', 'GW'
-            ]
-            
-            # Columnas opcionales
-            columnas_opcionales = ['SKU', 'Precio RMB']
-            
-            if not all(col in df_upload.columns for col in columnas_requeridas):
-                st.error(f"El archivo debe contener las siguientes columnas: {', '.join(columnas_requeridas)}")
-                st.error(f"Columnas encontradas: {', '.join(df_upload.columns)}")
-                st.stop()
-        except Exception as e:
-            # Manejar cualquier otro error
-            st.error(f"❌ Error al procesar el archivo: {str(e)}")
-            st.info("📋 Intentando procesar como archivo estándar...")
+                # Detectar el formato sobre una muestra del archivo; solo el formato ganador lo procesa
+                try:
+                    detector, productos_procesados = detectar_y_procesar(df_upload)
+                except TipoCambioNoDisponible:
+                    raise
+                except Exception as e:
+                    st.error(f"❌ Error al procesar el archivo: {str(e)}")
+                    st.error("Asegúrate de que el archivo tenga el formato correcto y las columnas requeridas.")
+                    st.stop()
             
-            try:
-                if archivo.name.endswith('.csv'):
-                    df_upload = pd.read_csv(archivo)
-                else:
-                    df_upload = pd.read_excel(archivo)
-                
-                # Columnas requeridas (formato simplificado para proveedores)
-                columnas_requeridas = [
-                    'Nombre', 'Cantidad por Carton', 'Precio En USD', 'CBM', 'GW'
-                ]
-                
-                # Columnas opcionales
-                columnas_opcionales = ['SKU', 'Precio RMB']
-                
-                if not all(col in df_upload.columns for col in columnas_requeridas):
-                    st.error(f"El archivo debe contener las siguientes columnas: {', '.join(columnas_requeridas)}")
-                    st.error(f"Columnas encontradas: {', '.join(df_upload.columns)}")
+                if detector is None:
+                    st.error(f"❌ Formato de archivo no reconocido")
+                    st.error(f"Columnas encontradas: {', '.join(map(str, df_upload.columns))}")
+                    st.error("El archivo debe tener uno de los siguientes formatos:")
+                    st.error("• Formato chino: Archivos de proveedores con texto en chino")
+                    st.error("• Formato original: Nombre, SKU, Precio FOB (USD), Cantidad Total, Piezas por Caja, Peso por Caja (kg), Largo (cm), Ancho (cm), Alto (cm), DDI (%)")
+                    st.error("• Formato estándar: Nombre, Cantidad por Carton, Precio En USD, CBM, GW")
                     st.stop()
-            except Exception as e2:
-                st.error(f"❌ Error al leer el archivo: {str(e2)}")
-                st.error("Asegúrate de que el archivo tenga el formato correcto y las columnas requeridas.")
-                st.stop()
+            
+                nombre_formato = detector.nombre
+                descripcion_formato = detector.descripcion
+                filas_son_productos = detector.filas_son_productos
+        
+        # Guardar el DataFrame original para el procesamiento posterior
+        df_original = df_upload.copy()
+        
+        # Preview de los productos procesados (o de las filas si ya son los productos)
+        df_preview = df_upload if filas_son_productos else pd.DataFrame(productos_procesados)
+        
+        st.success(f"✅ Archivo procesado como {descripcion_formato}")
+        st.info(f"📦 Se detectaron {len(df_preview)} {'filas' if filas_son_productos else 'productos'}")
+        
+        with st.expander("👁️ Preview de Datos Procesados", expanded=True):
+            st.dataframe(df_preview.head(10), use_container_width=True)
+            if len(df_preview) > 10:
+                st.info(f"Mostrando 10 de {len(df_preview)} productos")
+        
+        with st.expander(f"⏱️ Tiempos de procesamiento ({traza_carga.segundos:.2f}s)", expanded=False):
+            tabla_tiempos = traza_carga.tabla()
+            if not tabla_tiempos.empty:
+                st.dataframe(tabla_tiempos, use_container_width=True)
+            if traza_carga.eventos:
+                st.text('\n'.join(f"{segundo:7.3f}s  {mensaje}" for segundo, _, mensaje in traza_carga.eventos))
+        
+        # Guardar los productos procesados para usar en el botón
+        st.session_state['productos_procesados'] = productos_procesados
+        st.session_state['formato_detectado'] = nombre_formato
         
         # Validaciones de datos si está habilitado (para ambos formatos)
         if st.session_state.get('validate_data', True):
             errores_validacion = []
             
-            # Solo validar si no es formato chino (ya que los productos chinos ya están procesados)
-            if st.session_state.get('formato_detectado') != 'chino':
+            # Solo validar si no es formato chino o de proveedor (ya que esos productos ya están procesados)
+            if st.session_state.get('formato_detectado') not in ['chino', 'proveedores', 'libro']:
                 # Determinar qué DataFrame usar para validaciones
                 df_para_validar = df_upload
                 if st.session_state.get('formato_detectado') == 'original' and st.session_state.get('productos_procesados'):
@@ -905,14 +940,14 @@ if archivo is not None:
                 # Validar que no haya valores negativos o cero en campos críticos
                 for idx, row in df_para_validar.iterrows():
                     # Validar precio (USD o RMB)
-                    precio_usd = row.get('Precio FOB (USD)', 0)  # Formato original usa 'Precio FOB (USD)'
+                    precio_usd = row.get('Precio FOB (USD)', row.get('Precio En USD', 0))  # Formato original usa 'Precio FOB (USD)'
                     precio_rmb = row.get('Precio RMB', 0)
                     
                     if precio_usd <= 0 and precio_rmb <= 0:
                         errores_validacion.append(f"Fila {idx+1}: Debe tener Precio FOB (USD) o Precio RMB mayor a 0")
                     elif precio_rmb > 0 and precio_usd <= 0:
                         # Convertir RMB a USD
-                        precio_usd = precio_rmb / 7.10
+                        precio_usd = precio_rmb * factor_a_usd(MONEDA_PROVEEDOR)
                         df_para_validar.loc[idx, 'Precio FOB (USD)'] = precio_usd
                     
                     # Validar cantidad según el formato
@@ -946,7 +981,7 @@ if archivo is not None:
                     st.stop()
         
         # Verificar duplicados en el archivo
-        if st.session_state.get('formato_detectado') in ['original', 'chino'] and st.session_state.get('productos_procesados'):
+        if st.session_state.get('formato_detectado') in ['original', 'chino', 'proveedores', 'libro'] and st.session_state.get('productos_procesados'):
             # Para formato original o chino, verificar duplicados en los productos procesados
             nombres_archivo = [prod['Nombre'] for prod in st.session_state['productos_procesados']]
         else:
@@ -996,7 +1031,7 @@ if archivo is not None:
                     productos_omitidos = 0
                     
                     # Determinar qué datos procesar
-                    if st.session_state.get('formato_detectado') in ['original', 'chino'] and st.session_state.get('productos_procesados'):
+                    if st.session_state.get('formato_detectado') in ['original', 'chino', 'proveedores', 'libro'] and st.session_state.get('productos_procesados'):
                         # Usar productos ya procesados del formato original o chino
                         datos_a_procesar = st.session_state['productos_procesados']
                         procesando_formato_original = True
@@ -1028,7 +1063,7 @@ if archivo is not None:
                             precio_rmb = row_data.get('Precio RMB', 0)
                             
                             if precio_rmb > 0 and precio_usd <= 0:
-                                precio_usd = precio_rmb / 7.10  # Conversión RMB a USD
+                                precio_usd = precio_rmb * factor_a_usd(MONEDA_PROVEEDOR)  # Conversión RMB a USD
                             
                             # Valores predeterminados para campos no proporcionados
                             cantidad_por_carton = row_data['Cantidad por Carton']
@@ -1044,7 +1079,7 @@ if archivo is not None:
                         piezas_por_caja = 1  # Predeterminado: 1 pieza por caja
                         
                         # Usar DDI específico del producto si está disponible, sino usar el global
-                        if procesando_formato_original and 'DDI (%)' in row_data:
+                        if procesando_formato_original and pd.notna(row_data.get('DDI (%)')):
                             ddi_producto_pct = row_data['DDI (%)']
                         else:
                             ddi_producto_pct = st.session_state.ddi_pct  # Usar DDI global
@@ -1143,6 +1178,9 @@ if archivo is not None:
                     st.success("✅ Todos los productos han sido eliminados.")
                     st.rerun()
     
+    except TipoCambioNoDisponible as e:
+        st.error(f"❌ {e}")
+        st.info(f"💱 Ingresa la tasa 'Yuanes por dólar ({MONEDA_PROVEEDOR}/USD)' en la barra lateral, presiona '💾 Guardar tasa' y vuelve a cargar el archivo.")
     except Exception as e:
         st.error(f"Error al procesar el archivo: {e}")
         st.error("Asegúrate de que el archivo tenga el formato correcto y las columnas requeridas.")
@@ -11,6 +11,7 @@ import warnings
 import io
 import base64
 import json
+import uuid
 from dash.exceptions import PreventUpdate
 
 warnings.filterwarnings('ignore')
@@ -18,6 +19,7 @@ warnings.filterwarnings('ignore')
 # Inicializar la aplicación Dash
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 app.title = "Sistema de Análisis de Costos y Ganancias"
+server = app.server
 
 # Configuración de la página
 app.config.suppress_callback_exceptions = True
@@ -25,44 +27,27 @@ app.config.suppress_callback_exceptions = True
 # Constantes
 CONTAINER_40HQ_CBM = 70.0
 
-# Variables globales para almacenar datos
-global_data = {
-    'productos': [],
-    'precio_dolar': 1000.0,
-    'ddi_pct': 18.0,
-    'tasas_pct': 3.0,
-    'iva_pct': 21.0,
-    'iva_adic_pct': 20.0,
-    'ganancias_pct': 6.0,
-    'iibb_pct': 2.0,
-    'seguro_pct': 0.5,
-    'agente_pct': 4.0,
-    'despachante_pct': 1.0,
-    'tipo_cambio_inventario': 1300.0
-}
+# Estado por sesión (parámetros y productos de cada usuario)
+from modules.estado_sesion import crear_estado_sesion
+estado_sesion = crear_estado_sesion()
 
-# Cargar productos desde CSV si existe
-if os.path.exists('productos_guardados.csv'):
-    try:
-        df_csv = pd.read_csv('productos_guardados.csv')
-        if not df_csv.empty:
-            global_data['productos'] = df_csv.to_dict('records')
-    except Exception as e:
-        global_data['productos'] = []
-
-# Layout principal
-app.layout = dbc.Container([
-    # Header
-    dbc.Row([
-        dbc.Col([
-            html.H1("📊 Sistema de Análisis de Costos y Ganancias", 
-                   className="text-center mb-4 text-primary"),
-            html.Hr()
-        ])
-    ]),
+# Layout principal (función para generar un id de sesión por pestaña)
+def serve_layout():
+    return dbc.Container([
+        # Identificador de sesión del navegador
+        dcc.Store(id='session-id', storage_type='session', data=str(uuid.uuid4())),
     
-    # Navegación
-            dbc.Row([
+        # Header
+        dbc.Row([
+            dbc.Col([
+                html.H1("📊 Sistema de Análisis de Costos y Ganancias", 
+                       className="text-center mb-4 text-primary"),
+                html.Hr()
+            ])
+        ]),
+    
+        # Navegación
+        dbc.Row([
             dbc.Col([
                 dbc.Nav([
                     dbc.NavItem(dbc.NavLink("🏠 Inicio", id="nav-inicio", n_clicks=0)),
@@ -73,18 +58,20 @@ app.layout = dbc.Container([
             ])
         ]),
     
-    # Contenido principal
-    html.Div(id="page-content"),
+        # Contenido principal
+        html.Div(id="page-content"),
     
-    # Footer
-    dbc.Row([
-        dbc.Col([
-            html.Hr(),
-            html.P("Sistema de Análisis de Costos y Ganancias - Desarrollado con Dash", 
-                   className="text-center text-muted")
+        # Footer
+        dbc.Row([
+            dbc.Col([
+                html.Hr(),
+                html.P("Sistema de Análisis de Costos y Ganancias - Desarrollado con Dash", 
+                       className="text-center text-muted")
+            ])
         ])
-    ])
-], fluid=True)
+    ], fluid=True)
+
+app.layout = serve_layout
 
 # Callback para navegación
 @app.callback(
@@ -239,11 +226,12 @@ def create_inventario_page():
      State("peso-caja", "value"),
      State("largo", "value"),
      State("ancho", "value"),
-     State("alto", "value")]
+     State("alto", "value"),
+     State("session-id", "data")]
 )
 def update_contenedor_config(save_clicks, add_clicks, precio_dolar, ddi_pct, tasas_pct, iva_pct, 
                            iva_adic_pct, ganancias_pct, iibb_pct, seguro_pct, agente_pct, despachante_pct,
-                           nombre, precio_fob, cantidad, piezas_caja, peso_caja, largo, ancho, alto):
+                           nombre, precio_fob, cantidad, piezas_caja, peso_caja, largo, ancho, alto, session_id):
     
     ctx = callback_context
     if not ctx.triggered:
@@ -256,16 +244,19 @@ def update_contenedor_config(save_clicks, add_clicks, precio_dolar, ddi_pct, tas
     
     if button_id == "save-config":
         # Guardar configuración
-        global_data['precio_dolar'] = precio_dolar or 1000.0
-        global_data['ddi_pct'] = ddi_pct or 18.0
-        global_data['tasas_pct'] = tasas_pct or 3.0
-        global_data['iva_pct'] = iva_pct or 21.0
-        global_data['iva_adic_pct'] = iva_adic_pct or 20.0
-        global_data['ganancias_pct'] = ganancias_pct or 6.0
-        global_data['iibb_pct'] = iibb_pct or 2.0
-        global_data['seguro_pct'] = seguro_pct or 0.5
-        global_data['agente_pct'] = agente_pct or 4.0
-        global_data['despachante_pct'] = despachante_pct or 1.0
+        estado_sesion.guardar_parametros(
+            session_id,
+            precio_dolar=precio_dolar or 1000.0,
+            ddi_pct=ddi_pct or 18.0,
+            tasas_pct=tasas_pct or 3.0,
+            iva_pct=iva_pct or 21.0,
+            iva_adic_pct=iva_adic_pct or 20.0,
+            ganancias_pct=ganancias_pct or 6.0,
+            iibb_pct=iibb_pct or 2.0,
+            seguro_pct=seguro_pct or 0.5,
+            agente_pct=agente_pct or 4.0,
+            despachante_pct=despachante_pct or 1.0
+        )
         
         return dbc.Alert("✅ Configuración guardada exitosamente!", color="success")
     
@@ -294,11 +285,9 @@ def update_contenedor_config(save_clicks, add_clicks, precio_dolar, ddi_pct, tas
                 'Gastos Fijos por Producto (USD)': 0  # Se calculará después
             }
             
-            global_data['productos'].append(producto)
-            
-            # Guardar en CSV
-            df = pd.DataFrame(global_data['productos'])
-            df.to_csv('productos_guardados.csv', index=False)
+            # Los productos de cada sesión viven solo en el backend de estado
+            # (productos_guardados.csv es compartido y solo se usa como lista inicial)
+            estado_sesion.modificar_productos(session_id, lambda actuales: actuales + (producto,))
             
             return dbc.Alert(f"✅ Producto '{nombre}' agregado exitosamente!", color="success")
         else:
@@ -312,154 +301,198 @@ def update_contenedor_config(save_clicks, add_clicks, precio_dolar, ddi_pct, tas
         html.Div(id="productos-display")
     ])
 
-@app.callback(
-    Output("inventario-content", "children"),
-    [Input("analyze-inventario", "n_clicks")],
-    [State("tipo-cambio-inventario", "value")]
-)
-def update_inventario_analysis(n_clicks, tipo_cambio):
-    if n_clicks and tipo_cambio:
-        global_data['tipo_cambio_inventario'] = tipo_cambio
-        return dbc.Alert(f"✅ Tipo de cambio actualizado a {tipo_cambio} ARS/USD", color="success")
+# Registro de archivos subidos: se decodifican y parsean una sola vez y
+# los callbacks de análisis solo reciben la clave (hash) del archivo
+def registrar_upload_store(contents, filename):
+    if contents is None:
+        raise PreventUpdate
     
-    return html.Div([
-        html.H4("📦 Análisis de Inventario"),
-        html.P("Configura el tipo de cambio y carga un archivo Excel con tu inventario.")
-    ])
+    from modules.cache_uploads import registrar_upload
+    try:
+        return {'clave': registrar_upload(contents, filename), 'filename': filename}
+    except Exception as e:
+        return {'clave': None, 'filename': filename, 'error': str(e)}
+
+for upload_id in ['upload-mercadolibre', 'upload-costos', 'upload-inventario', 'upload-costos-inventario']:
+    app.callback(
+        Output(upload_id.replace('upload-', 'store-'), 'data'),
+        [Input(upload_id, 'contents')],
+        [State(upload_id, 'filename')]
+    )(registrar_upload_store)
+
+def datos_upload(store):
+    """Obtener (df, filename, error) desde los datos de un dcc.Store de upload.
+
+    El DataFrame se toma de la cache de uploads de este proceso y se pasa al
+    trabajo ya parseado: el proceso del pool no ve esta cache y volvería a
+    leer el Excel desde disco.
+    """
+    from modules.cache_uploads import obtener_upload
+    
+    store = store or {}
+    filename, error = store.get('filename'), store.get('error')
+    if error or store.get('clave') is None:
+        return None, filename, error
+    df, _ = obtener_upload(store['clave'])
+    if df is None:
+        return None, filename, "El archivo ya no está disponible, vuelve a cargarlo"
+    return df, filename, None
+
+def render_estado_trabajo(job_id, titulo_inicial, texto_inicial, render_resultado):
+    """Devuelve (contenido, intervalo_deshabilitado) según el estado del trabajo en segundo plano"""
+    from modules.trabajos import estado_trabajo, resultado_trabajo
+    
+    if not job_id:
+        return html.Div([html.H4(titulo_inicial), html.P(texto_inicial)]), True
+    
+    estado = estado_trabajo(job_id)
+    if estado is None:
+        return dbc.Alert("❌ El análisis ya no está disponible, vuelve a ejecutarlo", color="danger"), True
+    
+    if estado['estado'] == 'error':
+        return dbc.Alert(f"❌ Error en el análisis: {estado.get('error', '')}", color="danger"), True
+    
+    if estado['estado'] != 'terminado':
+        return html.Div([
+            html.P(f"⏳ {estado.get('mensaje', 'Procesando...')}"),
+            dbc.Progress(value=estado.get('progreso', 0), label=f"{estado.get('progreso', 0)}%",
+                         striped=True, animated=True)
+        ]), False
+    
+    resultado = resultado_trabajo(job_id)
+    if resultado is None:
+        return dbc.Alert("❌ No se encontró el resultado del análisis", color="danger"), True
+    if 'error' in resultado:
+        return dbc.Alert(f"❌ {resultado['error']}", color="danger"), True
+    
+    return render_resultado(resultado), True
 
 # Callbacks para el módulo de ganancias
 @app.callback(
-    Output('ganancias-content', 'children'),
+    Output('ganancias-trabajo', 'data'),
     [Input('analyze-ganancias', 'n_clicks')],
-    [State('upload-mercadolibre', 'contents'),
-     State('upload-mercadolibre', 'filename'),
-     State('upload-costos', 'contents'),
-     State('upload-costos', 'filename')]
+    [State('store-mercadolibre', 'data'),
+     State('store-costos', 'data')]
 )
-def process_ganancias_analysis(n_clicks, mercadolibre_contents, mercadolibre_filename, 
-                             costos_contents, costos_filename):
+def process_ganancias_analysis(n_clicks, mercadolibre_store, costos_store):
     if not n_clicks:
-        return html.Div([
-            html.H4("💰 Análisis de Ganancias"),
-            html.P("Carga los reportes de MercadoLibre y costos para comenzar el análisis.")
-        ])
-    
-    from modules.ganancias_dash import procesar_reporte_mercadolibre, procesar_costos, calcular_ganancias, create_ganancias_table, create_ganancias_summary, create_ganancias_chart
-    
-    # Procesar reporte de MercadoLibre
-    df_ventas, info_ventas = procesar_reporte_mercadolibre(mercadolibre_contents, mercadolibre_filename)
-    if df_ventas is None:
-        return dbc.Alert(f"❌ Error en reporte de MercadoLibre: {info_ventas}", color="danger")
+        raise PreventUpdate
     
-    # Procesar archivo de costos
-    df_costos, info_costos = procesar_costos(costos_contents, costos_filename)
-    if df_costos is None:
-        return dbc.Alert(f"❌ Error en archivo de costos: {info_costos}", color="danger")
+    from modules.ganancias_dash import analizar_ganancias
+    from modules.trabajos import enviar_trabajo
     
-    # Calcular ganancias
-    df_resultado, metricas = calcular_ganancias(df_ventas, df_costos)
-    if df_resultado is None:
-        return dbc.Alert(f"❌ Error calculando ganancias: {metricas}", color="danger")
-    
-    return html.Div([
-        html.H4("📊 Resumen de Ganancias", className="mb-3"),
-        create_ganancias_summary(metricas),
-        html.Hr(),
-        html.H4("📈 Gráfico de Ganancias", className="mb-3"),
-        create_ganancias_chart(df_resultado),
-        html.Hr(),
-        html.H4("📋 Detalle de Ventas", className="mb-3"),
-        create_ganancias_table(df_resultado)
-    ])
+    # Los errores de carga se muestran a través del trabajo para mantener un único flujo
+    job_id = enviar_trabajo(analizar_ganancias, datos_upload(mercadolibre_store), datos_upload(costos_store))
+    return job_id
 
-# Callback unificado para inventario
 @app.callback(
-    Output('inventario-content', 'children'),
-    [Input('analyze-inventario', 'n_clicks'),
-     Input('tipo-cambio-inventario', 'value')],
-    [State('upload-inventario', 'contents'),
-     State('upload-inventario', 'filename'),
-     State('upload-costos-inventario', 'contents'),
-     State('upload-costos-inventario', 'filename')]
+    [Output('ganancias-content', 'children'),
+     Output('ganancias-intervalo', 'disabled')],
+    [Input('ganancias-intervalo', 'n_intervals'),
+     Input('ganancias-trabajo', 'data')]
 )
-def process_inventario_analysis(n_clicks, tipo_cambio, inventario_contents, inventario_filename,
-                              costos_contents, costos_filename):
-    ctx = callback_context
-    if not ctx.triggered:
-        return html.Div([
-            html.H4("📦 Análisis de Inventario"),
-            html.P("Configura el tipo de cambio y carga los archivos para comenzar el análisis.")
-        ])
+def poll_ganancias_analysis(n_intervals, job_id):
+    from modules.ganancias_dash import create_ganancias_table, create_ganancias_summary
     
-    # Si solo cambió el tipo de cambio, no procesar
-    if ctx.triggered[0]['prop_id'] == 'tipo-cambio-inventario.value':
+    def render_resultado(resultado):
         return html.Div([
-            html.H4("📦 Análisis de Inventario"),
-            html.P("Configura el tipo de cambio y carga los archivos para comenzar el análisis.")
-        ])
-    
-    if not n_clicks:
-        return html.Div([
-            html.H4("📦 Análisis de Inventario"),
-            html.P("Configura el tipo de cambio y carga los archivos para comenzar el análisis.")
+            html.H4("📊 Resumen de Ganancias", className="mb-3"),
+            create_ganancias_summary(resultado['metricas']),
+            html.Hr(),
+            html.H4("📈 Gráfico de Ganancias", className="mb-3"),
+            resultado['grafico'],
+            html.Hr(),
+            html.H4("📋 Detalle de Ventas", className="mb-3"),
+            create_ganancias_table(resultado['df'])
         ])
     
-    if not tipo_cambio:
-        return dbc.Alert("❌ Por favor ingresa el tipo de cambio", color="danger")
+    return render_estado_trabajo(
+        job_id,
+        "💰 Análisis de Ganancias",
+        "Carga los reportes de MercadoLibre y costos para comenzar el análisis.",
+        render_resultado
+    )
+
+# Callbacks para inventario
+@app.callback(
+    Output('inventario-trabajo', 'data'),
+    [Input('analyze-inventario', 'n_clicks')],
+    [State('tipo-cambio-inventario', 'value'),
+     State('store-inventario', 'data'),
+     State('store-costos-inventario', 'data'),
+     State('session-id', 'data')]
+)
+def process_inventario_analysis(n_clicks, tipo_cambio, inventario_store, costos_store, session_id):
+    if not n_clicks or not tipo_cambio:
+        raise PreventUpdate
     
-    from modules.inventario_dash import procesar_inventario, procesar_costos_inventario, calcular_valuacion_inventario, create_inventario_table, create_inventario_summary, create_inventario_chart
+    from modules.inventario_dash import analizar_inventario
+    from modules.trabajos import enviar_trabajo
     
-    # Procesar inventario
-    df_inventario, info_inventario = procesar_inventario(inventario_contents, inventario_filename)
-    if df_inventario is None:
-        return dbc.Alert(f"❌ Error en archivo de inventario: {info_inventario}", color="danger")
+    estado_sesion.guardar_parametros(session_id, tipo_cambio_inventario=tipo_cambio)
     
-    # Procesar costos
-    df_costos, info_costos = procesar_costos_inventario(costos_contents, costos_filename)
-    if df_costos is None:
-        return dbc.Alert(f"❌ Error en archivo de costos: {info_costos}", color="danger")
+    # Ejecutar el análisis en segundo plano (los errores de carga llegan al trabajo)
+    job_id = enviar_trabajo(analizar_inventario, datos_upload(inventario_store), datos_upload(costos_store),
+                            tipo_cambio)
+    return job_id
+
+@app.callback(
+    [Output('inventario-content', 'children'),
+     Output('inventario-intervalo', 'disabled')],
+    [Input('inventario-intervalo', 'n_intervals'),
+     Input('inventario-trabajo', 'data')]
+)
+def poll_inventario_analysis(n_intervals, job_id):
+    from modules.inventario_dash import create_inventario_table, create_inventario_summary
     
-    # Calcular valuación
-    df_resultado, metricas = calcular_valuacion_inventario(df_inventario, df_costos, tipo_cambio)
-    if df_resultado is None:
-        return dbc.Alert(f"❌ Error calculando valuación: {metricas}", color="danger")
+    def render_resultado(resultado):
+        return html.Div([
+            html.H4("📊 Resumen del Inventario", className="mb-3"),
+            create_inventario_summary(resultado['metricas']),
+            html.Hr(),
+            html.H4("📈 Gráfico de Ganancia Potencial", className="mb-3"),
+            resultado['grafico'],
+            html.Hr(),
+            html.H4("📋 Detalle del Inventario", className="mb-3"),
+            create_inventario_table(resultado['df'])
+        ])
     
-    return html.Div([
-        html.H4("📊 Resumen del Inventario", className="mb-3"),
-        create_inventario_summary(metricas),
-        html.Hr(),
-        html.H4("📈 Gráfico de Ganancia Potencial", className="mb-3"),
-        create_inventario_chart(df_resultado),
-        html.Hr(),
-        html.H4("📋 Detalle del Inventario", className="mb-3"),
-        create_inventario_table(df_resultado)
-    ])
+    return render_estado_trabajo(
+        job_id,
+        "📦 Análisis de Inventario",
+        "Configura el tipo de cambio y carga los archivos para comenzar el análisis.",
+        render_resultado
+    )
 
 # Callback para mostrar productos y cálculos
 @app.callback(
     Output("productos-display", "children"),
     [Input("save-config", "n_clicks"),
-     Input("add-producto", "n_clicks")]
+     Input("add-producto", "n_clicks")],
+    [State("session-id", "data")]
 )
-def display_productos(save_clicks, add_clicks):
-    if not global_data['productos']:
+def display_productos(save_clicks, add_clicks, session_id):
+    productos = estado_sesion.obtener_productos(session_id)
+    if not productos:
         return html.Div("No hay productos agregados aún.")
     
     from modules.contenedor_dash import calcular_dataframe_productos, create_product_table, create_summary_cards
     
+    parametros = estado_sesion.obtener_parametros(session_id)
+    
     # Calcular DataFrame con todos los cálculos
     df_productos = calcular_dataframe_productos(
-        global_data['productos'],
-        global_data['precio_dolar'],
-        global_data['ddi_pct'],
-        global_data['tasas_pct'],
-        global_data['iva_pct'],
-        global_data['iva_adic_pct'],
-        global_data['ganancias_pct'],
-        global_data['iibb_pct'],
-        global_data['seguro_pct'],
-        global_data['agente_pct'],
-        global_data['despachante_pct']
+        list(productos),
+        parametros['precio_dolar'],
+        parametros['ddi_pct'],
+        parametros['tasas_pct'],
+        parametros['iva_pct'],
+        parametros['iva_adic_pct'],
+        parametros['ganancias_pct'],
+        parametros['iibb_pct'],
+        parametros['seguro_pct'],
+        parametros['agente_pct'],
+        parametros['despachante_pct']
     )
     
     if df_productos.empty:
@@ -467,11 +500,16 @@ def display_productos(save_clicks, add_clicks):
     
     return html.Div([
         html.H4("📊 Resumen del Contenedor", className="mb-3"),
-        create_summary_cards(df_productos, global_data['precio_dolar']),
+        create_summary_cards(df_productos, parametros['precio_dolar']),
         html.Hr(),
         html.H4("📋 Tabla de Productos", className="mb-3"),
         create_product_table(df_productos)
     ])
 
+# Paginación, orden y filtro en el servidor para las tablas de los módulos
+from modules.tabla_paginada import registrar_callbacks_tabla
+for table_id in ['product-table', 'ganancias-table', 'inventario-table']:
+    registrar_callbacks_tabla(app, table_id)
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8050) 
\ No newline at end of file
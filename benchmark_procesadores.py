@@ -0,0 +1,287 @@
+import pandas as pd
+import numpy as np
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+from openpyxl import Workbook
+warnings.filterwarnings('ignore')
+
+from lector_excel import leer_excel
+from procesador_especifico_chino import ProcesadorArchivosChinos
+from procesador_formato_original import ProcesadorFormatoOriginal
+from procesador_archivos_proveedores import ProcesadorArchivosProveedores
+from procesar_ventas_mercadolibre import procesar_archivo_ventas, COLUMNAS_NECESARIAS
+
+# Corpus de archivos: un subdirectorio por procesador. Los sintéticos se
+# generan ahí; cualquier otro .xlsx que se copie también se mide.
+CORPUS_DIR = os.path.join("persistent_files", "benchmark")
+BASELINE_FILE = os.path.join(CORPUS_DIR, "baseline.json")
+
+# Archivos reales que se miden con el lector de Excel (costos, inventario, facturación de ML)
+PATRON_ARCHIVOS_REALES = os.path.join("persistent_files", "*.xlsx")
+
+TAMANOS_DEFAULT = [1000, 10000, 100000]
+
+# Aumento de tiempo respecto del baseline que se considera regresión
+TOLERANCIA_DEFAULT = 0.25
+
+# Diferencias menores no cuentan como regresión (ruido de medición en archivos chicos)
+MARGEN_MINIMO_SEGUNDOS = 0.15
+
+# Corridas por archivo (se toma la más rápida); con una sola el gate da falsos positivos
+REPETICIONES_DEFAULT = 3
+
+SEMILLA = 42
+
+COLUMNAS_ORIGINALES = [
+    'Nombre', 'SKU', 'Precio FOB (USD)', 'Cantidad Total',
+    'Piezas por Caja', 'Peso por Caja (kg)', 'Largo (cm)',
+    'Ancho (cm)', 'Alto (cm)', 'DDI (%)'
+]
+
+# ==================== CORPUS SINTÉTICO ====================
+
+def _guardar_filas(ruta, filas):
+    """Escribir filas en un xlsx en modo write_only (de forma atómica)"""
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    for fila in filas:
+        hoja.append(fila)
+    tmp_path = f"{ruta}.{os.getpid()}.tmp"
+    libro.save(tmp_path)
+    os.replace(tmp_path, ruta)
+
+def _productos_sinteticos(n, rng):
+    return pd.DataFrame({
+        'sku': rng.integers(10000, 99999, n),
+        'nombre': [f"Producto de prueba {i}" for i in range(n)],
+        'cantidad': rng.integers(6, 200, n),
+        'precio': rng.uniform(1, 90, n).round(2),
+        'cbm': rng.uniform(0.01, 0.2, n).round(3),
+        'peso': rng.uniform(1, 30, n).round(1)
+    })
+
+def _filas_chino(n, rng):
+    """Cotización china: título, encabezados en chino, productos y fila de total"""
+    p = _productos_sinteticos(n, rng)
+    yield ['QUOTATION']
+    yield ['Fecha: 2025-07-01']
+    yield []
+    yield ['编号', '品名', '图片', '装箱量', '单价(元)', '体积', '毛重']
+    for fila in p.itertuples(index=False):
+        yield [int(fila.sku), fila.nombre, None, int(fila.cantidad), fila.precio, fila.cbm, fila.peso]
+    yield [None, '合计', None, int(p['cantidad'].sum()), None, round(p['cbm'].sum(), 3), round(p['peso'].sum(), 1)]
+
+def _filas_proveedores(n, rng):
+    """Archivo de proveedor en inglés; uno de cada diez precios viene como texto en RMB"""
+    p = _productos_sinteticos(n, rng)
+    yield ['Item No', 'Description', 'Qty/ctn', 'Unit Price', 'CBM', 'G.W.']
+    for i, fila in enumerate(p.itertuples(index=False)):
+        precio = f"¥{fila.precio * 7:.2f}" if i % 10 == 0 else fila.precio
+        yield [int(fila.sku), fila.nombre, int(fila.cantidad), precio, fila.cbm, fila.peso]
+
+def _filas_original(n, rng):
+    p = _productos_sinteticos(n, rng)
+    yield COLUMNAS_ORIGINALES
+    for fila in p.itertuples(index=False):
+        yield [fila.nombre, f"SKU{int(fila.sku)}", fila.precio, int(fila.cantidad) * 10, int(fila.cantidad),
+               fila.peso, 40.0, 30.0, 25.0, 35.0]
+
+def _filas_mercadolibre(n, rng):
+    """Reporte de ventas de ML: 4 filas de título, encabezados en la línea 5 y ventas"""
+    meses = ['mayo', 'junio', 'julio', 'agosto']
+    estados = ['Entregado'] * 8 + ['Cancelada por el comprador', 'En camino']
+    yield ['Ventas | Argentina']
+    yield []
+    yield ['Reporte sintético para benchmark']
+    yield []
+    yield COLUMNAS_NECESARIAS
+    unidades = rng.integers(1, 5, n)
+    precios = rng.uniform(5000, 90000, n).round(2)
+    dias = rng.integers(1, 29, n)
+    for i in range(n):
+        ingresos = float(unidades[i] * precios[i])
+        cargo = round(-ingresos * 0.14, 2)
+        yield [2000000000 + i, f"{dias[i]} de {meses[i % 4]} de 2025 {i % 24:02d}:{i % 60:02d} hs.",
+               estados[i % len(estados)], int(unidades[i]), ingresos, cargo, -900.0, 0.0, -4500.0, 0.0,
+               round(ingresos + cargo - 5400.0, 2), f"{meses[i % 4]} 2025", f"SKU{i % 500:04d}",
+               f"Producto de prueba {i % 500}", float(precios[i]), 'Mercado Libre']
+
+GENERADORES = {
+    'chino': _filas_chino,
+    'proveedores': _filas_proveedores,
+    'original': _filas_original,
+    'mercadolibre': _filas_mercadolibre
+}
+
+def preparar_corpus(procesadores, tamanos, regenerar=False):
+    """Generar los archivos sintéticos que falten. Retorna {procesador: [rutas]}"""
+    corpus = {}
+    for procesador in [p for p in procesadores if p in GENERADORES]:
+        directorio = os.path.join(CORPUS_DIR, procesador)
+        os.makedirs(directorio, exist_ok=True)
+        sinteticos = []
+        for n in tamanos:
+            ruta = os.path.join(directorio, f"sintetico_{n}.xlsx")
+            if regenerar or not os.path.exists(ruta):
+                print(f"🔧 Generando {ruta}...")
+                _guardar_filas(ruta, GENERADORES[procesador](n, np.random.default_rng(SEMILLA)))
+            sinteticos.append(ruta)
+        # Los sintéticos de otros tamaños no se miden; los archivos reales del directorio sí
+        reales = [ruta for ruta in sorted(glob.glob(os.path.join(directorio, "*.xlsx")))
+                  if not os.path.basename(ruta).startswith('sintetico_')]
+        corpus[procesador] = reales + sinteticos
+    if 'lector_excel' in procesadores:
+        corpus['lector_excel'] = sorted(glob.glob(PATRON_ARCHIVOS_REALES))
+    return corpus
+
+# ==================== MEDICIÓN ====================
+
+def _filas_chino_extraidas(ruta):
+    return len(ProcesadorArchivosChinos().procesar_archivo(ruta) or [])
+
+def _filas_proveedores_extraidas(ruta):
+    return len(ProcesadorArchivosProveedores().procesar_archivo(ruta) or [])
+
+def _filas_original_extraidas(ruta):
+    return len(ProcesadorFormatoOriginal().procesar_archivo(ruta) or [])
+
+def _filas_mercadolibre_extraidas(ruta):
+    df, _ = procesar_archivo_ventas(ruta)
+    return len(df)
+
+def _filas_leidas(ruta):
+    return len(leer_excel(ruta, header=None))
+
+PROCESADORES = {
+    'chino': _filas_chino_extraidas,
+    'proveedores': _filas_proveedores_extraidas,
+    'original': _filas_original_extraidas,
+    'mercadolibre': _filas_mercadolibre_extraidas,
+    'lector_excel': _filas_leidas
+}
+
+def medir(procesador, ruta, repeticiones=REPETICIONES_DEFAULT):
+    """Tiempo (el mejor de las repeticiones), pico de memoria y filas extraídas de un archivo.
+
+    La memoria se mide en una corrida aparte porque tracemalloc hace más
+    lento el procesamiento.
+    """
+    funcion = PROCESADORES[procesador]
+    tiempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            filas = funcion(ruta)
+            tiempos.append(time.perf_counter() - inicio)
+        tracemalloc.start()
+        try:
+            funcion(ruta)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    segundos = min(tiempos)
+    return {
+        'filas': filas,
+        'segundos': segundos,
+        'filas_s': filas / segundos if segundos > 0 else 0,
+        'memoria_mb': pico / 1024 / 1024
+    }
+
+def comparar_con_baseline(resultados, baseline, tolerancia):
+    """Regresiones respecto del baseline: filas extraídas distintas o más tiempo que la tolerancia.
+
+    Retorna {caso: mensaje}.
+    """
+    regresiones = {}
+    for caso, actual in resultados.items():
+        base = baseline.get(caso)
+        if base is None:
+            continue
+        if actual['filas'] != base['filas']:
+            regresiones[caso] = f"{caso}: {actual['filas']} filas extraídas (baseline {base['filas']})"
+        elif actual['segundos'] - base['segundos'] > max(base['segundos'] * tolerancia, MARGEN_MINIMO_SEGUNDOS):
+            regresiones[caso] = (f"{caso}: {actual['segundos']:.2f}s (baseline {base['segundos']:.2f}s, "
+                                 f"{actual['filas_s']:,.0f} vs {base['filas_s']:,.0f} filas/s)")
+    return regresiones
+
+def guardar_baseline(resultados, ruta):
+    """Guardar los resultados como baseline (conserva los casos que no se midieron ahora)"""
+    baseline = {}
+    if os.path.exists(ruta):
+        with open(ruta, 'r') as f:
+            baseline = json.load(f)
+    baseline.update(resultados)
+    tmp_path = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+    os.replace(tmp_path, ruta)
+
+def main(argv=None):
+    """Mide los procesadores de archivos sobre el corpus y compara con el baseline"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark de los procesadores de archivos de proveedores y reportes de MercadoLibre"
+    )
+    parser.add_argument('--procesadores', nargs='+', choices=list(PROCESADORES), default=list(PROCESADORES),
+                        help="Procesadores a medir (default: todos)")
+    parser.add_argument('--tamanos', nargs='+', type=int, default=TAMANOS_DEFAULT,
+                        help="Filas de los archivos sintéticos (default: 1000 10000 100000)")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES_DEFAULT,
+                        help=f"Corridas por archivo; se toma la más rápida (default: {REPETICIONES_DEFAULT})")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Archivo JSON con el baseline")
+    parser.add_argument('--guardar-baseline', action='store_true', help="Guardar los resultados como nuevo baseline")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_DEFAULT,
+                        help="Aumento de tiempo permitido antes de marcar regresión (default: 0.25)")
+    parser.add_argument('--regenerar', action='store_true', help="Volver a generar los archivos sintéticos")
+    args = parser.parse_args(argv)
+
+    corpus = preparar_corpus(args.procesadores, args.tamanos, args.regenerar)
+
+    resultados = {}
+    casos = {}
+    print(f"\n{'Caso':<70} {'Filas':>8} {'Tiempo':>9} {'Filas/s':>10} {'Memoria':>10}")
+    for procesador, rutas in corpus.items():
+        for ruta in rutas:
+            caso = f"{procesador}:{os.path.basename(ruta)}"
+            resultado = medir(procesador, ruta, args.repeticiones)
+            resultados[caso] = resultado
+            casos[caso] = (procesador, ruta)
+            print(f"{caso[:70]:<70} {resultado['filas']:>8} {resultado['segundos']:>8.2f}s "
+                  f"{resultado['filas_s']:>10,.0f} {resultado['memoria_mb']:>8.1f}MB")
+
+    if args.guardar_baseline:
+        guardar_baseline(resultados, args.baseline)
+        print(f"\n💾 Baseline guardado en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️ No hay baseline en {args.baseline} (usar --guardar-baseline para crearlo)")
+        return 0
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regresiones = comparar_con_baseline(resultados, baseline, args.tolerancia)
+
+    # Un caso más lento se vuelve a medir antes de marcarlo: un pico de carga de la máquina no es regresión
+    for caso in [c for c in regresiones if resultados[c]['filas'] == baseline[c]['filas']]:
+        procesador, ruta = casos[caso]
+        nuevo = medir(procesador, ruta, args.repeticiones * 2)
+        if nuevo['segundos'] < resultados[caso]['segundos']:
+            resultados[caso] = nuevo
+    regresiones = comparar_con_baseline(resultados, baseline, args.tolerancia)
+    for regresion in regresiones.values():
+        print(f"❌ {regresion}")
+    if regresiones:
+        return 1
+    print(f"\n✅ Sin regresiones respecto de {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1023 @@
+"""
+Modelo de tarifas y solver de precios de MercadoLibre Argentina.
+
+Usado por la página Calculadora ML Avanzada; no depende de Streamlit.
+"""
+
+import pandas as pd
+import numpy as np
+import io
+import os
+import json
+import tempfile
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# Historial de tarifas con fechas de vigencia
+TARIFAS_ML_JSON = os.path.join("persistent_files", "tarifas_ml.json")
+
+# Variantes importadas (por ejemplo desde el contenedor)
+VARIANTES_ML_CSV = os.path.join("persistent_files", "variantes_ml.csv")
+
+# ==================== CLASES DE DATOS ====================
+
+class Categoria:
+    __slots__ = ('id', 'nombre', 'comision_pct', 'vigente_desde', 'vigente_hasta')
+
+    def __init__(self, id: str, nombre: str, comision_pct: float, 
+                 vigente_desde: date = None, vigente_hasta: date = None):
+        self.id = id
+        self.nombre = nombre
+        self.comision_pct = comision_pct
+        self.vigente_desde = vigente_desde
+        self.vigente_hasta = vigente_hasta
+
+class RangoPrecio:
+    __slots__ = ('id', 'moneda', 'min_precio', 'max_precio', 'costo_fijo', 'vigente_desde', 'vigente_hasta')
+
+    def __init__(self, id: str, moneda: str, min_precio: float, max_precio: float,
+                 costo_fijo: float, vigente_desde: date = None, vigente_hasta: date = None):
+        self.id = id
+        self.moneda = moneda
+        self.min_precio = min_precio
+        self.max_precio = max_precio
+        self.costo_fijo = costo_fijo
+        self.vigente_desde = vigente_desde
+        self.vigente_hasta = vigente_hasta
+
+class BandaEnvio:
+    __slots__ = ('id', 'regimen', 'peso_min_kg', 'peso_max_kg', 'costo_envio_ars',
+                 'subsidio_vendedor_pct', 'subsidio_vendedor_monto', 'volumetrico_factor',
+                 'zona', 'vigente_desde', 'vigente_hasta')
+
+    def __init__(self, id: str, regimen: str, peso_min_kg: float, peso_max_kg: float,
+                 costo_envio_ars: float, subsidio_vendedor_pct: float = 0,
+                 subsidio_vendedor_monto: float = 0, volumetrico_factor: float = None,
+                 zona: str = "nacional", vigente_desde: date = None, vigente_hasta: date = None):
+        self.id = id
+        self.regimen = regimen
+        self.peso_min_kg = peso_min_kg
+        self.peso_max_kg = peso_max_kg
+        self.costo_envio_ars = costo_envio_ars
+        self.subsidio_vendedor_pct = subsidio_vendedor_pct
+        self.subsidio_vendedor_monto = subsidio_vendedor_monto
+        self.volumetrico_factor = volumetrico_factor
+        self.zona = zona
+        self.vigente_desde = vigente_desde
+        self.vigente_hasta = vigente_hasta
+
+class Variante:
+    __slots__ = ('variant_id', 'sku', 'titulo', 'categoria_id', 'costo_unitario_usd', 'peso_kg',
+                 'largo_cm', 'ancho_cm', 'alto_cm', 'atributos')
+
+    def __init__(self, variant_id: str, sku: str, titulo: str, categoria_id: str,
+                 costo_unitario_usd: float, peso_kg: float,
+                 largo_cm: float = 0, ancho_cm: float = 0, alto_cm: float = 0,
+                 atributos: Dict = None):
+        self.variant_id = variant_id
+        self.sku = sku
+        self.titulo = titulo
+        self.categoria_id = categoria_id
+        self.costo_unitario_usd = costo_unitario_usd
+        self.peso_kg = peso_kg
+        self.largo_cm = largo_cm
+        self.ancho_cm = ancho_cm
+        self.alto_cm = alto_cm
+        self.atributos = atributos or {}
+
+class TablaVariantes:
+    """
+    Catálogo de variantes en formato columnar.
+
+    Costos, pesos y medidas son arrays NumPy y la categoría se guarda como
+    código entero sobre la lista categorias_ids, así los cálculos de todo
+    el catálogo trabajan sobre arrays y 100k variantes ocupan pocos MB.
+    Indexar la tabla devuelve una Variante.
+    """
+
+    COLUMNAS_NUMERICAS = ('costo_unitario_usd', 'peso_kg', 'largo_cm', 'ancho_cm', 'alto_cm')
+
+    def __init__(self, variant_id, sku, titulo, categoria_id, costo_unitario_usd, peso_kg,
+                 largo_cm=None, ancho_cm=None, alto_cm=None, atributos=None):
+        self.variant_id = np.asarray(variant_id, dtype=object)
+        self.sku = np.asarray(sku, dtype=object)
+        self.titulo = np.asarray(titulo, dtype=object)
+        codigos, categorias_ids = pd.factorize(pd.Series(categoria_id, dtype=object))
+        self.categoria_codigo = codigos.astype(np.int32)
+        self.categorias_ids = list(categorias_ids)
+        n = len(self.sku)
+        self.costo_unitario_usd = np.asarray(costo_unitario_usd, dtype=float)
+        self.peso_kg = np.asarray(peso_kg, dtype=float)
+        self.largo_cm = np.zeros(n) if largo_cm is None else np.asarray(largo_cm, dtype=float)
+        self.ancho_cm = np.zeros(n) if ancho_cm is None else np.asarray(ancho_cm, dtype=float)
+        self.alto_cm = np.zeros(n) if alto_cm is None else np.asarray(alto_cm, dtype=float)
+        # Atributos libres solo para las variantes que los tienen
+        self.atributos = dict(atributos or {})
+
+    @classmethod
+    def desde_variantes(cls, variantes: List[Variante]) -> 'TablaVariantes':
+        return cls(
+            [v.variant_id for v in variantes], [v.sku for v in variantes],
+            [v.titulo for v in variantes], [v.categoria_id for v in variantes],
+            [v.costo_unitario_usd for v in variantes], [v.peso_kg for v in variantes],
+            [v.largo_cm or 0 for v in variantes], [v.ancho_cm or 0 for v in variantes],
+            [v.alto_cm or 0 for v in variantes],
+            {i: v.atributos for i, v in enumerate(variantes) if v.atributos}
+        )
+
+    @property
+    def categoria_id(self) -> np.ndarray:
+        """Id de categoría de cada variante"""
+        ids = np.array(self.categorias_ids + [None], dtype=object)
+        return ids[self.categoria_codigo]
+
+    def __len__(self):
+        return len(self.sku)
+
+    def __getitem__(self, i) -> Variante:
+        categoria = self.categoria_codigo[i]
+        return Variante(
+            self.variant_id[i], self.sku[i], self.titulo[i],
+            self.categorias_ids[categoria] if categoria >= 0 else None,
+            float(self.costo_unitario_usd[i]), float(self.peso_kg[i]),
+            float(self.largo_cm[i]), float(self.ancho_cm[i]), float(self.alto_cm[i]),
+            dict(self.atributos.get(i, {}))
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @classmethod
+    def desde_dataframe(cls, df: pd.DataFrame) -> 'TablaVariantes':
+        """Inverso de a_dataframe"""
+        return cls(
+            df['variant_id'].astype(str).to_numpy(), df['sku'].astype(str).to_numpy(),
+            df['titulo'].astype(str).to_numpy(), df['categoria_id'].to_numpy(),
+            *(pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy() for col in cls.COLUMNAS_NUMERICAS)
+        )
+
+    @classmethod
+    def desde_productos_contenedor(cls, df_productos: pd.DataFrame, categoria_id: str) -> 'TablaVariantes':
+        """
+        Convertir la tabla de productos del contenedor en variantes, en un solo paso.
+        El costo es el precio unitario final en USD; la categoría es categoria_id
+        salvo que el producto tenga su propia 'Categoría ML'.
+        """
+        columna_costo = next(
+            (col for col in ('Precio Unitario Final (USD)', 'Precio Final (USD)', 'Precio FOB (USD)')
+             if col in df_productos.columns),
+            None
+        )
+        if columna_costo is None:
+            raise ValueError("La tabla de productos no tiene columna de precio en USD")
+
+        nombres = df_productos.get('Nombre', pd.Series('', index=df_productos.index)).fillna('').astype(str).str.strip()
+        skus = df_productos.get('SKU', nombres).fillna('').astype(str).str.strip()
+        skus = skus.where(skus != '', nombres)
+        categorias = pd.Series(categoria_id, index=df_productos.index, dtype=object)
+        if 'Categoría ML' in df_productos.columns:
+            categorias = df_productos['Categoría ML'].where(df_productos['Categoría ML'].notna(), categorias)
+
+        peso, largo, ancho, alto = medidas_unitarias_productos(df_productos)
+        return cls(
+            ('CONT-' + skus).to_numpy(), skus.to_numpy(), nombres.to_numpy(), categorias.to_numpy(),
+            pd.to_numeric(df_productos[columna_costo], errors='coerce').to_numpy(),
+            np.nan_to_num(peso), np.nan_to_num(largo), np.nan_to_num(ancho), np.nan_to_num(alto)
+        )
+
+    @classmethod
+    def cargar(cls, ruta: str = None) -> Optional['TablaVariantes']:
+        """Cargar variantes guardadas (None si no hay archivo)"""
+        ruta = ruta or VARIANTES_ML_CSV
+        if not os.path.exists(ruta):
+            return None
+        return cls.desde_dataframe(pd.read_csv(ruta))
+
+    def guardar(self, ruta: str = None):
+        """Guardar las variantes en CSV de forma atómica (los atributos libres no se guardan)"""
+        ruta = ruta or VARIANTES_ML_CSV
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        if not os.path.exists(directorio):
+            os.makedirs(directorio)
+        fd, tmp_path = tempfile.mkstemp(dir=directorio, suffix='.csv.tmp')
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                self.a_dataframe().to_csv(f, index=False)
+            os.replace(tmp_path, ruta)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def a_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            'variant_id': self.variant_id,
+            'sku': self.sku,
+            'titulo': self.titulo,
+            'categoria_id': self.categoria_id,
+            **{col: getattr(self, col) for col in self.COLUMNAS_NUMERICAS}
+        })
+
+# ==================== CONFIGURACIONES POR DEFECTO ====================
+
+def get_categorias_default() -> List[Categoria]:
+    """Categorías con comisiones REALES de MercadoLibre Argentina 2024-2025 (promedio nacional 11.8% - 17.14%)"""
+    return [
+        # Comisiones basadas en el rango real de Argentina (ajustadas por provincia)
+        # Usando valores promedio nacionales más representativos
+        Categoria("MLA1055", "Electrónica, Audio y Video", 0.1585),  # ~15.85% promedio
+        Categoria("MLA1648", "Computación", 0.1520),  # ~15.20% promedio 
+        Categoria("MLA1039", "Cámaras y Accesorios", 0.1565),  # ~15.65% promedio
+        Categoria("MLA1051", "Celulares y Teléfonos", 0.1620),  # ~16.20% promedio (categoría alta)
+        Categoria("MLA1276", "Deportes y Fitness", 0.1380),  # ~13.80% promedio
+        Categoria("MLA1430", "Ropa y Accesorios", 0.1320),   # ~13.20% promedio
+        Categoria("MLA1367", "Hogar, Muebles y Jardín", 0.1420),  # ~14.20% promedio
+        Categoria("MLA1071", "Animales y Mascotas", 0.1450),  # ~14.50% promedio
+        Categoria("MLA1132", "Juegos y Juguetes", 0.1480),   # ~14.80% promedio
+        Categoria("MLA1168", "Música, Películas y Series", 0.1350),  # ~13.50% promedio
+        Categoria("MLA1182", "Herramientas", 0.1440),   # ~14.40% promedio
+        Categoria("MLA1196", "Electrodomésticos", 0.1550),  # ~15.50% promedio
+        Categoria("MLA1000", "Supermercado", 0.1680),   # ~16.80% (sin costos fijos adicionales)
+        Categoria("MLA1499", "Industrias y Oficinas", 0.1290),  # ~12.90% promedio B2B
+        Categoria("MLA1953", "Servicios", 0.1250),   # ~12.50% promedio servicios
+        # Nuevas categorías específicas de Argentina
+        Categoria("MLA1743", "Autos, Motos y Otros", 0.1180),  # ~11.80% mínima
+        Categoria("MLA1540", "Inmuebles", 0.1200),  # ~12.00% inmuebles
+        Categoria("MLA1953", "Arte y Entretenimiento", 0.1380),  # ~13.80%
+    ]
+
+def get_rangos_precio_default() -> List[RangoPrecio]:
+    """Rangos de precio con costos fijos OFICIALES de MercadoLibre Argentina 2024-2025"""
+    return [
+        # Costos fijos OFICIALES según información de MercadoLibre Argentina
+        # Fuente: https://www.mercadolibre.com.ar/ayuda/Cargos-por-vender-productos_870
+        RangoPrecio("R1", "ARS", 1000, 14999, 1095),    # $1k-$15k: $1.095 por unidad vendida
+        RangoPrecio("R2", "ARS", 15000, 24999, 2190),   # $15k-$25k: $2.190 por unidad vendida
+        RangoPrecio("R3", "ARS", 25000, 32999, 2628),   # $25k-$33k: $2.628 por unidad vendida
+        RangoPrecio("R4", "ARS", 33000, 49999, 0),      # $33k-$50k: Sin costo fijo
+        RangoPrecio("R5", "ARS", 50000, 99999, 0),      # $50k-$100k: Sin costo fijo
+        RangoPrecio("R6", "ARS", 100000, 199999, 0),    # $100k-$200k: Sin costo fijo
+        RangoPrecio("R7", "ARS", 200000, 499999, 0),    # $200k-$500k: Sin costo fijo
+        RangoPrecio("R8", "ARS", 500000, 999999, 0),    # $500k-$1M: Sin costo fijo
+        RangoPrecio("R9", "ARS", 1000000, float('inf'), 0),  # +$1M: Sin costo fijo
+        # NOTA: Productos de supermercado Full Súper NO pagan costo fijo, pero sí pagan 3 puntos porcentuales adicionales
+    ]
+
+def get_bandas_envio_default() -> List[BandaEnvio]:
+    """Bandas de envío OFICIALES MercadoLibre Argentina 2024-2025 - MercadoLíder Platinum"""
+    bandas = []
+    
+    # MercadoEnvíos - Tarifas OFICIALES Argentina con descuento Platinum 50%
+    # Fuente: Información oficial de MercadoLibre Argentina - Costos de envío actualizados
+    # MercadoLíder Platinum: 50% descuento en envíos para productos >= $33k
+    # Todos los métodos de envío (Full, Flex) tienen el mismo costo base
+    bandas.extend([
+        BandaEnvio("E1", "envio", 0, 0.3, 5304, zona="nacional"),       # Hasta 0,3 kg - $5.304 (50% descuento)
+        BandaEnvio("E2", "envio", 0.3, 0.5, 5736, zona="nacional"),     # De 0,3 a 0,5 kg - $5.736 (50% descuento)
+        BandaEnvio("E3", "envio", 0.5, 1.0, 6431, zona="nacional"),     # De 0,5 a 1 kg - $6.431 (50% descuento)
+        BandaEnvio("E4", "envio", 1.0, 2.0, 6862, zona="nacional"),     # De 1 a 2 kg - $6.862 (50% descuento)
+        BandaEnvio("E5", "envio", 2.0, 5.0, 9127, zona="nacional"),     # De 2 a 5 kg - $9.127 (50% descuento)
+        BandaEnvio("E6", "envio", 5.0, 10.0, 10840, zona="nacional"),   # De 5 a 10 kg - $10.840 (50% descuento)
+        BandaEnvio("E7", "envio", 10.0, 15.0, 12544, zona="nacional"),  # De 10 a 15 kg - $12.544 (50% descuento)
+        BandaEnvio("E8", "envio", 15.0, 20.0, 14985.5, zona="nacional"), # De 15 a 20 kg - $14.985,50 (50% descuento)
+        BandaEnvio("E9", "envio", 20.0, 25.0, 17879.5, zona="nacional"), # De 20 a 25 kg - $17.879,50 (50% descuento)
+        BandaEnvio("E10", "envio", 25.0, 30.0, 24540.5, zona="nacional"), # De 25 a 30 kg - $24.540,50 (50% descuento)
+        BandaEnvio("E11", "envio", 30.0, 40.0, 28015.5, zona="nacional"), # De 30 a 40 kg - $28.015,50 (50% descuento)
+        BandaEnvio("E12", "envio", 40.0, 50.0, 29473, zona="nacional"),  # De 40 a 50 kg - $29.473 (50% descuento)
+        BandaEnvio("E13", "envio", 50.0, 60.0, 32747.5, zona="nacional"), # De 50 a 60 kg - $32.747,50 (50% descuento)
+        BandaEnvio("E14", "envio", 60.0, 70.0, 34057, zona="nacional"),  # De 60 a 70 kg - $34.057 (50% descuento)
+        BandaEnvio("E15", "envio", 70.0, 80.0, 39379, zona="nacional"),  # De 70 a 80 kg - $39.379 (50% descuento)
+        BandaEnvio("E16", "envio", 80.0, 90.0, 48691.5, zona="nacional"), # De 80 a 90 kg - $48.691,50 (50% descuento)
+        BandaEnvio("E17", "envio", 90.0, 100.0, 56150.5, zona="nacional"), # De 90 a 100 kg - $56.150,50 (50% descuento)
+        BandaEnvio("E18", "envio", 100.0, 120.0, 61301.5, zona="nacional"), # De 100 a 120 kg - $61.301,50 (50% descuento)
+        BandaEnvio("E19", "envio", 120.0, 140.0, 69029, zona="nacional"),  # De 120 a 140 kg - $69.029 (50% descuento)
+        BandaEnvio("E20", "envio", 140.0, 160.0, 76755.5, zona="nacional"), # De 140 a 160 kg - $76.755,50 (50% descuento)
+        BandaEnvio("E21", "envio", 160.0, 180.0, 84482.5, zona="nacional"), # De 160 a 180 kg - $84.482,50 (50% descuento)
+        BandaEnvio("E22", "envio", 180.0, float('inf'), 92210, zona="nacional"), # Más de 180 kg - $92.210 (50% descuento)
+    ])
+    
+    return bandas
+
+def get_variantes_ejemplo() -> List[Variante]:
+    """Variantes de ejemplo realistas para MercadoLíder Platinum"""
+    return [
+        # Celulares - Alta comisión pero alto volumen
+        Variante("V1", "IPHONE15-BLK-128", "iPhone 15 128GB Negro", "MLA1051", 
+                850.0, 0.2, 14.7, 7.1, 0.8),
+        Variante("V2", "SAMSUNG-S24-WHT-256", "Samsung Galaxy S24 256GB Blanco", "MLA1051",
+                720.0, 0.18, 14.6, 7.0, 0.8),
+        Variante("V3", "XIAOMI-13-BLU-128", "Xiaomi 13 128GB Azul", "MLA1051",
+                380.0, 0.19, 15.2, 7.4, 0.81),
+        
+        # Electrónica - Gama media/alta
+        Variante("V4", "AIRPODS-PRO-2", "AirPods Pro 2da Gen", "MLA1055",
+                200.0, 0.06, 6.1, 4.5, 2.2),
+        Variante("V5", "SONY-WH1000XM5", "Sony WH-1000XM5 Headphones", "MLA1055",
+                280.0, 0.25, 25.4, 20.3, 7.6),
+        Variante("V6", "GOPRO-HERO12", "GoPro Hero 12 Black", "MLA1039",
+                420.0, 0.15, 7.1, 5.5, 3.3),
+        
+        # Computación - Alto valor
+        Variante("V7", "MACBOOK-AIR-M3", "MacBook Air M3 13'' 256GB", "MLA1648",
+                1200.0, 1.24, 30.4, 21.5, 1.1),
+        Variante("V8", "LENOVO-LEGION-5", "Lenovo Legion 5 Gaming Laptop", "MLA1648",
+                850.0, 2.3, 36.2, 26.0, 2.4),
+        
+        # Gaming - Volumen medio
+        Variante("V9", "PLAYSTATION5-STD", "PlayStation 5 Standard Edition", "MLA1132",
+                450.0, 4.5, 39.0, 10.4, 26.0),
+        Variante("V10", "NINTENDO-SWITCH-OLED", "Nintendo Switch OLED", "MLA1132",
+                280.0, 0.42, 24.2, 10.6, 1.4),
+        
+        # Electrodomésticos - Peso y volumen altos
+        Variante("V11", "PHILIPS-AIRFRYER-XL", "Philips Airfryer XXL 7.3L", "MLA1196",
+                180.0, 5.8, 31.5, 40.3, 36.8),
+        Variante("V12", "SAMSUNG-TV-55-4K", "Samsung Smart TV 55'' 4K", "MLA1055",
+                520.0, 18.5, 123.2, 70.8, 8.1),
+        
+        # Ropa - Comisión mínima, alto volumen
+        Variante("V13", "NIKE-AIR-MAX-270", "Nike Air Max 270 Running", "MLA1430",
+                85.0, 0.8, 33.0, 20.5, 12.0),
+        Variante("V14", "ADIDAS-ULTRABOOST-22", "Adidas Ultraboost 22", "MLA1430",
+                140.0, 0.9, 34.2, 21.0, 12.5),
+        
+        # Hogar - Variedad de pesos
+        Variante("V15", "DYSON-V15-DETECT", "Dyson V15 Detect Absolute", "MLA1367",
+                480.0, 3.1, 126.0, 25.0, 25.0),
+    ]
+
+# ==================== FUNCIONES DE BÚSQUEDA ====================
+
+def buscar_categoria(categorias: List[Categoria], categoria_id: str) -> Optional[Categoria]:
+    """Busca una categoría por ID"""
+    for cat in categorias:
+        if cat.id == categoria_id:
+            return cat
+    return None
+
+def buscar_rango_precio(rangos: List[RangoPrecio], precio: float, moneda: str = "ARS") -> Optional[RangoPrecio]:
+    """Busca el rango de precio que corresponde al precio dado.
+    Los topes publicados son pesos enteros: un rango hasta $14.999 incluye $14.999,50"""
+    for rango in rangos:
+        if (rango.moneda == moneda and 
+            rango.min_precio <= precio < rango.max_precio + 1):
+            return rango
+    return None
+
+def buscar_banda_envio(bandas: List[BandaEnvio], regimen: str, peso_kg: float, 
+                      zona: str = "nacional") -> Optional[BandaEnvio]:
+    """Busca la banda de envío que corresponde al peso (todos los regímenes tienen el mismo costo)"""
+    for banda in bandas:
+        if (banda.zona == zona and
+            banda.peso_min_kg <= peso_kg <= banda.peso_max_kg):
+            return banda
+    return None
+
+class TablaTarifas:
+    """
+    Tarifas compiladas para búsquedas rápidas.
+
+    Rangos de precio (por moneda) y bandas de envío (por zona) se guardan
+    como arrays NumPy ordenados y se consultan con searchsorted; las
+    categorías van a un diccionario. Los métodos con indices_/costos_
+    aceptan arrays de precios o pesos para calcular catálogos completos.
+    Los resultados coinciden con buscar_rango_precio/buscar_banda_envio.
+    """
+
+    def __init__(self, categorias: List[Categoria], rangos: List[RangoPrecio], bandas: List[BandaEnvio]):
+        self.categorias = list(categorias)
+        self.rangos = list(rangos)
+        self.bandas = list(bandas)
+
+        # Ante ids repetidos gana el primero, igual que buscar_categoria
+        self._categorias = {}
+        for cat in self.categorias:
+            self._categorias.setdefault(cat.id, cat)
+
+        self._rangos = {}
+        for moneda in {r.moneda for r in self.rangos}:
+            indices = sorted((i for i, r in enumerate(self.rangos) if r.moneda == moneda),
+                             key=lambda i: self.rangos[i].min_precio)
+            self._rangos[moneda] = {
+                'min': np.array([self.rangos[i].min_precio for i in indices], dtype=float),
+                'tope': np.array([self.rangos[i].max_precio + 1 for i in indices], dtype=float),
+                'costo_fijo': np.array([self.rangos[i].costo_fijo for i in indices], dtype=float),
+                'indices': np.array(indices, dtype=int),
+                'tramos': intervalos_costo_fijo(self.rangos, moneda)
+            }
+
+        self._bandas = {}
+        for zona in {b.zona for b in self.bandas}:
+            indices = sorted((i for i, b in enumerate(self.bandas) if b.zona == zona),
+                             key=lambda i: (self.bandas[i].peso_max_kg, i))
+            self._bandas[zona] = {
+                'min': np.array([self.bandas[i].peso_min_kg for i in indices], dtype=float),
+                'max': np.array([self.bandas[i].peso_max_kg for i in indices], dtype=float),
+                'costo': np.array([self.bandas[i].costo_envio_ars for i in indices], dtype=float),
+                'indices': np.array(indices, dtype=int)
+            }
+
+    # ---------- Categorías ----------
+
+    def buscar_categoria(self, categoria_id: str) -> Optional[Categoria]:
+        return self._categorias.get(categoria_id)
+
+    def comisiones(self, categoria_ids) -> np.ndarray:
+        """Comisión por id de categoría (NaN si no existe)"""
+        comision = {cat_id: cat.comision_pct for cat_id, cat in self._categorias.items()}
+        return np.array([comision.get(cat_id, np.nan) for cat_id in categoria_ids], dtype=float)
+
+    # ---------- Rangos de precio ----------
+
+    def indices_rango(self, precios, moneda: str = "ARS") -> np.ndarray:
+        """Índice en self.rangos del rango de cada precio (-1 si no hay rango)"""
+        precios = np.asarray(precios, dtype=float)
+        tabla = self._rangos.get(moneda)
+        if tabla is None:
+            return np.full(precios.shape, -1, dtype=int)
+        posicion = np.searchsorted(tabla['min'], precios, side='right') - 1
+        posicion_segura = np.clip(posicion, 0, None)
+        encontrado = (posicion >= 0) & (precios < tabla['tope'][posicion_segura])
+        return np.where(encontrado, tabla['indices'][posicion_segura], -1)
+
+    def costos_fijos(self, precios, moneda: str = "ARS") -> np.ndarray:
+        """Costo fijo por unidad para cada precio (0 fuera de los rangos)"""
+        indices = self.indices_rango(precios, moneda)
+        costos = np.array([r.costo_fijo for r in self.rangos] + [0.0], dtype=float)
+        return costos[indices]
+
+    def buscar_rango_precio(self, precio: float, moneda: str = "ARS") -> Optional[RangoPrecio]:
+        indice = int(self.indices_rango(precio, moneda))
+        return self.rangos[indice] if indice >= 0 else None
+
+    def intervalos_costo_fijo(self, moneda: str = "ARS"):
+        """Tramos precalculados de intervalos_costo_fijo para la moneda"""
+        tabla = self._rangos.get(moneda)
+        return tabla['tramos'] if tabla else intervalos_costo_fijo([], moneda)
+
+    # ---------- Bandas de envío ----------
+
+    def indices_banda(self, pesos_kg, zona: str = "nacional") -> np.ndarray:
+        """Índice en self.bandas de la banda de cada peso (-1 si no hay banda)"""
+        pesos_kg = np.asarray(pesos_kg, dtype=float)
+        tabla = self._bandas.get(zona)
+        if tabla is None:
+            return np.full(pesos_kg.shape, -1, dtype=int)
+        posicion = np.searchsorted(tabla['max'], pesos_kg, side='left')
+        posicion_segura = np.clip(posicion, 0, len(tabla['max']) - 1)
+        encontrado = (posicion < len(tabla['max'])) & (tabla['min'][posicion_segura] <= pesos_kg)
+        return np.where(encontrado, tabla['indices'][posicion_segura], -1)
+
+    def costos_envio(self, pesos_kg, zona: str = "nacional") -> np.ndarray:
+        """Costo de envío de la banda de cada peso (NaN si no hay banda)"""
+        indices = self.indices_banda(pesos_kg, zona)
+        costos = np.array([b.costo_envio_ars for b in self.bandas] + [np.nan], dtype=float)
+        return costos[indices]
+
+    def buscar_banda_envio(self, peso_kg: float, zona: str = "nacional") -> Optional[BandaEnvio]:
+        indice = int(self.indices_banda(peso_kg, zona))
+        return self.bandas[indice] if indice >= 0 else None
+
+def calcular_peso_facturable(variante: Variante, volumetrico_factor: float = None) -> float:
+    """Calcula el peso facturable considerando peso volumétrico"""
+    peso_real = variante.peso_kg
+    
+    if volumetrico_factor and variante.largo_cm and variante.ancho_cm and variante.alto_cm:
+        volumen_cm3 = variante.largo_cm * variante.ancho_cm * variante.alto_cm
+        peso_volumetrico = volumen_cm3 / volumetrico_factor / 1000  # convertir a kg
+        return max(peso_real, peso_volumetrico)
+    
+    return peso_real
+
+def calcular_pesos_facturables(pesos_kg, largo_cm, ancho_cm, alto_cm,
+                               volumetrico_factor: float = None) -> np.ndarray:
+    """Versión vectorizada de calcular_peso_facturable para arrays de pesos y medidas"""
+    pesos_kg = np.asarray(pesos_kg, dtype=float)
+    if not volumetrico_factor:
+        return pesos_kg.copy()
+
+    largo_cm, ancho_cm, alto_cm = (np.nan_to_num(np.asarray(x, dtype=float)) for x in (largo_cm, ancho_cm, alto_cm))
+    peso_volumetrico = largo_cm * ancho_cm * alto_cm / volumetrico_factor / 1000  # convertir a kg
+    con_medidas = (largo_cm != 0) & (ancho_cm != 0) & (alto_cm != 0)
+    return np.where(con_medidas, np.maximum(pesos_kg, peso_volumetrico), pesos_kg)
+
+def asignar_bandas_variantes(variantes: 'TablaVariantes', tarifas: 'TablaTarifas',
+                             volumetrico_factor: float = None,
+                             zona: str = "nacional") -> Tuple[np.ndarray, np.ndarray]:
+    """Peso facturable e índice de BandaEnvio (-1 si no hay) de cada variante"""
+    pesos = calcular_pesos_facturables(
+        variantes.peso_kg, variantes.largo_cm, variantes.ancho_cm, variantes.alto_cm, volumetrico_factor
+    )
+    return pesos, tarifas.indices_banda(pesos, zona)
+
+def medidas_unitarias_productos(df_productos: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Peso (kg) y medidas (cm) por unidad de los productos del contenedor.
+    El peso de la caja se divide por Piezas por Caja y las medidas se escalan
+    con la raíz cúbica de las piezas, así el volumen unitario es el de la caja / piezas.
+    """
+    piezas = pd.to_numeric(df_productos.get('Piezas por Caja', 1), errors='coerce')
+    piezas = np.where(np.asarray(piezas, dtype=float) > 0, piezas, 1)
+    peso_caja = pd.to_numeric(df_productos.get('Peso por Caja (kg)', np.nan), errors='coerce')
+    medidas = [
+        pd.to_numeric(df_productos.get(col, 0), errors='coerce')
+        for col in ('Largo (cm)', 'Ancho (cm)', 'Alto (cm)')
+    ]
+
+    peso_unitario = np.broadcast_to(np.asarray(peso_caja, dtype=float) / piezas, (len(df_productos),))
+    escala = np.cbrt(piezas)
+    largo, ancho, alto = (np.broadcast_to(np.asarray(m, dtype=float) / escala, (len(df_productos),)) for m in medidas)
+    return peso_unitario, largo, ancho, alto
+
+# ==================== SOLVER DE PRECIOS ====================
+
+def calcular_costo_envio_vendedor(banda: BandaEnvio, precio_producto: float = 0) -> float:
+    """Calcula el costo de envío que asume el vendedor con beneficios Platinum automáticos.
+    subsidio_vendedor_pct es una fracción (0.5 = 50% del envío)."""
+    costo_base = banda.costo_envio_ars
+    
+    # Beneficio MercadoLíder Platinum: 50% descuento en envíos para productos desde $33k
+    # (Los precios ya tienen el descuento aplicado)
+    if precio_producto >= 33000:
+        # El descuento ya está aplicado en las tarifas, no hacer nada adicional
+        pass
+    
+    # Aplicar subsidio adicional del vendedor si existe
+    if banda.subsidio_vendedor_monto > 0:
+        return banda.subsidio_vendedor_monto
+    else:
+        return costo_base * banda.subsidio_vendedor_pct
+
+def calcular_impuestos_sobre_precio(precio: float, iva_pct: float = 0, 
+                                   iibb_pct: float = 0, pais_pct: float = 0) -> float:
+    """Calcula impuestos aplicados sobre el precio de venta"""
+    return precio * (iva_pct + iibb_pct + pais_pct) / 100
+
+def ganancia_neta(precio: float, costo_ars: float, categoria: Categoria,
+                 rango: RangoPrecio, envio_vendedor: float,
+                 iva_pct: float = 0, iibb_pct: float = 0, pais_pct: float = 0) -> float:
+    """Calcula la ganancia neta para un precio dado"""
+    comision_variable = precio * categoria.comision_pct
+    costo_fijo = rango.costo_fijo if rango else 0
+    impuestos = calcular_impuestos_sobre_precio(precio, iva_pct, iibb_pct, pais_pct)
+    
+    return precio - comision_variable - costo_fijo - envio_vendedor - impuestos - costo_ars
+
+def solver_precio_optimo(costo_ars: float, margen_objetivo: float, 
+                        categoria: Categoria, rangos,
+                        envio_vendedor: float, iva_pct: float = 0,
+                        iibb_pct: float = 0, pais_pct: float = 0,
+                        es_margen_pct: bool = False, max_iter: int = 100,
+                        tolerancia: float = 0.01) -> Tuple[float, Dict]:
+    """
+    Solver exacto del precio mínimo que cumple el margen objetivo.
+
+    La ganancia es lineal en el precio dentro de cada tramo de costo fijo,
+    así que se despeja el precio en cada tramo, se descartan los que caen
+    fuera de su tramo y se toma el menor. Los saltos de costo fijo en los
+    bordes de los rangos quedan resueltos sin iterar. max_iter y tolerancia
+    se mantienen por compatibilidad; rangos puede ser una lista o una TablaTarifas.
+    Retorna (precio_optimo, desglose_detallado)
+    """
+    comision_pct = categoria.comision_pct if categoria else 0
+    neto = 1 - comision_pct - (iva_pct + iibb_pct + pais_pct) / 100
+    if es_margen_pct:
+        neto -= margen_objetivo / 100
+        a_cubrir = costo_ars + envio_vendedor
+    else:
+        a_cubrir = costo_ars + envio_vendedor + margen_objetivo
+    
+    if neto <= 0:
+        raise ValueError("El margen objetivo no es alcanzable con la comisión e impuestos configurados")
+    
+    precio = None
+    desde, hasta, costos_fijos, _ = _tramos_costo_fijo(rangos)
+    for tramo_desde, tramo_hasta, costo_fijo in zip(desde, hasta, costos_fijos):
+        candidato = max((a_cubrir + costo_fijo) / neto, tramo_desde)
+        if candidato <= tramo_hasta and (precio is None or candidato < precio):
+            precio = float(candidato)
+    iteracion = len(desde)
+    
+    # Calcular desglose final
+    if isinstance(rangos, TablaTarifas):
+        rango_final = rangos.buscar_rango_precio(precio)
+    else:
+        rango_final = buscar_rango_precio(rangos, precio)
+    ganancia_final = ganancia_neta(precio, costo_ars, categoria, rango_final,
+                                 envio_vendedor, iva_pct, iibb_pct, pais_pct)
+    
+    desglose = {
+        'precio_final': precio,
+        'costo_ars': costo_ars,
+        'comision_variable': precio * (categoria.comision_pct if categoria else 0),
+        'costo_fijo': rango_final.costo_fijo if rango_final else 0,
+        'envio_vendedor': envio_vendedor,
+        'impuestos_total': calcular_impuestos_sobre_precio(precio, iva_pct, iibb_pct, pais_pct),
+        'ganancia_neta': ganancia_final,
+        'margen_pct': (ganancia_final / precio * 100) if precio > 0 else 0,
+        'iteraciones': iteracion,
+        'categoria_aplicada': categoria.nombre if categoria else "N/A",
+        'rango_aplicado': f"${rango_final.min_precio:,.0f} - ${rango_final.max_precio:,.0f}" if rango_final else "N/A"
+    }
+    
+    return precio, desglose
+
+def intervalos_costo_fijo(rangos: List[RangoPrecio], moneda: str = "ARS") -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tramos de precio con costo fijo constante, ordenados por precio.
+    Usa el mismo criterio que buscar_rango_precio e incluye los huecos sin
+    rango (por ejemplo antes del primer rango), donde no se cobra costo fijo.
+    Retorna (desde, hasta, costo_fijo, indice_rango) con -1 en los huecos.
+    """
+    ordenados = sorted(
+        [(r.min_precio, r.max_precio, r.costo_fijo, i) for i, r in enumerate(rangos) if r.moneda == moneda]
+    )
+    desde, hasta, costos, indices = [], [], [], []
+    limite = 0.0
+    for min_precio, max_precio, costo_fijo, i in ordenados:
+        if min_precio > limite:
+            desde.append(limite)
+            hasta.append(np.nextafter(min_precio, -np.inf))
+            costos.append(0.0)
+            indices.append(-1)
+        desde.append(max(min_precio, limite))
+        hasta.append(np.nextafter(max_precio + 1, -np.inf))
+        costos.append(costo_fijo)
+        indices.append(i)
+        limite = max_precio + 1
+    if limite < np.inf:
+        desde.append(limite)
+        hasta.append(np.inf)
+        costos.append(0.0)
+        indices.append(-1)
+    return np.array(desde), np.array(hasta), np.array(costos, dtype=float), np.array(indices)
+
+def _tramos_costo_fijo(rangos, moneda: str = "ARS"):
+    """Tramos de costo fijo desde una lista de rangos o una TablaTarifas"""
+    if isinstance(rangos, TablaTarifas):
+        return rangos.intervalos_costo_fijo(moneda)
+    return intervalos_costo_fijo(rangos, moneda)
+
+def resolver_precios_lote(costos_ars, margenes_objetivo, comisiones_pct,
+                          rangos: List[RangoPrecio], envios_vendedor,
+                          iva_pct: float = 0, iibb_pct: float = 0, pais_pct: float = 0,
+                          es_margen_pct: bool = False, moneda: str = "ARS") -> pd.DataFrame:
+    """
+    Calcula el precio mínimo que cumple el margen objetivo para muchos productos a la vez.
+
+    Dentro de cada tramo de costo fijo la ganancia es lineal en el precio,
+    así que el precio se despeja en forma cerrada por tramo, se descartan los
+    que caen fuera de su tramo y se toma el menor. Los argumentos pueden ser
+    arrays (uno por producto) o escalares, y rangos una lista o una
+    TablaTarifas. Los productos sin precio posible
+    (margen inalcanzable) quedan con precio NaN.
+    """
+    costos_ars, margenes, comisiones, envios = np.broadcast_arrays(
+        np.asarray(costos_ars, dtype=float), np.asarray(margenes_objetivo, dtype=float),
+        np.asarray(comisiones_pct, dtype=float), np.asarray(envios_vendedor, dtype=float)
+    )
+    desde, hasta, costos_fijos, indices = _tramos_costo_fijo(rangos, moneda)
+    tasa_impuestos = (np.asarray(iva_pct, dtype=float) + np.asarray(iibb_pct, dtype=float)
+                      + np.asarray(pais_pct, dtype=float)) / 100
+
+    # Fracción del precio que queda después de comisión, impuestos y margen %
+    neto = 1 - comisiones - tasa_impuestos
+    if es_margen_pct:
+        neto = neto - margenes / 100
+        a_cubrir = costos_ars + envios
+    else:
+        a_cubrir = costos_ars + envios + margenes
+
+    # Matriz productos x tramos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precio_equilibrio = (a_cubrir[:, None] + costos_fijos[None, :]) / neto[:, None]
+    candidatos = np.maximum(precio_equilibrio, desde[None, :])
+    validos = (neto[:, None] > 0) & (candidatos <= hasta[None, :])
+    candidatos = np.where(validos, candidatos, np.inf)
+
+    tramo = np.argmin(candidatos, axis=1)
+    filas = np.arange(len(tramo))
+    precios = candidatos[filas, tramo]
+    factible = np.isfinite(precios)
+    precios = np.where(factible, precios, np.nan)
+
+    costo_fijo = np.where(factible, costos_fijos[tramo], np.nan)
+    comision_variable = precios * comisiones
+    impuestos_total = precios * tasa_impuestos
+    ganancia = precios - comision_variable - costo_fijo - envios - impuestos_total - costos_ars
+
+    return pd.DataFrame({
+        'precio_final': precios,
+        'costo_ars': costos_ars,
+        'comision_variable': comision_variable,
+        'costo_fijo': costo_fijo,
+        'envio_vendedor': envios,
+        'impuestos_total': impuestos_total,
+        'ganancia_neta': ganancia,
+        'margen_pct': np.where(precios > 0, ganancia / precios * 100, 0),
+        'indice_rango': np.where(factible, indices[tramo], -1)
+    })
+
+def _redondear_resultado(resultado: pd.DataFrame, regla_redondeo: str, tarifas: TablaTarifas,
+                         comisiones, tasa_impuestos):
+    """Redondea precio_final y recalcula costo fijo, ganancia y margen (precio sin redondear en precio_solver)"""
+    precios = aplicar_redondeo_lote(resultado['precio_final'].to_numpy(), regla_redondeo)
+    resultado.insert(resultado.columns.get_loc('precio_final'), 'precio_solver', resultado['precio_final'])
+    resultado['precio_final'] = precios
+    resultado['comision_variable'] = precios * comisiones
+    resultado['costo_fijo'] = np.where(np.isnan(precios), np.nan, tarifas.costos_fijos(precios))
+    resultado['impuestos_total'] = precios * tasa_impuestos
+    resultado['ganancia_neta'] = (precios - resultado['comision_variable'] - resultado['costo_fijo']
+                                  - resultado['envio_vendedor'] - resultado['impuestos_total'] - resultado['costo_ars'])
+    resultado['margen_pct'] = np.where(precios > 0, resultado['ganancia_neta'] / precios * 100, 0)
+    resultado['indice_rango'] = tarifas.indices_rango(precios)
+    return resultado
+
+def preciar_catalogo(variantes, tarifas: TablaTarifas,
+                     tc_ars_usd: float, margen_objetivo: float, es_margen_pct: bool = False,
+                     subsidio_envio_pct: float = 0, costos_extra: float = 0,
+                     iva_pct: float = 0, iibb_pct: float = 0, pais_pct: float = 0,
+                     regla_redondeo: str = None) -> pd.DataFrame:
+    """
+    Calcula el precio óptimo de todas las variantes (TablaVariantes o lista) con resolver_precios_lote.
+    Con regla_redondeo se redondean los precios y se recalculan costo fijo, ganancia y margen
+    sobre el precio redondeado (el precio sin redondear queda en precio_solver).
+    """
+    if not isinstance(variantes, TablaVariantes):
+        variantes = TablaVariantes.desde_variantes(variantes)
+
+    comisiones = tarifas.comisiones(variantes.categorias_ids + [None])[variantes.categoria_codigo]
+    pesos, bandas = asignar_bandas_variantes(variantes, tarifas)
+    costos_bandas = np.array([b.costo_envio_ars for b in tarifas.bandas] + [np.nan], dtype=float)
+    envios = costos_bandas[bandas] * subsidio_envio_pct / 100
+
+    costos_ars = variantes.costo_unitario_usd * tc_ars_usd + costos_extra
+    resultado = resolver_precios_lote(
+        costos_ars, margen_objetivo, comisiones, tarifas, envios,
+        iva_pct, iibb_pct, pais_pct, es_margen_pct
+    )
+    resultado.insert(0, 'sku', variantes.sku)
+    resultado.insert(1, 'titulo', variantes.titulo)
+    resultado.insert(2, 'categoria_id', variantes.categoria_id)
+    resultado['peso_facturable'] = pesos
+    resultado['banda_envio'] = np.array([b.id for b in tarifas.bandas] + [None], dtype=object)[bandas]
+
+    if regla_redondeo:
+        _redondear_resultado(resultado, regla_redondeo, tarifas, comisiones,
+                             (iva_pct + iibb_pct + pais_pct) / 100)
+
+    objetivo = resultado['margen_pct'] if es_margen_pct else resultado['ganancia_neta']
+    resultado['cumple_objetivo'] = objetivo >= np.asarray(margen_objetivo) - 1e-6
+    return resultado
+
+# ==================== SENSIBILIDAD ====================
+
+PARAMETROS_SENSIBILIDAD = {
+    'tc_ars_usd': "Tipo de Cambio (ARS/USD)",
+    'margen_objetivo': "Margen Objetivo",
+    'subsidio_envio_pct': "Subsidio Envío (%)",
+    'iibb_pct': "IIBB (%)"
+}
+
+def superficie_sensibilidad(variante: Variante, tarifas: TablaTarifas,
+                            parametro_x: str, valores_x, parametro_y: str, valores_y,
+                            regla_redondeo: str = None, **parametros) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evalúa el solver sobre la grilla valores_y x valores_x de dos parámetros
+    (claves de PARAMETROS_SENSIBILIDAD) en una sola llamada vectorizada.
+    parametros trae el valor fijo del resto (tc_ars_usd, margen_objetivo,
+    es_margen_pct, subsidio_envio_pct, costos_extra, iva_pct, iibb_pct, pais_pct).
+    Retorna (precios, margenes_pct) con forma (len(valores_y), len(valores_x)).
+    """
+    grilla_x, grilla_y = np.meshgrid(np.asarray(valores_x, dtype=float), np.asarray(valores_y, dtype=float))
+    valores = {
+        'tc_ars_usd': parametros.get('tc_ars_usd', 1000.0),
+        'margen_objetivo': parametros.get('margen_objetivo', 0.0),
+        'subsidio_envio_pct': parametros.get('subsidio_envio_pct', 0.0),
+        'iibb_pct': parametros.get('iibb_pct', 0.0)
+    }
+    valores[parametro_x] = grilla_x.ravel()
+    valores[parametro_y] = grilla_y.ravel()
+    n = grilla_x.size
+
+    categoria = tarifas.buscar_categoria(variante.categoria_id)
+    comision = categoria.comision_pct if categoria else np.nan
+    peso = calcular_peso_facturable(variante)
+    costo_envio = tarifas.costos_envio(peso, "nacional")
+
+    costos_ars = variante.costo_unitario_usd * valores['tc_ars_usd'] + parametros.get('costos_extra', 0.0)
+    envios = costo_envio * valores['subsidio_envio_pct'] / 100
+    iva_pct, pais_pct = parametros.get('iva_pct', 0.0), parametros.get('pais_pct', 0.0)
+    tasa_impuestos = np.broadcast_to((iva_pct + valores['iibb_pct'] + pais_pct) / 100, (n,))
+
+    resultado = resolver_precios_lote(
+        np.broadcast_to(costos_ars, (n,)), np.broadcast_to(valores['margen_objetivo'], (n,)),
+        np.full(n, comision), tarifas, np.broadcast_to(envios, (n,)),
+        iva_pct, valores['iibb_pct'], pais_pct, parametros.get('es_margen_pct', False)
+    )
+    if regla_redondeo:
+        _redondear_resultado(resultado, regla_redondeo, tarifas, comision, tasa_impuestos)
+
+    forma = grilla_x.shape
+    return resultado['precio_final'].to_numpy().reshape(forma), resultado['margen_pct'].to_numpy().reshape(forma)
+
+# ==================== HISTORIAL DE TARIFAS ====================
+
+def _vigente(registro, fecha: date) -> bool:
+    return ((registro.vigente_desde is None or registro.vigente_desde <= fecha) and
+            (registro.vigente_hasta is None or fecha <= registro.vigente_hasta))
+
+def _registro_a_dict(registro) -> Dict:
+    datos = {}
+    for campo in registro.__slots__:
+        valor = getattr(registro, campo)
+        datos[campo] = valor.isoformat() if isinstance(valor, date) else valor
+    return datos
+
+def _registro_desde_dict(clase, datos: Dict):
+    datos = dict(datos)
+    for campo in ('vigente_desde', 'vigente_hasta'):
+        if datos.get(campo):
+            datos[campo] = date.fromisoformat(datos[campo])
+    return clase(**datos)
+
+class HistorialTarifas:
+    """
+    Tarifas de todas las épocas, cada registro con su vigente_desde/vigente_hasta
+    (None = sin límite). tarifas_al(fecha) devuelve la TablaTarifas vigente;
+    las fechas de cambio se indexan en un array ordenado y cada período
+    compila su TablaTarifas una sola vez.
+    """
+
+    def __init__(self, categorias: List[Categoria], rangos: List[RangoPrecio], bandas: List[BandaEnvio]):
+        self.categorias = list(categorias)
+        self.rangos = list(rangos)
+        self.bandas = list(bandas)
+
+        # Días en los que cambia alguna tarifa (inicio de cada período)
+        cambios = set()
+        for registro in self.categorias + self.rangos + self.bandas:
+            if registro.vigente_desde is not None:
+                cambios.add(np.datetime64(registro.vigente_desde, 'D'))
+            if registro.vigente_hasta is not None:
+                cambios.add(np.datetime64(registro.vigente_hasta, 'D') + 1)
+        self._cambios = np.array(sorted(cambios), dtype='datetime64[D]')
+        self._tablas = {}
+
+    @classmethod
+    def por_defecto(cls) -> 'HistorialTarifas':
+        return cls(get_categorias_default(), get_rangos_precio_default(), get_bandas_envio_default())
+
+    @classmethod
+    def cargar(cls, ruta: str = TARIFAS_ML_JSON) -> 'HistorialTarifas':
+        """Cargar el historial desde JSON (tarifas por defecto si no existe el archivo)"""
+        if not os.path.exists(ruta):
+            return cls.por_defecto()
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        return cls(
+            [_registro_desde_dict(Categoria, d) for d in datos.get('categorias', [])],
+            [_registro_desde_dict(RangoPrecio, d) for d in datos.get('rangos_precio', [])],
+            [_registro_desde_dict(BandaEnvio, d) for d in datos.get('bandas_envio', [])]
+        )
+
+    def guardar(self, ruta: str = TARIFAS_ML_JSON):
+        """Guardar el historial en JSON de forma atómica"""
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        datos = {
+            'categorias': [_registro_a_dict(r) for r in self.categorias],
+            'rangos_precio': [_registro_a_dict(r) for r in self.rangos],
+            'bandas_envio': [_registro_a_dict(r) for r in self.bandas]
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=directorio, suffix='.json.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, ruta)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def con_comision(self, categoria_id: str, comision_pct: float, desde: date) -> 'HistorialTarifas':
+        """
+        Historial nuevo con la comisión de la categoría cambiada a partir de
+        desde: el período vigente hasta ese día se cierra el día anterior y
+        el nuevo dura hasta el próximo período ya registrado (si lo hay).
+        """
+        anteriores = [c for c in self.categorias if c.id == categoria_id]
+        base = next((c for c in anteriores if _vigente(c, desde)), anteriores[-1] if anteriores else None)
+        if base is None:
+            raise ValueError(f"Categoría {categoria_id} no encontrada")
+
+        proximos = [c.vigente_desde for c in anteriores if c.vigente_desde is not None and c.vigente_desde > desde]
+        categorias = []
+        for c in self.categorias:
+            if c.id == categoria_id and _vigente(c, desde):
+                if c.vigente_desde == desde:
+                    # Un período que empieza el mismo día se reemplaza
+                    continue
+                c = Categoria(c.id, c.nombre, c.comision_pct, c.vigente_desde, desde - timedelta(days=1))
+            categorias.append(c)
+        categorias.append(Categoria(categoria_id, base.nombre, comision_pct, desde,
+                                    min(proximos) - timedelta(days=1) if proximos else None))
+        return HistorialTarifas(categorias, self.rangos, self.bandas)
+
+    def tarifas_al(self, fecha: date = None) -> TablaTarifas:
+        """TablaTarifas con los registros vigentes en la fecha (hoy si es None)"""
+        fecha = fecha or date.today()
+        periodo = int(np.searchsorted(self._cambios, np.datetime64(fecha, 'D'), side='right'))
+        if periodo not in self._tablas:
+            self._tablas[periodo] = TablaTarifas(
+                [r for r in self.categorias if _vigente(r, fecha)],
+                [r for r in self.rangos if _vigente(r, fecha)],
+                [r for r in self.bandas if _vigente(r, fecha)]
+            )
+        return self._tablas[periodo]
+
+    def comisiones_por_fecha(self, categoria_ids, fechas) -> np.ndarray:
+        """
+        Comisión vigente para cada par (categoría, fecha), con un join por
+        intervalos vectorizado (merge_asof). Supone que los períodos de una
+        misma categoría no se superponen. NaN si no hay tarifa vigente.
+        """
+        # Las dos columnas categoria_id con el mismo dtype (merge_asof no mezcla object y str)
+        ventas = pd.DataFrame({
+            'categoria_id': pd.Series(pd.Series(categoria_ids, dtype=object).to_numpy(), dtype=object),
+            'fecha': pd.to_datetime(pd.Series(fechas)).dt.normalize().to_numpy(dtype='datetime64[ns]'),
+            'fila': np.arange(len(categoria_ids))
+        })
+        tarifas = pd.DataFrame({
+            'categoria_id': pd.Series([c.id for c in self.categorias], dtype=object),
+            'desde': pd.to_datetime([c.vigente_desde or date(1900, 1, 1) for c in self.categorias]).astype('datetime64[ns]'),
+            'hasta': pd.to_datetime([c.vigente_hasta or date(2262, 1, 1) for c in self.categorias]).astype('datetime64[ns]'),
+            'comision_pct': [c.comision_pct for c in self.categorias],
+            'orden': np.arange(len(self.categorias))
+        })
+        # Ante dos registros con el mismo inicio gana el primero, como buscar_categoria
+        tarifas = tarifas.sort_values(['desde', 'orden']).drop_duplicates(['categoria_id', 'desde'], keep='first')
+
+        con_fecha = ventas['fecha'].notna() & ventas['categoria_id'].notna()
+        if not con_fecha.any():
+            return np.full(len(ventas), np.nan)
+        unidas = pd.merge_asof(
+            ventas[con_fecha].sort_values('fecha'),
+            tarifas,
+            left_on='fecha', right_on='desde', by='categoria_id', direction='backward'
+        )
+        vigente = unidas['fecha'] <= unidas['hasta']
+        comisiones = np.full(len(ventas), np.nan)
+        comisiones[unidas.loc[vigente, 'fila'].to_numpy()] = unidas.loc[vigente, 'comision_pct'].to_numpy()
+        return comisiones
+
+def aplicar_redondeo(precio: float, regla: str) -> float:
+    """Aplica reglas de redondeo al precio"""
+    if regla == "sin_decimales":
+        return round(precio)
+    elif regla == "multiplo_10":
+        return round(precio / 10) * 10
+    elif regla == "multiplo_100":
+        return round(precio / 100) * 100
+    elif regla == "terminacion_990":
+        base = int(precio / 1000) * 1000
+        redondeado = base + 990 if precio > base + 500 else base - 10
+        # Debajo de 500 bajar a la terminación anterior daría un precio negativo
+        return redondeado if redondeado > 0 else precio
+    else:
+        return precio
+
+def aplicar_redondeo_lote(precios, regla: str) -> np.ndarray:
+    """Versión vectorizada de aplicar_redondeo para arrays de precios"""
+    precios = np.asarray(precios, dtype=float)
+    if regla == "sin_decimales":
+        return np.round(precios)
+    elif regla == "multiplo_10":
+        return np.round(precios / 10) * 10
+    elif regla == "multiplo_100":
+        return np.round(precios / 100) * 100
+    elif regla == "terminacion_990":
+        base = np.trunc(precios / 1000) * 1000
+        redondeados = np.where(precios > base + 500, base + 990, base - 10)
+        return np.where(redondeados > 0, redondeados, precios)
+    else:
+        return precios.copy()
+
+# ==================== EXPORTACIÓN ====================
+
+def exportar_lista_precios(df: pd.DataFrame, formato: str = "excel", filas_por_bloque: int = 50000) -> bytes:
+    """
+    Exportar la lista de precios a Excel o CSV. El archivo completo se arma
+    en memoria (BytesIO); el CSV se escribe por bloques de filas directo al
+    buffer para no tener además una copia del texto como str.
+    """
+    buffer = io.BytesIO()
+    if formato == "csv":
+        texto = io.TextIOWrapper(buffer, encoding='utf-8-sig', newline='')
+        for inicio in range(0, max(len(df), 1), filas_por_bloque):
+            df.iloc[inicio:inicio + filas_por_bloque].to_csv(texto, index=False, header=(inicio == 0))
+        texto.flush()
+        texto.detach()
+    else:
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False, sheet_name='Lista de Precios')
+    return buffer.getvalue()
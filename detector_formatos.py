@@ -0,0 +1,163 @@
+import pandas as pd
+
+from procesador_libros_proveedores import extraer_productos_dataframe
+from procesador_formato_original import ProcesadorFormatoOriginal
+from procesador_archivos_proveedores import ProcesadorArchivosProveedores
+from encabezados_proveedores import ALIAS_CAMPOS, campos_en_texto
+from trazas import etapa, evento, ETAPA_DETECCION, ETAPA_EXTRACCION
+
+# Filas del archivo que se usan como muestra para puntuar los formatos
+MUESTRA_FILAS = 20
+
+COLUMNAS_ESTANDAR = ['Nombre', 'Cantidad por Carton', 'Precio En USD', 'CBM', 'GW']
+
+COLUMNAS_ORIGINALES = [
+    'Nombre', 'SKU', 'Precio FOB (USD)', 'Cantidad Total',
+    'Piezas por Caja', 'Peso por Caja (kg)', 'Largo (cm)',
+    'Ancho (cm)', 'Alto (cm)', 'DDI (%)'
+]
+
+PALABRAS_CHINAS = ['quotation', '装箱量', '价格', '体积', '重量', 'qty/ctn', 'price', 'cbm', 'g.w.']
+
+class MuestraEncabezados:
+    """Encabezados y primeras filas de un archivo, compartidos por todos los detectores"""
+
+    __slots__ = ('columnas', 'filas', 'texto')
+
+    def __init__(self, df, filas=MUESTRA_FILAS):
+        self.columnas = [str(col) for col in df.columns]
+        self.filas = df.head(filas)
+        valores = self.filas.to_numpy(dtype=object).ravel()
+        valores = [str(v) for v in valores[pd.notna(valores)]]
+        self.texto = ' '.join(self.columnas + valores).lower()
+
+    def tiene_columnas(self, columnas):
+        return all(col in self.columnas for col in columnas)
+
+    def tiene_caracteres_chinos(self):
+        return any('\u4e00' <= char <= '\u9fff' for char in self.texto)
+
+class DetectorFormato:
+    """Formato de archivo de proveedor.
+
+    score(muestra) debe ser barato (solo mira la muestra) y devolver un
+    puntaje entre 0 y 1; parse(df) procesa el archivo completo y devuelve
+    la lista de productos. Si filas_son_productos es True las filas del df
+    ya son los productos y parse no hace nada.
+    """
+
+    nombre = None
+    descripcion = ""
+    filas_son_productos = False
+
+    def score(self, muestra):
+        return 0.0
+
+    def parse(self, df):
+        return None
+
+class DetectorOriginal(DetectorFormato):
+    nombre = 'original'
+    descripcion = "formato original de costos"
+
+    def score(self, muestra):
+        return 1.0 if muestra.tiene_columnas(COLUMNAS_ORIGINALES) else 0.0
+
+    def parse(self, df):
+        return ProcesadorFormatoOriginal()._procesar_formato_original(df).to_dict('records')
+
+class DetectorEstandar(DetectorFormato):
+    nombre = 'estandar'
+    descripcion = "formato estándar"
+    filas_son_productos = True
+
+    def score(self, muestra):
+        return 0.9 if muestra.tiene_columnas(COLUMNAS_ESTANDAR) else 0.0
+
+    def parse(self, df):
+        return None
+
+class DetectorChino(DetectorFormato):
+    nombre = 'chino'
+    descripcion = "archivo de proveedor chino"
+
+    def score(self, muestra):
+        if any(palabra in muestra.texto for palabra in PALABRAS_CHINAS):
+            return 0.8
+        # Columnas Unnamed con texto en chino (típico de archivos chinos mal leídos)
+        tiene_unnamed = any('unnamed' in col.lower() for col in muestra.columnas)
+        if tiene_unnamed and muestra.tiene_caracteres_chinos():
+            return 0.7
+        return 0.0
+
+    def parse(self, df):
+        # Todos los bloques de la hoja (separados por subtotales o nuevos encabezados)
+        return extraer_productos_dataframe(df).to_dict('records')
+
+class DetectorProveedores(DetectorFormato):
+    nombre = 'proveedores'
+    descripcion = "archivo de proveedor (estructura detectada)"
+
+    # Campos que deben aparecer en los encabezados para considerar el formato
+    MIN_CAMPOS = 3
+
+    def __init__(self):
+        self.procesador = ProcesadorArchivosProveedores()
+
+    def score(self, muestra):
+        campos = len(campos_en_texto(muestra.texto))
+        if campos < self.MIN_CAMPOS:
+            return 0.0
+        return 0.6 * campos / len(ALIAS_CAMPOS)
+
+    def parse(self, df):
+        estructura = self.procesador.detectar_estructura_archivo(df)
+        productos = self.procesador.extraer_datos_productos(df, estructura)
+        if productos is None or productos.empty:
+            return None
+        return self.procesador.normalizar_datos(productos, estructura['moneda']).to_dict('records')
+
+_detectores = []
+
+def registrar_detector(detector):
+    """Agregar un detector al registro (reemplaza al que tenga el mismo nombre)"""
+    _detectores[:] = [d for d in _detectores if d.nombre != detector.nombre]
+    _detectores.append(detector)
+    return detector
+
+def obtener_detector(nombre):
+    for detector in _detectores:
+        if detector.nombre == nombre:
+            return detector
+    return None
+
+def detectores_registrados():
+    return list(_detectores)
+
+for _detector in (DetectorOriginal(), DetectorEstandar(), DetectorChino(), DetectorProveedores()):
+    registrar_detector(_detector)
+
+def puntuar_formatos(df, filas=MUESTRA_FILAS):
+    """Puntuar todos los detectores sobre la misma muestra. Retorna [(puntaje, detector)] de mayor a menor"""
+    muestra = MuestraEncabezados(df, filas)
+    puntajes = [(detector.score(muestra), detector) for detector in _detectores]
+    return sorted([p for p in puntajes if p[0] > 0], key=lambda p: -p[0])
+
+def detectar_y_procesar(df):
+    """Detectar el formato de un DataFrame ya leído y procesarlo.
+
+    Solo el detector con mayor puntaje procesa el archivo completo; si no
+    extrae productos se prueba el siguiente. Retorna (detector, productos)
+    (productos es None si detector.filas_son_productos) o (None, None) si
+    ningún formato reconoce el archivo.
+    """
+    with etapa(ETAPA_DETECCION):
+        puntajes = puntuar_formatos(df)
+    for puntaje, detector in puntajes:
+        evento("Probando formato %s (puntaje %.2f)", detector.nombre, puntaje)
+        with etapa(ETAPA_EXTRACCION):
+            productos = detector.parse(df)
+        if productos or detector.filas_son_productos:
+            return detector, productos
+    evento("❌ Ningún formato reconoce el archivo", nivel='error')
+    return None, None
@@ -0,0 +1,209 @@
+import pandas as pd
+import numpy as np
+import re
+
+from lector_excel import nombres_columnas
+
+# Alias de encabezados de cada campo en archivos de proveedores
+ALIAS_CAMPOS = {
+    'nombre': [
+        '商品', 'product', 'item', 'name', 'description', 'desc',
+        '产品', '名称', '品名', '商品名称', 'product name', 'item name', 'nombre'
+    ],
+    'sku': [
+        'sku', 'item no', 'item number', 'code', '编号', '货号',
+        'product code', 'item code', '商品编号', '产品编号'
+    ],
+    'cantidad': [
+        'quantity', 'qty', 'qty/ctn', 'amount', '数量', '件数', '装箱量',
+        'pcs', 'pieces', 'carton', 'box', '箱数', '箱', 'cantidad'
+    ],
+    'precio': [
+        'price', 'cost', '单价', '价格', 'cost price', 'unit price',
+        'price per', 'price/pc', 'price per piece', '价格/件', 'precio'
+    ],
+    'cbm': [
+        'cbm', 'volume', '体积', '总体积', 'cubic', 'm3',
+        'cubic meter', 'volume m3', '体积（m3）', '总体积（m3）'
+    ],
+    'peso': [
+        'weight', 'g.w.', 'gw', 'gross weight', '重量', '毛重', 'kg',
+        'weight kg', 'gross weight kg', '总毛重（kg）', '重量（kg）', 'peso'
+    ]
+}
+
+CAMPO_POR_ALIAS = {alias: campo for campo, alias_campo in ALIAS_CAMPOS.items() for alias in alias_campo}
+
+# Una sola alternancia con todos los alias; los más largos primero para que
+# 'item no' gane sobre 'item' y 'unit price' sobre 'price'
+PATRON_ALIAS = re.compile(
+    '(' + '|'.join(re.escape(alias) for alias in sorted(CAMPO_POR_ALIAS, key=len, reverse=True)) + ')',
+    re.IGNORECASE
+)
+
+# Filas de subtotales que separan bloques dentro de una hoja
+PATRON_TOTAL = r'(?i)^\s*(?:sub\s*-?\s*)?total\b|合计|小计|总计'
+
+# Rango de valores que se consideran datos de producto
+MIN_NUMERO_PRODUCTO = 0
+MAX_NUMERO_PRODUCTO = 10000
+
+def campos_en_texto(texto):
+    """Campos cuyos alias aparecen en un texto"""
+    return {CAMPO_POR_ALIAS[alias.lower()] for alias in PATRON_ALIAS.findall(texto)}
+
+def _clasificar_celdas(matriz, filas):
+    """Campo de cada celda de texto de una matriz de objetos (una sola regex para todas).
+
+    filas es la etiqueta de cada fila de la matriz. Retorna un DataFrame
+    fila/columna/campo con la primera columna de cada campo por fila.
+    """
+    n_columnas = matriz.shape[1] if matriz.ndim == 2 else 0
+    celdas = pd.Series(matriz.ravel())
+    con_valor = celdas.notna().to_numpy()
+    posiciones = np.flatnonzero(con_valor)
+    campos = celdas[con_valor].astype(str).str.extract(PATRON_ALIAS, expand=False).str.lower().map(CAMPO_POR_ALIAS)
+    con_campo = campos.notna().to_numpy()
+    posiciones = posiciones[con_campo]
+    return pd.DataFrame({
+        'fila': np.asarray(filas)[posiciones // max(n_columnas, 1)],
+        'columna': posiciones % max(n_columnas, 1),
+        'campo': campos[con_campo].to_numpy()
+    }).drop_duplicates(['fila', 'campo'])
+
+def _mapeo_fila(encontrados, fila):
+    mapeo = encontrados[encontrados['fila'] == fila].set_index('campo')['columna']
+    return {campo: int(col) for campo, col in mapeo.items()}
+
+def detectar_encabezados(df, filas=20):
+    """Detecta la fila de encabezados y el mapeo campo -> índice de columna.
+
+    Puntúa las primeras filas (y los nombres de columnas, como fila -1) en una
+    sola pasada: cada celda se clasifica con PATRON_ALIAS y se cuentan los
+    valores numéricos con pd.to_numeric. Gana la fila con más campos distintos.
+    Si ninguna tiene alias, la fila anterior a la primera fila de datos se toma
+    como encabezado y el mapeo queda vacío. Retorna (fila, mapeo) o (None, {}).
+    """
+    cabeza = df.head(filas).to_numpy(dtype=object)
+    columnas = np.array([str(col) for col in df.columns], dtype=object)
+    n_columnas = len(columnas)
+    if n_columnas == 0:
+        return None, {}
+
+    # Los nombres de columnas son la fila -1 salvo que pandas no haya encontrado encabezados
+    columnas_utiles = not all(col.startswith('Unnamed') or col.isdigit() for col in columnas)
+    primera_fila = -1 if columnas_utiles else 0
+    if columnas_utiles:
+        cabeza = np.vstack([columnas[np.newaxis, :], cabeza]) if len(cabeza) else columnas[np.newaxis, :]
+
+    celdas = pd.Series(cabeza.ravel())
+    fila_celda = np.arange(len(celdas)) // n_columnas + primera_fila
+
+    encontrados = _clasificar_celdas(cabeza, np.arange(len(cabeza)) + primera_fila)
+    if not encontrados.empty:
+        fila = encontrados['fila'].value_counts(sort=False).sort_index().idxmax()
+        return int(fila), _mapeo_fila(encontrados, fila)
+
+    # Sin alias: buscar la primera fila de datos (la fila -1 no cuenta)
+    numeros = pd.to_numeric(celdas, errors='coerce').to_numpy(dtype=float)
+    es_numero = (numeros > MIN_NUMERO_PRODUCTO) & (numeros < MAX_NUMERO_PRODUCTO)
+    es_texto = np.isnan(numeros) & celdas.map(lambda v: isinstance(v, str) and len(v) > 2).to_numpy()
+    en_datos = fila_celda >= 0
+    n_filas = fila_celda.max() + 1 if len(fila_celda) else 0
+    numeros_fila = np.bincount(fila_celda[en_datos & es_numero], minlength=n_filas)
+    textos_fila = np.bincount(fila_celda[en_datos & es_texto], minlength=n_filas)
+
+    candidatas = np.flatnonzero(numeros_fila[:10] >= 3)
+    if len(candidatas) == 0:
+        candidatas = np.flatnonzero((numeros_fila[:15] >= 2) & (textos_fila[:15] >= 1))
+    if len(candidatas) == 0:
+        return None, {}
+    return int(candidatas[0]) - 1, {}
+
+def como_hoja_sin_encabezados(df):
+    """Pasa los nombres de columnas a la primera fila, como si la hoja se leyera con header=None.
+
+    El índice queda alineado con las filas de Excel (fila de Excel = índice + 1).
+    """
+    columnas = [str(col) for col in df.columns]
+    if all(col.startswith('Unnamed') or col.isdigit() for col in columnas):
+        encabezado = [None] * len(columnas)
+    else:
+        encabezado = list(df.columns)
+    matriz = np.vstack([np.array(encabezado, dtype=object)[np.newaxis, :], df.to_numpy(dtype=object)])
+    return pd.DataFrame(matriz, columns=range(len(columnas))).infer_objects()
+
+def como_hoja_con_encabezados(df):
+    """Inversa de como_hoja_sin_encabezados: la primera fila pasa a ser los nombres de columnas.
+
+    Los nombres se arman como los arma pd.read_excel con header=0 y el
+    índice sigue alineado con las filas de Excel.
+    """
+    if df.empty:
+        return pd.DataFrame()
+    nombres = nombres_columnas(tuple(df.iloc[0]), 0)
+    return df.iloc[1:].set_axis(nombres, axis=1).infer_objects()
+
+def detectar_bloques(df, min_campos=3):
+    """Detecta todas las tablas de una hoja leída con header=None.
+
+    Una fila es encabezado si tiene al menos min_campos campos distintos
+    (uno de ellos el nombre) y casi no tiene números; cada bloque va hasta el
+    encabezado siguiente. Solo se pasan por la regex las filas candidatas.
+    Retorna [(inicio_datos, fin, mapeo)]; si no hay encabezados con alias se
+    usa detectar_encabezados y queda un solo bloque.
+    """
+    if df.empty:
+        return []
+    numeros = contar_numeros_producto(df)
+    con_valor = df.notna().sum(axis=1).to_numpy()
+    candidatas = np.flatnonzero((numeros < 2) & (con_valor >= min_campos))
+
+    encabezados = []
+    if len(candidatas):
+        encontrados = _clasificar_celdas(df.iloc[candidatas].to_numpy(dtype=object), candidatas)
+        campos_fila = encontrados.groupby('fila')['campo'].agg(set)
+        for fila, campos in campos_fila.items():
+            if len(campos) >= min_campos and 'nombre' in campos:
+                encabezados.append((int(fila), _mapeo_fila(encontrados, fila)))
+
+    if not encabezados:
+        fila, mapeo = detectar_encabezados(df)
+        return [] if fila is None else [(fila + 1, len(df), mapeo)]
+
+    finales = [fila for fila, _ in encabezados[1:]] + [len(df)]
+    return [(fila + 1, fin, mapeo) for (fila, mapeo), fin in zip(encabezados, finales)]
+
+# Primer número dentro de un texto ('12.5 USD', '1,200 pcs')
+PATRON_NUMERO = r'([\d,]+\.?\d*)'
+
+def numeros_desde_texto(serie):
+    """Convierte una columna a float tomando el primer número de cada valor (0 si no hay)"""
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.astype(float).fillna(0.0)
+    numeros = pd.to_numeric(serie, errors='coerce').astype(float)
+    con_texto = numeros.isna() & serie.notna()
+    if con_texto.any():
+        extraidos = serie[con_texto].astype(str).str.extract(PATRON_NUMERO, expand=False)
+        numeros[con_texto] = pd.to_numeric(extraidos.str.replace(',', '', regex=False), errors='coerce')
+    return numeros.fillna(0.0)
+
+def contar_numeros_producto(df):
+    """Cantidad de valores por fila que son números en el rango de datos de producto"""
+    if df.shape[1] == 0:
+        return np.zeros(len(df), dtype=int)
+    numeros = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    return ((numeros > MIN_NUMERO_PRODUCTO) & (numeros < MAX_NUMERO_PRODUCTO)).sum(axis=1)
+
+def textos_validos(serie, largo_minimo=1):
+    """Máscara de valores de texto no numéricos con al menos largo_minimo caracteres"""
+    textos = serie.astype(str).str.strip()
+    return (serie.notna() & pd.to_numeric(serie, errors='coerce').isna() & (textos.str.len() >= largo_minimo)).to_numpy()
+
+def codigos_como_texto(serie):
+    """Convierte códigos a texto sin el '.0' que agrega pandas a los enteros leídos como float"""
+    numeros = pd.to_numeric(serie, errors='coerce')
+    enteros = numeros.notna() & (numeros % 1 == 0)
+    textos = serie.astype(str).str.strip()
+    textos[enteros] = numeros[enteros].astype('int64').astype(str)
+    return textos.where(serie.notna())
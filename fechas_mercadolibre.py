@@ -0,0 +1,82 @@
+import pandas as pd
+import numpy as np
+import re
+from datetime import date, datetime
+
+# Tabla de meses en español (no depende del locale del proceso)
+MESES_ES = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
+    'julio': 7, 'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10,
+    'noviembre': 11, 'diciembre': 12,
+    'ene': 1, 'feb': 2, 'mar': 3, 'abr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'sep': 9, 'set': 9, 'oct': 10, 'nov': 11, 'dic': 12
+}
+
+# Formato de los reportes de ML: "4 de julio de 2025 20:02 hs."
+PATRON_FECHA_ML = re.compile(
+    r'^\s*(?P<dia>\d{1,2})\s+de\s+(?P<mes>[a-záéíóú]+)\.?\s+(?:de\s+)?(?P<anio>\d{4})'
+    r'(?:\s+(?P<hora>\d{1,2}):(?P<minuto>\d{2})(?::(?P<segundo>\d{2}))?)?',
+    re.IGNORECASE
+)
+
+def _parsear_valores_unicos(valores):
+    """Parsea una serie de valores únicos (sin repetidos ni nulos) a datetime64"""
+    resultado = pd.Series(pd.NaT, index=valores.index, dtype='datetime64[ns]')
+    if valores.empty:
+        return resultado
+
+    # Valores que ya son fechas (Excel suele entregar Timestamps)
+    es_fecha = valores.map(lambda v: isinstance(v, (datetime, date, np.datetime64)))
+    if es_fecha.any():
+        resultado[es_fecha] = pd.to_datetime(valores[es_fecha], errors='coerce')
+
+    textos = valores[~es_fecha].astype(str)
+    if textos.empty:
+        return resultado
+
+    # Formato español de ML, extraído de forma vectorizada
+    partes = textos.str.extract(PATRON_FECHA_ML)
+    partes['mes'] = partes['mes'].str.lower().map(MESES_ES)
+    con_formato_ml = partes['dia'].notna() & partes['mes'].notna()
+    if con_formato_ml.any():
+        componentes = partes.loc[con_formato_ml, ['anio', 'mes', 'dia', 'hora', 'minuto', 'segundo']]
+        componentes = componentes.apply(pd.to_numeric, errors='coerce').fillna(0).astype(int)
+        componentes.columns = ['year', 'month', 'day', 'hour', 'minute', 'second']
+        resultado[textos.index[con_formato_ml]] = pd.to_datetime(componentes, errors='coerce').values
+
+    # Resto de los textos (ISO, dd/mm/aaaa, etc.)
+    resto = textos[~con_formato_ml]
+    if not resto.empty:
+        # Sin un formato explícito pandas infiere uno del primer valor y
+        # convierte en NaT los que no lo siguen (ej. fechas con y sin hora)
+        iso = resto.str.match(r'^\s*\d{4}-\d{2}-\d{2}')
+        if iso.any():
+            resultado[resto.index[iso]] = pd.to_datetime(resto[iso].str.strip(), errors='coerce', format='ISO8601').values
+        otros = resto[~iso]
+        if not otros.empty:
+            resultado[otros.index] = pd.to_datetime(otros, errors='coerce', format='mixed', dayfirst=True).values
+
+    return resultado
+
+def parsear_fechas_ml(serie):
+    """Convierte una columna de fechas de reportes de MercadoLibre a datetime64.
+
+    Acepta el formato en español ("4 de julio de 2025 20:02 hs."), fechas ISO,
+    dd/mm/aaaa y valores que ya son fechas. Cada valor distinto se parsea una
+    sola vez, ya que los reportes repiten mucho los mismos timestamps.
+    Los valores que no se pueden interpretar quedan como NaT.
+    """
+    if not isinstance(serie, pd.Series):
+        serie = pd.Series(serie)
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+
+    codigos, unicos = pd.factorize(serie)
+    if len(unicos) == 0:
+        return pd.Series(pd.NaT, index=serie.index, name=serie.name, dtype='datetime64[ns]')
+
+    fechas_unicas = _parsear_valores_unicos(pd.Series(unicos, dtype=object))
+    fechas = fechas_unicas.to_numpy(dtype='datetime64[ns]')[codigos]
+    fechas[codigos < 0] = np.datetime64('NaT')
+    return pd.Series(fechas, index=serie.index, name=serie.name)
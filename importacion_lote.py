@@ -0,0 +1,253 @@
+import pandas as pd
+import numpy as np
+import io
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from lector_excel import leer_excel, nombres_hojas
+from detector_formatos import detectar_y_procesar
+from procesador_libros_proveedores import procesar_hojas_proveedor
+from tipos_cambio import MONEDA_PROVEEDOR, TipoCambioNoDisponible, convertir_a_usd
+from trazas import trazar
+
+# Archivos que se aceptan sueltos o dentro de un .zip
+EXTENSIONES_LOTE = ('.xlsx', '.xls', '.csv')
+
+# Columnas que usa la carga al contenedor
+COLUMNAS_CARGA = ['Nombre', 'SKU', 'Cantidad por Carton', 'Precio En USD', 'CBM', 'GW', 'DDI (%)']
+
+# SKUs que generan los procesadores cuando el archivo no trae código (no sirven para deduplicar).
+# Solo la forma 'SKU_<n>' del procesador chino: 'SKU11945' puede ser un código real del proveedor
+PATRON_SKU_GENERADO = r'^SKU_\d+$'
+
+CONTAINER_40HQ_CBM = 70.0
+
+def expandir_archivos(archivos):
+    """Lista de (nombre, contenido) con el contenido de los .zip expandido.
+
+    Dentro de un zip solo se toman los archivos con EXTENSIONES_LOTE (se
+    ignoran carpetas y los metadatos de macOS).
+    """
+    expandidos = []
+    for nombre, contenido in archivos:
+        if not nombre.lower().endswith('.zip'):
+            expandidos.append((nombre, contenido))
+            continue
+        with zipfile.ZipFile(io.BytesIO(contenido)) as zip_lote:
+            for entrada in zip_lote.infolist():
+                base = os.path.basename(entrada.filename)
+                if (entrada.is_dir() or entrada.filename.startswith('__MACOSX/') or base.startswith(('.', '~$'))
+                        or not base.lower().endswith(EXTENSIONES_LOTE)):
+                    continue
+                expandidos.append((f"{nombre}/{entrada.filename}", zip_lote.read(entrada)))
+    return expandidos
+
+def _productos_para_carga(productos):
+    """Lleva los productos de cualquier formato a COLUMNAS_CARGA con tipos numéricos"""
+    def numero(columna):
+        if columna not in productos.columns:
+            return pd.Series(0.0, index=productos.index)
+        return pd.to_numeric(productos[columna], errors='coerce').fillna(0.0)
+
+    precio = numero('Precio En USD')
+    if 'Precio RMB' in productos.columns:
+        precio = precio.where(precio > 0, convertir_a_usd(numero('Precio RMB'), MONEDA_PROVEEDOR))
+
+    carga = pd.DataFrame({
+        'Nombre': productos['Nombre'],
+        'SKU': productos['SKU'] if 'SKU' in productos.columns else None,
+        'Cantidad por Carton': numero('Cantidad por Carton'),
+        'Precio En USD': precio,
+        'CBM': numero('CBM'),
+        'GW': numero('GW'),
+        'DDI (%)': pd.to_numeric(productos['DDI (%)'], errors='coerce') if 'DDI (%)' in productos.columns else np.nan
+    }, index=productos.index)
+    return carga[carga['Nombre'].notna()].reset_index(drop=True)
+
+def procesar_archivo_lote(ruta, nombre):
+    """Detectar y procesar un archivo del lote (se ejecuta en el pool).
+
+    Las cotizaciones con varias hojas se procesan hoja por hoja como en la
+    carga individual. Retorna (df_productos, info); info incluye los
+    errores de las hojas que no se pudieron procesar y los segundos de cada
+    etapa de la traza.
+    """
+    inicio = time.perf_counter()
+    productos = pd.DataFrame()
+    formato = None
+    errores_hojas = []
+    with trazar(nombre) as traza:
+        hojas = [] if nombre.lower().endswith('.csv') else nombres_hojas(ruta)
+        if len(hojas) > 1:
+            resultados, errores_hojas = procesar_hojas_proveedor(ruta, hojas)
+            frames = [df for df in resultados.values() if not df.empty]
+            if frames:
+                productos = pd.concat(frames, ignore_index=True)
+                formato = 'libro'
+
+        if formato is None:
+            df = pd.read_csv(ruta) if nombre.lower().endswith('.csv') else leer_excel(ruta)
+            detector, procesados = detectar_y_procesar(df)
+            if detector is None:
+                raise ValueError("Formato de archivo no reconocido")
+            productos = df if detector.filas_son_productos else pd.DataFrame(procesados)
+            formato = detector.nombre
+
+    productos = _productos_para_carga(productos)
+    return productos, {
+        'archivo': nombre,
+        'formato': formato,
+        'productos': len(productos),
+        'errores_hojas': '; '.join(f"{error['hoja']}: {error['error']}" for error in errores_hojas),
+        'segundos': time.perf_counter() - inicio,
+        **{f'{etapa} (s)': segundos for etapa, (segundos, _) in traza.etapas.items()}
+    }
+
+def _clave_nombre(nombres):
+    return nombres.astype(str).str.strip().str.lower()
+
+def _clave_sku(skus):
+    """SKU como texto; vacío si no hay o si lo generó un procesador"""
+    skus = skus.astype(str).str.strip().where(skus.notna(), '')
+    return skus.where(~skus.str.match(PATRON_SKU_GENERADO) & (skus != ''), '')
+
+def deduplicar_productos(frames, productos_existentes=()):
+    """Quita los productos repetidos por SKU o por nombre, en el orden de los archivos.
+
+    Las claves vistas (incluidas las de productos_existentes) se guardan en
+    sets; cada archivo se filtra con una sola búsqueda vectorizada contra
+    ellos. Retorna [(df_unicos, cantidad_duplicados)] alineada con frames.
+    """
+    existentes = pd.DataFrame(list(productos_existentes), columns=['Nombre', 'SKU'])
+    nombres_vistos = set(_clave_nombre(existentes['Nombre'].dropna()))
+    skus_vistos = set(_clave_sku(existentes['SKU'])) - {''}
+
+    resultados = []
+    for df in frames:
+        nombres = _clave_nombre(df['Nombre'])
+        skus = _clave_sku(df['SKU'])
+        con_sku = (skus != '').to_numpy()
+        repetido = (nombres.isin(nombres_vistos) | nombres.duplicated()).to_numpy()
+        repetido = repetido | (con_sku & (skus.isin(skus_vistos) | skus.where(con_sku).duplicated()).to_numpy())
+        unicos = df[~repetido].reset_index(drop=True)
+        nombres_vistos.update(nombres[~repetido])
+        skus_vistos.update(skus[~repetido & con_sku])
+        resultados.append((unicos, int(repetido.sum())))
+    return resultados
+
+def importar_lote(archivos, productos_existentes=(), procesos=None):
+    """Procesa en paralelo un lote de cotizaciones (archivos sueltos o .zip).
+
+    archivos es una lista de (nombre, contenido en bytes). Los productos
+    que repiten el SKU o el nombre de uno anterior (o de
+    productos_existentes) se descartan. Retorna (df_productos, informe,
+    errores) con una fila del informe por archivo procesado. Si falta el
+    tipo de cambio de una moneda se lanza TipoCambioNoDisponible.
+    """
+    archivos = expandir_archivos(archivos)
+    resultados = {}
+    errores = []
+    if not archivos:
+        return pd.DataFrame(columns=COLUMNAS_CARGA), [], errores
+
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = []
+        for i, (nombre, contenido) in enumerate(archivos):
+            # La extensión original decide cómo se lee el archivo
+            ruta = os.path.join(directorio, f"{i}{os.path.splitext(nombre)[1].lower()}")
+            with open(ruta, 'wb') as f:
+                f.write(contenido)
+            rutas.append(ruta)
+
+        procesos = min(procesos or os.cpu_count() or 1, len(archivos))
+        if procesos <= 1:
+            for i, (ruta, (nombre, _)) in enumerate(zip(rutas, archivos)):
+                try:
+                    resultados[i] = procesar_archivo_lote(ruta, nombre)
+                except TipoCambioNoDisponible:
+                    # Sin tasa fallarían todos los archivos con precios en esa moneda
+                    raise
+                except Exception as e:
+                    errores.append({'archivo': nombre, 'error': str(e)})
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as executor:
+                futuros = {executor.submit(procesar_archivo_lote, ruta, nombre): i
+                           for i, (ruta, (nombre, _)) in enumerate(zip(rutas, archivos))}
+                for futuro in as_completed(futuros):
+                    i = futuros[futuro]
+                    try:
+                        resultados[i] = futuro.result()
+                    except TipoCambioNoDisponible:
+                        raise
+                    except Exception as e:
+                        errores.append({'archivo': archivos[i][0], 'error': str(e)})
+
+    # Deduplicar en el orden del lote para que el resultado sea reproducible
+    orden = sorted(resultados)
+    unicos = deduplicar_productos([resultados[i][0] for i in orden], productos_existentes)
+    informe = []
+    for i, (df, duplicados) in zip(orden, unicos):
+        informe.append({**resultados[i][1], 'duplicados': duplicados, 'agregados': len(df)})
+    frames = [df for df, _ in unicos if not df.empty]
+    df_productos = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNAS_CARGA)
+    return df_productos, informe, errores
+
+def calcular_productos_carga(df, parametros, contenedor_cbm=CONTAINER_40HQ_CBM):
+    """Costos de los productos importados, con los mismos cálculos que la carga individual.
+
+    parametros tiene los porcentajes del sidebar (ddi_pct, seguro_pct,
+    tasas_pct, agente_pct, despachante_pct) y precio_dolar. El DDI de cada
+    producto se usa si viene en el archivo. Retorna una lista de productos.
+    """
+    cantidad = df['Cantidad por Carton'].to_numpy(dtype=float)
+    precio = df['Precio En USD'].to_numpy(dtype=float)
+    cbm = df['CBM'].to_numpy(dtype=float)
+    peso = df['GW'].to_numpy(dtype=float)
+    ddi_pct = df['DDI (%)'].astype(float).fillna(parametros['ddi_pct']).to_numpy()
+    piezas_por_caja = 1
+
+    def por_carton(valores):
+        return np.divide(valores, cantidad, out=np.zeros(len(df)), where=cantidad > 0)
+
+    cbm_caja = por_carton(cbm)
+    peso_por_caja = por_carton(peso)
+    dimension_aproximada = (cbm_caja * 1000000) ** (1 / 3)
+    cajas_por_contenedor = np.floor(np.divide(contenedor_cbm, cbm_caja, out=np.zeros(len(df)), where=cbm_caja > 0))
+
+    fob_usd = precio * cantidad
+    cif = fob_usd + fob_usd * (parametros['seguro_pct'] / 100)
+    ddi = cif * (ddi_pct / 100)
+    tasas = cif * (parametros['tasas_pct'] / 100)
+    agente = fob_usd * (parametros['agente_pct'] / 100)
+    despachante = fob_usd * (parametros['despachante_pct'] / 100)
+    costo_total_usd = cif + ddi + tasas + agente + despachante
+    precio_unitario_usd = por_carton(costo_total_usd)
+
+    skus = df['SKU'].where(df['SKU'].notna(), pd.Series([f'SKU{i + 1:03d}' for i in range(len(df))], index=df.index))
+    return pd.DataFrame({
+        'Nombre': df['Nombre'],
+        'SKU': skus,
+        'Precio FOB (USD)': precio,
+        'Precio Final (USD)': precio_unitario_usd,
+        'Precio Final (Pesos)': precio_unitario_usd * parametros['precio_dolar'],
+        'CBM por Caja': cbm_caja,
+        'Piezas por Caja': piezas_por_caja,
+        'Cajas por Contenedor': cajas_por_contenedor.astype(int),
+        'Piezas por Contenedor': cajas_por_contenedor.astype(int) * piezas_por_caja,
+        'Contenedores Necesarios': cbm / contenedor_cbm,
+        'CBM Total': cbm,
+        'Peso por Caja (kg)': peso_por_caja,
+        'Peso Total (kg)': peso,
+        'Cantidad Total': cantidad,
+        'Costo Total (USD)': costo_total_usd,
+        'Costo Total (Pesos)': costo_total_usd * parametros['precio_dolar'],
+        'Flete por Producto (USD)': 0,
+        'Gastos Fijos por Producto (USD)': 0,
+        'Largo (cm)': dimension_aproximada,
+        'Ancho (cm)': dimension_aproximada,
+        'Alto (cm)': dimension_aproximada,
+        'DDI (%)': ddi_pct,
+    }).to_dict('records')
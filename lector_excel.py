@@ -0,0 +1,175 @@
+import pandas as pd
+import numpy as np
+import os
+import re
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import column_index_from_string
+from openpyxl.utils.exceptions import InvalidFileException
+
+from trazas import en_etapa, ETAPA_LECTURA
+
+# Filas que se convierten juntas a DataFrame
+FILAS_POR_BLOQUE = 5000
+
+# Textos que pd.read_excel interpreta como vacíos
+VALORES_NULOS = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+                 '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+def _es_xls(fuente):
+    """Los .xls (formato viejo) no se pueden leer con openpyxl"""
+    if isinstance(fuente, pd.ExcelFile):
+        return True
+    nombre = fuente if isinstance(fuente, (str, os.PathLike)) else getattr(fuente, 'name', '')
+    return str(nombre).lower().endswith('.xls')
+
+def _rango_columnas(usecols):
+    """Convierte 'A:F' o 'C' a (min_col, max_col); None si usecols no es un rango"""
+    if not isinstance(usecols, str):
+        return None, None
+    partes = usecols.replace(' ', '').upper().split(':')
+    if not all(re.fullmatch(r'[A-Z]{1,3}', parte) for parte in partes):
+        return None, None
+    return column_index_from_string(partes[0]), column_index_from_string(partes[-1])
+
+def nombres_columnas(fila, desde):
+    """Nombres de columnas como los arma pandas: 'Unnamed: i' si falta y '.n' si se repite"""
+    nombres = []
+    vistos = {}
+    for i, valor in enumerate(fila):
+        nombre = f"Unnamed: {desde + i}" if valor is None or str(valor).strip() == '' else valor
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f"{nombre}.{vistos[nombre]}"
+        else:
+            vistos[nombre] = 0
+        nombres.append(nombre)
+    return nombres
+
+def abrir_libro(fuente):
+    """Abre un libro en modo streaming para leer varias hojas sin volver a abrirlo (cerrar con close()).
+
+    Los .xls se abren con pd.ExcelFile (xlrd); leer_excel acepta los dos.
+    """
+    if hasattr(fuente, 'seek'):
+        fuente.seek(0)
+    if _es_xls(fuente):
+        return pd.ExcelFile(fuente)
+    return load_workbook(fuente, read_only=True, data_only=True)
+
+def _abrir_hoja(fuente, hoja):
+    libro = fuente if isinstance(fuente, Workbook) else abrir_libro(fuente)
+    if hoja is None or isinstance(hoja, int):
+        return libro, libro.worksheets[hoja or 0]
+    return libro, libro[hoja]
+
+def _ancho_hoja(hoja, min_col, max_col):
+    """Cantidad de columnas a leer (la hoja puede no declarar sus dimensiones)"""
+    if max_col is not None:
+        return max_col - min_col + 1
+    if hoja.max_column is None:
+        hoja.reset_dimensions()
+        hoja.calculate_dimension(force=True)
+    return max((hoja.max_column or 1) - min_col + 1, 1)
+
+def iterar_excel(fuente, hoja=None, header=0, usecols=None, nrows=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Lee una hoja de Excel en modo streaming y devuelve bloques de filas como DataFrames.
+
+    Usa openpyxl en modo read_only (sin estilos ni el libro completo en
+    memoria). header es la fila de encabezados (None = columnas numéricas),
+    usecols un rango tipo 'A:F' o una lista de nombres de columnas y nrows
+    corta la lectura después de esa cantidad de filas de datos. Las filas
+    vacías al final de la hoja se descartan, como en pd.read_excel. fuente
+    puede ser una ruta, un archivo o un libro devuelto por abrir_libro.
+    """
+    if _es_xls(fuente):
+        yield leer_excel(fuente, hoja=hoja, header=header, usecols=usecols, nrows=nrows)
+        return
+
+    min_col, max_col = _rango_columnas(usecols)
+    min_col = min_col or 1
+    columnas_pedidas = None if usecols is None or max_col is not None else list(usecols)
+
+    libro, ws = _abrir_hoja(fuente, hoja)
+    try:
+        ancho = _ancho_hoja(ws, min_col, max_col)
+        filas = ws.iter_rows(min_col=min_col, max_col=min_col + ancho - 1, values_only=True)
+
+        nombres = list(range(min_col - 1, min_col - 1 + ancho))
+        if header is not None:
+            for _ in range(header):
+                next(filas, None)
+            nombres = nombres_columnas(tuple(next(filas, ())) + (None,) * ancho, min_col - 1)[:ancho]
+
+        def armar(bloque, desde):
+            df = pd.DataFrame.from_records(bloque, columns=nombres)
+            for col in df.columns:
+                if not pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_datetime64_any_dtype(df[col]):
+                    df[col] = df[col].mask(df[col].isin(VALORES_NULOS))
+            # Como pd.read_excel: celdas vacías como NaN y columnas vacías como float64
+            df = df.fillna(np.nan).infer_objects()
+            df.index = pd.RangeIndex(desde, desde + len(df))
+            return df[columnas_pedidas] if columnas_pedidas is not None else df
+
+        bloque = []
+        vacias = []
+        leidas = 0
+        for fila in filas:
+            if nrows is not None and leidas >= nrows:
+                break
+            # Como pd.read_excel: los float enteros se leen como int (ej. números de venta)
+            fila = tuple(int(v) if type(v) is float and v.is_integer() else v for v in fila) + (None,) * (ancho - len(fila))
+            # Las filas vacías solo se agregan si después hay datos
+            if all(valor is None or valor == '' for valor in fila):
+                vacias.append(fila)
+                continue
+            bloque.extend(vacias)
+            bloque.append(fila)
+            leidas += len(vacias) + 1
+            vacias = []
+            if len(bloque) >= filas_por_bloque:
+                yield armar(bloque, leidas - len(bloque))
+                bloque = []
+        if bloque or leidas == 0:
+            yield armar(bloque, leidas - len(bloque))
+    finally:
+        # Un libro abierto con abrir_libro lo cierra quien lo abrió
+        if libro is not fuente:
+            libro.close()
+
+@en_etapa(ETAPA_LECTURA)
+def leer_excel(fuente, hoja=None, header=0, usecols=None, nrows=None):
+    """Lee una hoja de Excel completa (o sus primeras nrows filas) con el lector streaming.
+
+    Reemplazo de pd.read_excel para los casos simples del proyecto; los .xls
+    o archivos que openpyxl no puede abrir se leen con pandas.
+    """
+    if _es_xls(fuente):
+        if hasattr(fuente, 'seek'):
+            fuente.seek(0)
+        return pd.read_excel(fuente, sheet_name=hoja or 0, header=header, usecols=usecols, nrows=nrows)
+    try:
+        bloques = list(iterar_excel(fuente, hoja=hoja, header=header, usecols=usecols, nrows=nrows))
+    except InvalidFileException:
+        if hasattr(fuente, 'seek'):
+            fuente.seek(0)
+        return pd.read_excel(fuente, sheet_name=hoja or 0, header=header, usecols=usecols, nrows=nrows)
+    df = pd.concat(bloques) if len(bloques) > 1 else bloques[0]
+
+    # Columnas vacías al final que la hoja declara por formato pero no tienen datos
+    while (df.shape[1] > 1 and (header is None or str(df.columns[-1]).startswith('Unnamed'))
+           and df.iloc[:, -1].isna().all()):
+        df = df.iloc[:, :-1]
+    return df
+
+@en_etapa(ETAPA_LECTURA)
+def nombres_hojas(fuente):
+    """Nombres de las hojas de un libro (sin leer sus datos)"""
+    if _es_xls(fuente):
+        if hasattr(fuente, 'seek'):
+            fuente.seek(0)
+        return pd.ExcelFile(fuente).sheet_names
+    libro = abrir_libro(fuente)
+    try:
+        return list(libro.sheetnames)
+    finally:
+        libro.close()
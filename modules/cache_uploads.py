@@ -0,0 +1,111 @@
+import os
+import io
+import base64
+import hashlib
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+from lector_excel import leer_excel
+
+# Directorio donde se guardan los archivos subidos (compartido entre workers)
+UPLOADS_DIR = os.path.join("persistent_files", "uploads")
+
+# Cantidad máxima de DataFrames parseados que se mantienen en memoria
+MAX_UPLOADS_EN_MEMORIA = 16
+
+class CacheLRU:
+    """Cache LRU acotado y thread-safe"""
+
+    def __init__(self, max_items=MAX_UPLOADS_EN_MEMORIA):
+        self.max_items = max_items
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            if clave not in self._datos:
+                return None
+            self._datos.move_to_end(clave)
+            return self._datos[clave]
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_items:
+                self._datos.popitem(last=False)
+
+    def __contains__(self, clave):
+        with self._lock:
+            return clave in self._datos
+
+    def __len__(self):
+        with self._lock:
+            return len(self._datos)
+
+_cache_uploads = CacheLRU()
+
+def _ruta_upload(clave):
+    return os.path.join(UPLOADS_DIR, f"{clave}.bin")
+
+def _leer_excel(decoded):
+    return leer_excel(io.BytesIO(decoded))
+
+def registrar_upload(contents, filename):
+    """Registrar un archivo de dcc.Upload y devolver su clave (hash del contenido).
+
+    El archivo se decodifica y parsea una sola vez; los callbacks solo
+    necesitan pasar la clave devuelta.
+    """
+    if contents is None:
+        return None
+
+    content_type, content_string = contents.split(',')
+    clave = hashlib.md5(content_string.encode()).hexdigest()
+
+    if clave in _cache_uploads:
+        return clave
+
+    decoded = base64.b64decode(content_string)
+    # Se parsea antes de guardar: un archivo que no se puede leer no queda en disco
+    df = _leer_excel(decoded)
+
+    # Guardar en disco para que otros workers puedan recuperarlo
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    ruta = _ruta_upload(clave)
+    if not os.path.exists(ruta):
+        # Archivo temporal + reemplazo: otro worker nunca abre un archivo a medio escribir
+        fd, tmp_path = tempfile.mkstemp(dir=UPLOADS_DIR, suffix='.bin.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(decoded)
+            os.replace(tmp_path, ruta)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    _cache_uploads.set(clave, {'df': df, 'filename': filename})
+    return clave
+
+def obtener_upload(clave):
+    """Obtener una copia del DataFrame registrado con la clave dada.
+
+    Retorna (df, filename) o (None, None) si la clave no existe.
+    """
+    # La clave llega del navegador: solo se aceptan hashes md5 (hex)
+    if not isinstance(clave, str) or re.fullmatch(r'[0-9a-f]{32}', clave) is None:
+        return None, None
+
+    entrada = _cache_uploads.get(clave)
+    if entrada is None:
+        # Puede haber sido registrado por otro worker o desalojado de la cache
+        ruta = _ruta_upload(clave)
+        if not os.path.exists(ruta):
+            return None, None
+        with open(ruta, 'rb') as f:
+            entrada = {'df': _leer_excel(f.read()), 'filename': None}
+        _cache_uploads.set(clave, entrada)
+
+    return entrada['df'].copy(), entrada['filename']
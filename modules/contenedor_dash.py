@@ -12,6 +12,8 @@ import io
 import base64
 import json
 
+from modules.tabla_paginada import crear_tabla_paginada
+
 warnings.filterwarnings('ignore')
 
 # Constantes
@@ -280,30 +282,28 @@ def create_product_table(df_productos):
         {"name": "Precio Unitario ARS", "id": "Precio Unitario Final (Pesos)"}
     ]
     
-    # Formatear datos
-    data = []
-    for _, row in df_productos.iterrows():
-        data.append({
-            "Nombre": row.get('Nombre', ''),
-            "Cantidad Total": f"{row.get('Cantidad Total', 0):,.0f}",
-            "CBM Total": f"{row.get('CBM Total', 0):.4f}",
-            "FOB (USD)": f"${row.get('FOB (USD)', 0):,.2f}",
-            "Costo Final por Producto (USD)": f"${row.get('Costo Final por Producto (USD)', 0):,.2f}",
-            "Precio Unitario Final (USD)": f"${row.get('Precio Unitario Final (USD)', 0):,.2f}",
-            "Precio Unitario Final (Pesos)": f"${row.get('Precio Unitario Final (Pesos)', 0):,.2f}"
-        })
+    # Formatos aplicados solo a la página visible
+    formatos = {
+        "Cantidad Total": "{:,.0f}",
+        "CBM Total": "{:.4f}",
+        "FOB (USD)": "${:,.2f}",
+        "Costo Final por Producto (USD)": "${:,.2f}",
+        "Precio Unitario Final (USD)": "${:,.2f}",
+        "Precio Unitario Final (Pesos)": "${:,.2f}"
+    }
     
-    return dash.dash_table.DataTable(
-        id='product-table',
-        columns=columns,
-        data=data,
+    return crear_tabla_paginada(
+        'product-table',
+        df_productos,
+        columns,
+        formatos,
+        page_size=10,
         style_table={'overflowX': 'auto'},
         style_cell={'textAlign': 'center'},
         style_header={'backgroundColor': 'rgb(230, 230, 230)', 'fontWeight': 'bold'},
         style_data_conditional=[
             {'if': {'row_index': 'odd'}, 'backgroundColor': 'rgb(248, 248, 248)'}
-        ],
-        page_size=10
+        ]
     )
 
 def create_summary_cards(df_productos, precio_dolar):
@@ -0,0 +1,201 @@
+import pandas as pd
+import os
+import json
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Parámetros por defecto de cada sesión
+PARAMETROS_DEFAULT = {
+    'precio_dolar': 1000.0,
+    'ddi_pct': 18.0,
+    'tasas_pct': 3.0,
+    'iva_pct': 21.0,
+    'iva_adic_pct': 20.0,
+    'ganancias_pct': 6.0,
+    'iibb_pct': 2.0,
+    'seguro_pct': 0.5,
+    'agente_pct': 4.0,
+    'despachante_pct': 1.0,
+    'tipo_cambio_inventario': 1300.0
+}
+
+PRODUCTOS_CSV = 'productos_guardados.csv'
+
+# Sesiones que se mantienen en memoria: se descartan las inactivas por más
+# de TTL_SESION_SEGUNDOS y, si hay más de MAX_SESIONES_EN_MEMORIA, las menos usadas
+MAX_SESIONES_EN_MEMORIA = 1000
+TTL_SESION_SEGUNDOS = 12 * 3600
+
+def cargar_productos_csv(ruta=PRODUCTOS_CSV):
+    """Cargar los productos guardados como tupla inmutable (vacía si no hay archivo)"""
+    if os.path.exists(ruta):
+        try:
+            df_csv = pd.read_csv(ruta)
+            if not df_csv.empty:
+                return tuple(df_csv.to_dict('records'))
+        except Exception:
+            pass
+    return ()
+
+def guardar_productos_csv(productos, ruta=PRODUCTOS_CSV):
+    """Guardar productos en CSV de forma atómica (archivo temporal + reemplazo)"""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    fd, tmp_path = tempfile.mkstemp(dir=directorio, suffix='.csv.tmp')
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            pd.DataFrame(list(productos)).to_csv(f, index=False)
+        os.replace(tmp_path, ruta)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+class EstadoSesionMemoria:
+    """Estado por sesión en memoria del proceso, protegido con un lock.
+
+    Las tablas de productos son tuplas inmutables: cada modificación crea
+    una tupla nueva y reemplaza la referencia (copy-on-write), así los
+    lectores nunca ven una tabla a medio modificar ni necesitan copiarla.
+    Sirve para un solo proceso y no guarda nada en disco: las sesiones se
+    guardan en orden de último uso (LRU) con vencimiento y se pierden al
+    reiniciar. Para conservar los productos usar EstadoSesionSQLite.
+    """
+
+    def __init__(self, productos_iniciales=(), max_sesiones=MAX_SESIONES_EN_MEMORIA, ttl_segundos=TTL_SESION_SEGUNDOS):
+        self._productos_iniciales = tuple(productos_iniciales)
+        self.max_sesiones = max_sesiones
+        self.ttl_segundos = ttl_segundos
+        self._sesiones = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _sesion(self, session_id):
+        ahora = time.monotonic()
+        # Las menos usadas están al principio: se descartan las vencidas
+        while self._sesiones:
+            _, sesion_antigua = next(iter(self._sesiones.items()))
+            if ahora - sesion_antigua['ultimo_uso'] <= self.ttl_segundos:
+                break
+            self._sesiones.popitem(last=False)
+
+        if session_id not in self._sesiones:
+            self._sesiones[session_id] = {
+                'parametros': dict(PARAMETROS_DEFAULT),
+                'productos': self._productos_iniciales
+            }
+            while len(self._sesiones) > self.max_sesiones:
+                self._sesiones.popitem(last=False)
+        sesion = self._sesiones[session_id]
+        sesion['ultimo_uso'] = ahora
+        self._sesiones.move_to_end(session_id)
+        return sesion
+
+    def obtener_parametros(self, session_id):
+        with self._lock:
+            return dict(self._sesion(session_id)['parametros'])
+
+    def guardar_parametros(self, session_id, **parametros):
+        with self._lock:
+            sesion = self._sesion(session_id)
+            sesion['parametros'] = {**sesion['parametros'], **parametros}
+
+    def obtener_productos(self, session_id):
+        with self._lock:
+            return self._sesion(session_id)['productos']
+
+    def modificar_productos(self, session_id, funcion):
+        """Aplicar funcion(productos) -> nuevos productos de forma atómica"""
+        with self._lock:
+            sesion = self._sesion(session_id)
+            sesion['productos'] = tuple(funcion(sesion['productos']))
+            return sesion['productos']
+
+class EstadoSesionSQLite:
+    """Estado por sesión en una base SQLite compartida entre workers.
+
+    Cada modificación de productos se hace dentro de una transacción
+    exclusiva (lectura + escritura), por lo que dos workers no pueden
+    pisarse los cambios.
+    """
+
+    def __init__(self, ruta_db, productos_iniciales=()):
+        self.ruta_db = ruta_db
+        self._productos_iniciales = tuple(productos_iniciales)
+        os.makedirs(os.path.dirname(os.path.abspath(ruta_db)), exist_ok=True)
+        with self._conectar() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sesiones ("
+                "session_id TEXT PRIMARY KEY, parametros TEXT NOT NULL, productos TEXT NOT NULL)"
+            )
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.ruta_db, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _leer(self, conn, session_id):
+        fila = conn.execute(
+            "SELECT parametros, productos FROM sesiones WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if fila is None:
+            return dict(PARAMETROS_DEFAULT), self._productos_iniciales
+        return json.loads(fila[0]), tuple(json.loads(fila[1]))
+
+    def _escribir(self, conn, session_id, parametros, productos):
+        conn.execute(
+            "INSERT OR REPLACE INTO sesiones (session_id, parametros, productos) VALUES (?, ?, ?)",
+            (session_id, json.dumps(parametros), json.dumps(list(productos), default=str))
+        )
+
+    def _transaccion(self, session_id, funcion):
+        conn = self._conectar()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            parametros, productos = self._leer(conn, session_id)
+            parametros, productos = funcion(parametros, productos)
+            self._escribir(conn, session_id, parametros, productos)
+            conn.execute("COMMIT")
+            return parametros, productos
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def obtener_parametros(self, session_id):
+        conn = self._conectar()
+        try:
+            return self._leer(conn, session_id)[0]
+        finally:
+            conn.close()
+
+    def guardar_parametros(self, session_id, **parametros):
+        self._transaccion(session_id, lambda p, prods: ({**p, **parametros}, prods))
+
+    def obtener_productos(self, session_id):
+        conn = self._conectar()
+        try:
+            return self._leer(conn, session_id)[1]
+        finally:
+            conn.close()
+
+    def modificar_productos(self, session_id, funcion):
+        """Aplicar funcion(productos) -> nuevos productos de forma atómica"""
+        return self._transaccion(session_id, lambda p, prods: (p, tuple(funcion(prods))))[1]
+
+def crear_estado_sesion():
+    """Crear el backend de estado según ESTADO_SESION_BACKEND ('sqlite' o 'memoria').
+
+    Por defecto se usa SQLite, así los productos de cada sesión sobreviven a
+    un reinicio del servidor. 'memoria' no guarda nada en disco.
+    """
+    productos_iniciales = cargar_productos_csv()
+    backend = os.environ.get('ESTADO_SESION_BACKEND', 'sqlite')
+    if backend == 'memoria':
+        print("⚠️ ESTADO_SESION_BACKEND=memoria: los productos de cada sesión se pierden al reiniciar "
+              "el servidor o al vencer la sesión", file=sys.stderr)
+        return EstadoSesionMemoria(productos_iniciales)
+    ruta_db = os.environ.get('ESTADO_SESION_DB', os.path.join('persistent_files', 'sesiones_dash.db'))
+    return EstadoSesionSQLite(ruta_db, productos_iniciales)
@@ -12,6 +12,10 @@ import io
 import base64
 import json
 
+from calculadora_ml import HistorialTarifas
+from fechas_mercadolibre import parsear_fechas_ml
+from modules.tabla_paginada import crear_tabla_paginada
+
 warnings.filterwarnings('ignore')
 
 def create_ganancias_module():
@@ -44,6 +48,7 @@ def create_ganancias_module():
                             },
                             multiple=False
                         ),
+                        dcc.Store(id='store-mercadolibre'),
                         
                         html.Hr(),
                         
@@ -66,6 +71,7 @@ def create_ganancias_module():
                             },
                             multiple=False
                         ),
+                        dcc.Store(id='store-costos'),
                         
                         dbc.Button("📊 Analizar Ganancias", id="analyze-ganancias", color="primary", className="w-100 mt-3")
                     ])
@@ -73,6 +79,8 @@ def create_ganancias_module():
             ], width=4),
             
             dbc.Col([
+                dcc.Store(id='ganancias-trabajo'),
+                dcc.Interval(id='ganancias-intervalo', interval=1000, disabled=True),
                 html.Div(id="ganancias-content")
             ], width=8)
         ])
@@ -80,22 +88,17 @@ def create_ganancias_module():
     
     return layout
 
-def procesar_reporte_mercadolibre(contents, filename):
+def procesar_reporte_mercadolibre(df, filename, error=None):
     """Procesar reporte de MercadoLibre"""
-    if contents is None:
+    if error:
+        return None, f"Error leyendo archivo: {error}"
+    if df is None:
         return None, "No se cargó ningún archivo"
     
     try:
-        # Decodificar el archivo
-        content_type, content_string = contents.split(',')
-        decoded = base64.b64decode(content_string)
-        
-        # Leer el archivo Excel
-        df = pd.read_excel(io.BytesIO(decoded))
-        
         # Procesar columnas
         if 'Fecha de venta' in df.columns:
-            df['Fecha de venta'] = pd.to_datetime(df['Fecha de venta'])
+            df['Fecha de venta'] = parsear_fechas_ml(df['Fecha de venta'])
         
         # Limpiar datos
         df = df.dropna(subset=['Título del ítem'])
@@ -115,23 +118,20 @@ def procesar_reporte_mercadolibre(contents, filename):
     except Exception as e:
         return None, f"Error procesando archivo: {str(e)}"
 
-def procesar_costos(contents, filename):
+def procesar_costos(df, filename, error=None):
     """Procesar archivo de costos"""
-    if contents is None:
+    if error:
+        return None, f"Error leyendo archivo: {error}"
+    if df is None:
         return None, "No se cargó ningún archivo"
     
     try:
-        # Decodificar el archivo
-        content_type, content_string = contents.split(',')
-        decoded = base64.b64decode(content_string)
-        
-        # Leer el archivo Excel
-        df = pd.read_excel(io.BytesIO(decoded))
-        
         # Procesar costos
         if 'Producto' in df.columns and 'Costo Unitario' in df.columns:
-            df_costos = df[['Producto', 'Costo Unitario']].copy()
-            df_costos = df_costos.dropna()
+            # 'Categoría ML' es opcional: permite recalcular la comisión con la tarifa de cada fecha
+            columnas = ['Producto', 'Costo Unitario'] + (['Categoría ML'] if 'Categoría ML' in df.columns else [])
+            df_costos = df[columnas].copy()
+            df_costos = df_costos.dropna(subset=['Producto', 'Costo Unitario'])
             return df_costos, {
                 'total_productos': len(df_costos),
                 'filename': filename
@@ -157,16 +157,29 @@ def calcular_ganancias(df_ventas, df_costos):
         
         # Calcular ganancias
         df_ventas['Ganancia Bruta'] = df_ventas['Precio unitario'] - df_ventas['Costo Total']
-        df_ventas['Ganancia Neta'] = df_ventas['Ganancia Bruta'] - df_ventas['Comisión de MercadoLibre']
+        
+        # Comisión según la tarifa vigente en la fecha de cada venta; se usa
+        # la del archivo solo en las ventas sin categoría o sin tarifa vigente
+        comision = df_ventas['Comisión de MercadoLibre']
+        if 'Categoría ML' in df_costos.columns and 'Fecha de venta' in df_ventas.columns:
+            categorias_dict = dict(zip(df_costos['Producto'], df_costos['Categoría ML']))
+            comision_pct = HistorialTarifas.cargar().comisiones_por_fecha(
+                df_ventas['Título del ítem'].map(categorias_dict),
+                df_ventas['Fecha de venta']
+            )
+            df_ventas['Comisión según Tarifa'] = df_ventas['Precio unitario'] * comision_pct
+            comision = df_ventas['Comisión según Tarifa'].fillna(comision)
+        
+        df_ventas['Ganancia Neta'] = df_ventas['Ganancia Bruta'] - comision
         
         # Métricas agregadas
         total_ingresos = df_ventas['Precio unitario'].sum()
         total_costos = df_ventas['Costo Total'].sum()
-        total_comisiones = df_ventas['Comisión de MercadoLibre'].sum()
+        total_comisiones = comision.sum()
         total_ganancia_bruta = df_ventas['Ganancia Bruta'].sum()
         total_ganancia_neta = df_ventas['Ganancia Neta'].sum()
         
-        return df_ventas, {
+        metricas = {
             'total_ingresos': total_ingresos,
             'total_costos': total_costos,
             'total_comisiones': total_comisiones,
@@ -175,10 +188,47 @@ def calcular_ganancias(df_ventas, df_costos):
             'margen_bruto': (total_ganancia_bruta / total_ingresos * 100) if total_ingresos > 0 else 0,
             'margen_neto': (total_ganancia_neta / total_ingresos * 100) if total_ingresos > 0 else 0
         }
+        if 'Comisión según Tarifa' in df_ventas.columns:
+            metricas['total_comisiones_tarifa'] = df_ventas['Comisión según Tarifa'].sum()
+        
+        return df_ventas, metricas
         
     except Exception as e:
         return None, f"Error calculando ganancias: {str(e)}"
 
+def analizar_ganancias(upload_mercadolibre, upload_costos, progreso=None):
+    """Análisis completo de ganancias, pensado para ejecutarse como trabajo en segundo plano.
+    
+    Cada upload es (df, filename, error) ya parseado en el proceso que
+    recibió el archivo (el proceso del trabajo no ve su cache). Retorna {'error': mensaje} o {'df': df_resultado, 'metricas': metricas, 'grafico': grafico}.
+    """
+    progreso = progreso or (lambda porcentaje, mensaje="": None)
+    
+    # Procesar reporte de MercadoLibre
+    progreso(10, "Procesando reporte de MercadoLibre...")
+    df_ventas, info_ventas = procesar_reporte_mercadolibre(*upload_mercadolibre)
+    if df_ventas is None:
+        return {'error': f"Error en reporte de MercadoLibre: {info_ventas}"}
+    
+    # Procesar archivo de costos
+    progreso(40, "Procesando archivo de costos...")
+    df_costos, info_costos = procesar_costos(*upload_costos)
+    if df_costos is None:
+        return {'error': f"Error en archivo de costos: {info_costos}"}
+    
+    # Calcular ganancias
+    progreso(60, "Calculando ganancias...")
+    df_resultado, metricas = calcular_ganancias(df_ventas, df_costos)
+    if df_resultado is None:
+        return {'error': f"Error calculando ganancias: {metricas}"}
+    
+    progreso(85, "Generando gráficos...")
+    return {
+        'df': df_resultado,
+        'metricas': metricas,
+        'grafico': create_ganancias_chart(df_resultado)
+    }
+
 def create_ganancias_table(df_ventas):
     """Crear tabla de ganancias con Dash DataTable"""
     if df_ventas is None or df_ventas.empty:
@@ -189,32 +239,41 @@ def create_ganancias_table(df_ventas):
         {"name": "Producto", "id": "Título del ítem"},
         {"name": "Cantidad", "id": "Cantidad"},
         {"name": "Precio Unitario", "id": "Precio unitario"},
-        {"name": "Ingresos", "id": "Precio unitario"},
+        {"name": "Ingresos", "id": "Ingresos"},
         {"name": "Costo Unitario", "id": "Costo Unitario"},
         {"name": "Costo Total", "id": "Costo Total"},
         {"name": "Comisión", "id": "Comisión de MercadoLibre"},
+        {"name": "Comisión según Tarifa", "id": "Comisión según Tarifa"},
         {"name": "Ganancia Bruta", "id": "Ganancia Bruta"},
         {"name": "Ganancia Neta", "id": "Ganancia Neta"}
     ]
     
-    # Formatear datos
-    data = []
-    for _, row in df_ventas.iterrows():
-        data.append({
-            "Título del ítem": row.get('Título del ítem', ''),
-            "Cantidad": f"{row.get('Cantidad', 0):,.0f}",
-            "Precio unitario": f"${row.get('Precio unitario', 0):,.2f}",
-            "Costo Unitario": f"${row.get('Costo Unitario', 0):,.2f}",
-            "Costo Total": f"${row.get('Costo Total', 0):,.2f}",
-            "Comisión de MercadoLibre": f"${row.get('Comisión de MercadoLibre', 0):,.2f}",
-            "Ganancia Bruta": f"${row.get('Ganancia Bruta', 0):,.2f}",
-            "Ganancia Neta": f"${row.get('Ganancia Neta', 0):,.2f}"
-        })
+    if 'Comisión según Tarifa' not in df_ventas.columns:
+        columns = [col for col in columns if col['id'] != 'Comisión según Tarifa']
+    
+    # Formatos aplicados solo a la página visible
+    formatos = {
+        "Cantidad": "{:,.0f}",
+        "Precio unitario": "${:,.2f}",
+        "Ingresos": "${:,.2f}",
+        "Costo Unitario": "${:,.2f}",
+        "Costo Total": "${:,.2f}",
+        "Comisión de MercadoLibre": "${:,.2f}",
+        "Comisión según Tarifa": "${:,.2f}",
+        "Ganancia Bruta": "${:,.2f}",
+        "Ganancia Neta": "${:,.2f}"
+    }
+    
+    df_tabla = df_ventas.copy()
+    if 'Precio unitario' in df_tabla.columns:
+        df_tabla['Ingresos'] = df_tabla['Precio unitario']
     
-    return dash.dash_table.DataTable(
-        id='ganancias-table',
-        columns=columns,
-        data=data,
+    return crear_tabla_paginada(
+        'ganancias-table',
+        df_tabla,
+        columns,
+        formatos,
+        page_size=15,
         style_table={'overflowX': 'auto'},
         style_cell={'textAlign': 'center'},
         style_header={'backgroundColor': 'rgb(230, 230, 230)', 'fontWeight': 'bold'},
@@ -222,8 +281,7 @@ def create_ganancias_table(df_ventas):
             {'if': {'row_index': 'odd'}, 'backgroundColor': 'rgb(248, 248, 248)'},
             {'if': {'column_id': 'Ganancia Bruta'}, 'color': 'green'},
             {'if': {'column_id': 'Ganancia Neta'}, 'color': 'blue'}
-        ],
-        page_size=15
+        ]
     )
 
 def create_ganancias_summary(metricas):
@@ -12,6 +12,8 @@ import io
 import base64
 import json
 
+from modules.tabla_paginada import crear_tabla_paginada
+
 warnings.filterwarnings('ignore')
 
 def create_inventario_module():
@@ -53,6 +55,7 @@ def create_inventario_module():
                             },
                             multiple=False
                         ),
+                        dcc.Store(id='store-inventario'),
                         
                         html.Hr(),
                         
@@ -75,6 +78,7 @@ def create_inventario_module():
                             },
                             multiple=False
                         ),
+                        dcc.Store(id='store-costos-inventario'),
                         
                         dbc.Button("📊 Analizar Inventario", id="analyze-inventario", color="primary", className="w-100 mt-3")
                     ])
@@ -82,6 +86,8 @@ def create_inventario_module():
             ], width=3),
             
             dbc.Col([
+                dcc.Store(id='inventario-trabajo'),
+                dcc.Interval(id='inventario-intervalo', interval=1000, disabled=True),
                 html.Div(id="inventario-content")
             ], width=9)
         ])
@@ -89,19 +95,14 @@ def create_inventario_module():
     
     return layout
 
-def procesar_inventario(contents, filename):
+def procesar_inventario(df, filename, error=None):
     """Procesar archivo de inventario"""
-    if contents is None:
+    if error:
+        return None, f"Error leyendo archivo: {error}"
+    if df is None:
         return None, "No se cargó ningún archivo"
     
     try:
-        # Decodificar el archivo
-        content_type, content_string = contents.split(',')
-        decoded = base64.b64decode(content_string)
-        
-        # Leer el archivo Excel
-        df = pd.read_excel(io.BytesIO(decoded))
-        
         # Verificar columnas requeridas
         required_columns = ['nombre', 'cantidad']
         if not all(col in df.columns for col in required_columns):
@@ -120,19 +121,14 @@ def procesar_inventario(contents, filename):
     except Exception as e:
         return None, f"Error procesando archivo: {str(e)}"
 
-def procesar_costos_inventario(contents, filename):
+def procesar_costos_inventario(df, filename, error=None):
     """Procesar archivo de costos para inventario"""
-    if contents is None:
+    if error:
+        return None, f"Error leyendo archivo: {error}"
+    if df is None:
         return None, "No se cargó ningún archivo"
     
     try:
-        # Decodificar el archivo
-        content_type, content_string = contents.split(',')
-        decoded = base64.b64decode(content_string)
-        
-        # Leer el archivo Excel
-        df = pd.read_excel(io.BytesIO(decoded))
-        
         # Verificar columnas
         if 'nombre' in df.columns and 'costo_unitario_usd' in df.columns:
             df_costos = df[['nombre', 'costo_unitario_usd']].copy()
@@ -196,6 +192,39 @@ def calcular_valuacion_inventario(df_inventario, df_costos, tipo_cambio):
     except Exception as e:
         return None, f"Error calculando valuación: {str(e)}"
 
+def analizar_inventario(upload_inventario, upload_costos, tipo_cambio, progreso=None):
+    """Análisis completo de inventario, pensado para ejecutarse como trabajo en segundo plano.
+    
+    Cada upload es (df, filename, error) ya parseado en el proceso que
+    recibió el archivo (el proceso del trabajo no ve su cache). Retorna {'error': mensaje} o {'df': df_resultado, 'metricas': metricas, 'grafico': grafico}.
+    """
+    progreso = progreso or (lambda porcentaje, mensaje="": None)
+    
+    # Procesar inventario
+    progreso(10, "Procesando inventario...")
+    df_inventario, info_inventario = procesar_inventario(*upload_inventario)
+    if df_inventario is None:
+        return {'error': f"Error en archivo de inventario: {info_inventario}"}
+    
+    # Procesar costos
+    progreso(40, "Procesando costos...")
+    df_costos, info_costos = procesar_costos_inventario(*upload_costos)
+    if df_costos is None:
+        return {'error': f"Error en archivo de costos: {info_costos}"}
+    
+    # Calcular valuación
+    progreso(60, "Calculando valuación...")
+    df_resultado, metricas = calcular_valuacion_inventario(df_inventario, df_costos, tipo_cambio)
+    if df_resultado is None:
+        return {'error': f"Error calculando valuación: {metricas}"}
+    
+    progreso(85, "Generando gráficos...")
+    return {
+        'df': df_resultado,
+        'metricas': metricas,
+        'grafico': create_inventario_chart(df_resultado)
+    }
+
 def create_inventario_table(df_inventario):
     """Crear tabla de inventario con Dash DataTable"""
     if df_inventario is None or df_inventario.empty:
@@ -215,26 +244,25 @@ def create_inventario_table(df_inventario):
         {"name": "Margen %", "id": "margen_potencial"}
     ]
     
-    # Formatear datos
-    data = []
-    for _, row in df_inventario.iterrows():
-        data.append({
-            "nombre": row.get('nombre', ''),
-            "cantidad": f"{row.get('cantidad', 0):,.0f}",
-            "costo_unitario_usd": f"${row.get('costo_unitario_usd', 0):,.2f}",
-            "costo_total_usd": f"${row.get('costo_total_usd', 0):,.2f}",
-            "costo_unitario_ars": f"${row.get('costo_unitario_ars', 0):,.0f}",
-            "costo_total_ars": f"${row.get('costo_total_ars', 0):,.0f}",
-            "precio_venta_ars": f"${row.get('precio_venta_ars', 0):,.0f}",
-            "valor_venta_total_ars": f"${row.get('valor_venta_total_ars', 0):,.0f}",
-            "ganancia_potencial_ars": f"${row.get('ganancia_potencial_ars', 0):,.0f}",
-            "margen_potencial": f"{row.get('margen_potencial', 0):.1f}%"
-        })
+    # Formatos aplicados solo a la página visible
+    formatos = {
+        "cantidad": "{:,.0f}",
+        "costo_unitario_usd": "${:,.2f}",
+        "costo_total_usd": "${:,.2f}",
+        "costo_unitario_ars": "${:,.0f}",
+        "costo_total_ars": "${:,.0f}",
+        "precio_venta_ars": "${:,.0f}",
+        "valor_venta_total_ars": "${:,.0f}",
+        "ganancia_potencial_ars": "${:,.0f}",
+        "margen_potencial": "{:.1f}%"
+    }
     
-    return dash.dash_table.DataTable(
-        id='inventario-table',
-        columns=columns,
-        data=data,
+    return crear_tabla_paginada(
+        'inventario-table',
+        df_inventario,
+        columns,
+        formatos,
+        page_size=10,
         style_table={'overflowX': 'auto'},
         style_cell={'textAlign': 'center'},
         style_header={'backgroundColor': 'rgb(230, 230, 230)', 'fontWeight': 'bold'},
@@ -242,8 +270,7 @@ def create_inventario_table(df_inventario):
             {'if': {'row_index': 'odd'}, 'backgroundColor': 'rgb(248, 248, 248)'},
             {'if': {'column_id': 'ganancia_potencial_ars'}, 'color': 'green'},
             {'if': {'column_id': 'margen_potencial'}, 'color': 'blue'}
-        ],
-        page_size=10
+        ]
     )
 
 def create_inventario_summary(metricas):
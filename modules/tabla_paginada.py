@@ -0,0 +1,209 @@
+import dash
+from dash import dcc, html, Input, Output, State
+import pandas as pd
+import numpy as np
+import os
+import pickle
+import re
+import time
+import uuid
+
+from modules.cache_uploads import CacheLRU
+
+# Directorio para recuperar tablas registradas por otro worker
+TABLAS_DIR = os.path.join("persistent_files", "tablas")
+
+# Las tablas guardadas en disco se eliminan después de este tiempo
+HORAS_RETENCION_TABLAS = 24
+
+_cache_tablas = CacheLRU(max_items=32)
+
+# Operadores soportados en filter_query de DataTable
+OPERADORES_FILTRO = [
+    ['ge ', '>='],
+    ['le ', '<='],
+    ['lt ', '<'],
+    ['gt ', '>'],
+    ['ne ', '!='],
+    ['eq ', '='],
+    ['contains '],
+    ['datestartswith ']
+]
+
+def _limpiar_tablas_viejas():
+    limite = time.time() - HORAS_RETENCION_TABLAS * 3600
+    for archivo in os.listdir(TABLAS_DIR):
+        ruta = os.path.join(TABLAS_DIR, archivo)
+        try:
+            if os.path.getmtime(ruta) < limite:
+                os.unlink(ruta)
+        except OSError:
+            pass
+
+def registrar_tabla(df):
+    """Guardar el DataFrame de una tabla en el servidor y devolver su clave"""
+    clave = uuid.uuid4().hex
+    _cache_tablas.set(clave, df)
+    os.makedirs(TABLAS_DIR, exist_ok=True)
+    _limpiar_tablas_viejas()
+    with open(os.path.join(TABLAS_DIR, f"{clave}.pkl"), 'wb') as f:
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return clave
+
+def obtener_tabla(clave):
+    """Obtener el DataFrame de una tabla registrada (None si no existe)"""
+    # La clave llega del navegador: solo se aceptan claves de registrar_tabla (uuid hex)
+    if not isinstance(clave, str) or re.fullmatch(r'[0-9a-f]{32}', clave) is None:
+        return None
+    df = _cache_tablas.get(clave)
+    if df is None:
+        ruta = os.path.join(TABLAS_DIR, f"{clave}.pkl")
+        if not os.path.exists(ruta):
+            return None
+        with open(ruta, 'rb') as f:
+            df = pickle.load(f)
+        _cache_tablas.set(clave, df)
+    return df
+
+def _separar_filtro(parte):
+    """Separar una parte de filter_query en (columna, operador, valor)"""
+    for grupo in OPERADORES_FILTRO:
+        for operador in grupo:
+            if operador in parte:
+                nombre, valor = parte.split(operador, 1)
+                nombre = nombre[nombre.find('{') + 1: nombre.rfind('}')]
+                valor = valor.strip()
+                if valor and valor[0] == valor[-1] and valor[0] in ("'", '"', '`'):
+                    valor = valor[1:-1].replace('\\' + valor[0], valor[0])
+                else:
+                    try:
+                        valor = float(valor)
+                    except ValueError:
+                        pass
+                return nombre, grupo[0].strip(), valor
+    return None, None, None
+
+def filtrar_ordenar_paginar(df, page_current, page_size, sort_by, filter_query):
+    """Aplicar filtro, orden y paginación en pandas. Retorna (df_pagina, page_count)"""
+    if filter_query:
+        for parte in filter_query.split(' && '):
+            columna, operador, valor = _separar_filtro(parte)
+            if columna not in df.columns:
+                continue
+            serie = df[columna]
+            if operador in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+                if isinstance(valor, float):
+                    serie = pd.to_numeric(serie, errors='coerce')
+                elif pd.api.types.is_numeric_dtype(serie) and operador not in ('eq', 'ne'):
+                    # Texto contra una columna numérica: la condición no es válida y se ignora
+                    continue
+                else:
+                    serie = serie.astype(str)
+                df = df.loc[getattr(serie, operador)(valor).fillna(False).astype(bool)]
+            elif operador == 'contains':
+                df = df.loc[serie.astype(str).str.contains(str(valor), case=False, regex=False, na=False)]
+            elif operador == 'datestartswith':
+                df = df.loc[serie.astype(str).str.startswith(str(valor), na=False)]
+
+    if sort_by:
+        df = df.sort_values(
+            [col['column_id'] for col in sort_by],
+            ascending=[col['direction'] == 'asc' for col in sort_by],
+            inplace=False
+        )
+
+    page_count = max(1, int(np.ceil(len(df) / page_size)))
+    inicio = page_current * page_size
+    return df.iloc[inicio:inicio + page_size], page_count
+
+def formato_dash(formato):
+    """Convierte un formato de Python ('${:,.2f}', '{:.1f}%') al format de DataTable (d3-format)"""
+    partes = re.fullmatch(r'(.*)\{:([^}]*)\}(.*)', formato)
+    if partes is None:
+        return None
+    prefijo, especificador, sufijo = partes.groups()
+    if prefijo or sufijo:
+        # '$' en el especificador inserta el prefijo/sufijo del locale
+        return {'locale': {'symbol': [prefijo, sufijo]}, 'specifier': '$' + especificador}
+    return {'specifier': especificador}
+
+def formatear_pagina(df_pagina, columns, formatos):
+    """Datos de la página visible.
+
+    Las columnas numéricas se envían como números (las formatea el
+    DataTable con su format) para que el filtro compare valores; el resto
+    se formatea acá.
+    """
+    data = {}
+    for col in columns:
+        col_id = col['id']
+        if col_id not in df_pagina.columns:
+            data[col_id] = [''] * len(df_pagina)
+            continue
+        formato = formatos.get(col_id)
+        valores = df_pagina[col_id]
+        if col.get('type') == 'numeric':
+            data[col_id] = [v if pd.notna(v) else None for v in valores.tolist()]
+        elif formato:
+            data[col_id] = [formato.format(v) if pd.notna(v) else '' for v in valores]
+        else:
+            data[col_id] = valores.where(valores.notna(), '').tolist()
+    return pd.DataFrame(data, index=range(len(df_pagina)), dtype=object).to_dict('records')
+
+def crear_tabla_paginada(table_id, df, columns, formatos=None, page_size=10, **estilos):
+    """Crear un DataTable con paginación, orden y filtro resueltos en el servidor.
+
+    Solo se envía al navegador la página visible; el DataFrame completo queda
+    registrado en el servidor. Requiere registrar_callbacks_tabla(app, table_id).
+    """
+    formatos = formatos or {}
+    columnas_tabla = [col['id'] for col in columns if col['id'] in df.columns]
+    clave = registrar_tabla(df[columnas_tabla])
+
+    df_pagina, page_count = filtrar_ordenar_paginar(df, 0, page_size, [], '')
+    columns = [
+        {**col, 'type': 'numeric', **({'format': formato_dash(formatos[col['id']])} if formatos.get(col['id']) else {})}
+        if col['id'] in df.columns and pd.api.types.is_numeric_dtype(df[col['id']]) else col
+        for col in columns
+    ]
+
+    return html.Div([
+        dcc.Store(id=f"{table_id}-clave", data={'clave': clave, 'formatos': formatos}),
+        dash.dash_table.DataTable(
+            id=table_id,
+            columns=columns,
+            data=formatear_pagina(df_pagina, columns, formatos),
+            page_current=0,
+            page_size=page_size,
+            page_count=page_count,
+            page_action='custom',
+            sort_action='custom',
+            sort_mode='multi',
+            sort_by=[],
+            filter_action='custom',
+            filter_query='',
+            **estilos
+        )
+    ])
+
+def registrar_callbacks_tabla(app, table_id):
+    """Registrar el callback que sirve páginas para una tabla creada con crear_tabla_paginada"""
+
+    @app.callback(
+        [Output(table_id, 'data'),
+         Output(table_id, 'page_count')],
+        [Input(table_id, 'page_current'),
+         Input(table_id, 'page_size'),
+         Input(table_id, 'sort_by'),
+         Input(table_id, 'filter_query')],
+        [State(table_id, 'columns'),
+         State(f"{table_id}-clave", 'data')]
+    )
+    def actualizar_pagina(page_current, page_size, sort_by, filter_query, columns, datos_tabla):
+        df = obtener_tabla((datos_tabla or {}).get('clave'))
+        if df is None:
+            return [], 1
+        df_pagina, page_count = filtrar_ordenar_paginar(df, page_current or 0, page_size, sort_by, filter_query)
+        return formatear_pagina(df_pagina, columns, datos_tabla.get('formatos', {})), page_count
+
+    return actualizar_pagina
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import uuid
+import pickle
+import re
+import shutil
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Directorio donde se guardan estado y resultados de cada trabajo (compartido entre workers)
+TRABAJOS_DIR = os.path.join("persistent_files", "trabajos")
+
+# Procesos del pool de trabajos en segundo plano
+MAX_PROCESOS_TRABAJOS = int(os.environ.get('MAX_PROCESOS_TRABAJOS', os.cpu_count() or 2))
+
+# Los trabajos terminados se eliminan después de este tiempo
+HORAS_RETENCION_TRABAJOS = 24
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _obtener_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=MAX_PROCESOS_TRABAJOS)
+        return _executor
+
+def _descartar_executor(executor):
+    """Un pool roto (un proceso murió) no acepta más trabajos: el próximo envío crea uno nuevo"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _dir_trabajo(job_id):
+    return os.path.join(TRABAJOS_DIR, job_id)
+
+def _id_valido(job_id):
+    """El id llega del navegador: solo se aceptan ids generados por enviar_trabajo (uuid hex)"""
+    return isinstance(job_id, str) and re.fullmatch(r'[0-9a-f]{32}', job_id) is not None
+
+def _escribir_estado(job_id, **campos):
+    """Actualizar el estado del trabajo de forma atómica"""
+    ruta = os.path.join(_dir_trabajo(job_id), 'estado.json')
+    estado = {}
+    if os.path.exists(ruta):
+        with open(ruta, 'r') as f:
+            estado = json.load(f)
+    estado.update(campos, actualizado=time.time())
+    tmp_path = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(estado, f)
+    os.replace(tmp_path, ruta)
+
+class ReporteProgreso:
+    """Callable que el trabajo usa para informar su avance (0-100)"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def __call__(self, porcentaje, mensaje=""):
+        _escribir_estado(self.job_id, progreso=int(porcentaje), mensaje=mensaje)
+
+def _ejecutar_trabajo(job_id, funcion, args):
+    """Se ejecuta en el proceso del pool"""
+    _escribir_estado(job_id, estado='en_curso', inicio=time.time())
+    try:
+        resultado = funcion(*args, progreso=ReporteProgreso(job_id))
+        with open(os.path.join(_dir_trabajo(job_id), 'resultado.pkl'), 'wb') as f:
+            pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _escribir_estado(job_id, estado='terminado', progreso=100, fin=time.time())
+    except Exception as e:
+        _escribir_estado(job_id, estado='error', error=str(e), detalle=traceback.format_exc(), fin=time.time())
+
+def enviar_trabajo(funcion, *args):
+    """Encolar funcion(*args, progreso=...) en el pool y devolver el id del trabajo.
+
+    La función debe ser de nivel de módulo (picklable) y recibir el
+    parámetro progreso para informar su avance.
+    """
+    limpiar_trabajos_viejos()
+
+    job_id = uuid.uuid4().hex
+    os.makedirs(_dir_trabajo(job_id))
+    _escribir_estado(job_id, estado='pendiente', progreso=0, mensaje="En cola", creado=time.time())
+    for intento in range(2):
+        executor = _obtener_executor()
+        try:
+            futuro = executor.submit(_ejecutar_trabajo, job_id, funcion, args)
+            break
+        except BrokenProcessPool:
+            _descartar_executor(executor)
+    else:
+        _escribir_estado(job_id, estado='error', error="No se pudo iniciar el proceso del análisis", fin=time.time())
+        return job_id
+
+    def al_terminar(futuro):
+        # Si el proceso muere el trabajo no llega a registrar su estado
+        if not futuro.cancelled() and isinstance(futuro.exception(), BrokenProcessPool):
+            _escribir_estado(job_id, estado='error', error="El proceso del análisis terminó inesperadamente", fin=time.time())
+            _descartar_executor(executor)
+
+    futuro.add_done_callback(al_terminar)
+    return job_id
+
+def estado_trabajo(job_id):
+    """Obtener el estado de un trabajo o None si no existe"""
+    if not _id_valido(job_id):
+        return None
+    ruta = os.path.join(_dir_trabajo(job_id), 'estado.json')
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, 'r') as f:
+        return json.load(f)
+
+def resultado_trabajo(job_id):
+    """Obtener el resultado de un trabajo terminado o None si no está disponible"""
+    if not _id_valido(job_id):
+        return None
+    ruta = os.path.join(_dir_trabajo(job_id), 'resultado.pkl')
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, 'rb') as f:
+        return pickle.load(f)
+
+def limpiar_trabajos_viejos(horas=HORAS_RETENCION_TRABAJOS):
+    """Eliminar del disco los trabajos con más antigüedad que la retención"""
+    if not os.path.exists(TRABAJOS_DIR):
+        return
+    limite = time.time() - horas * 3600
+    for job_id in os.listdir(TRABAJOS_DIR):
+        ruta = _dir_trabajo(job_id)
+        try:
+            if os.path.getmtime(ruta) < limite:
+                shutil.rmtree(ruta, ignore_errors=True)
+        except OSError:
+            pass
@@ -7,6 +7,8 @@ import io
 import hashlib
 import json
 
+from lector_excel import leer_excel
+
 # Configuración de la página
 st.set_page_config(
     page_title="Inventario - Valor de Stock",
@@ -650,7 +652,7 @@ with st.sidebar:
         try:
             file_path = inventario_file_info.get('file_path')
             if file_path and os.path.exists(file_path):
-                df_stock = pd.read_excel(file_path)
+                df_stock = leer_excel(file_path)
                 st.session_state.df_stock = df_stock
                 st.session_state.inventario_file_info = inventario_file_info
                 
@@ -716,7 +718,7 @@ with st.sidebar:
         try:
             # Leer el archivo
             file_content = uploaded_file.read()
-            df_stock = pd.read_excel(io.BytesIO(file_content))
+            df_stock = leer_excel(io.BytesIO(file_content))
             
             required_columns = ['nombre', 'sku', 'stock_actual']
             # Columnas opcionales para mayor y detal
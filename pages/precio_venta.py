@@ -7,6 +7,8 @@ import plotly.graph_objects as go
 import io
 import tempfile
 
+from lector_excel import leer_excel
+
 # Configuración de la página
 st.set_page_config(
     page_title="💰 Análisis de Ganancias - MercadoLibre",
@@ -357,6 +359,8 @@ import os
 import hashlib
 import json
 
+from fechas_mercadolibre import parsear_fechas_ml
+
 # Crear directorio para archivos persistentes
 PERSISTENT_FILES_DIR = "persistent_files"
 if not os.path.exists(PERSISTENT_FILES_DIR):
@@ -646,7 +650,7 @@ if files_to_process:
             if file_extension in ['xlsx', 'xls']:
                 # Leer archivo Excel
                 try:
-                    df = pd.read_excel(uploaded_file, header=None)
+                    df = leer_excel(uploaded_file, header=None)
                 except Exception as e:
                     st.error(f"❌ Error al leer archivo Excel: {e}")
                     continue
@@ -842,14 +846,20 @@ if files_to_process:
                     # Remover comas (separadores de miles) y convertir a float
                     valor_limpio = valor_str.replace(',', '')
                     return float(valor_limpio)
-                except Exception as e:
-                    # Debug: mostrar el valor que no se pudo convertir
-                    print(f"Error convirtiendo valor: '{valor}' - Error: {e}")
+                except Exception:
                     return 0.0
             
             # Limpiar y convertir a número la columna 'Total de la venta' antes de agrupar
             if columnas_buscadas['total de la venta'] in df_relevante.columns:
-                df_relevante[columnas_buscadas['total de la venta']] = df_relevante[columnas_buscadas['total de la venta']].apply(limpiar_numero_argentino)
+                # Los valores que no se pueden convertir se toman como 0 y se cuentan
+                # con la misma máscara para la advertencia
+                totales = df_relevante[columnas_buscadas['total de la venta']]
+                limpios = totales.astype(str).str.strip().str.replace('"', '', regex=False).str.replace(',', '', regex=False)
+                numeros = pd.to_numeric(limpios, errors='coerce')
+                no_numericos = int((numeros.isna() & totales.notna() & (limpios != '')).sum())
+                df_relevante[columnas_buscadas['total de la venta']] = numeros.fillna(0.0).astype(float)
+                if no_numericos:
+                    st.warning(f"⚠️ {uploaded_file.name}: {no_numericos} valores de 'Total de la venta' no numéricos se tomaron como 0")
             # ---
             # Agrupar por número de venta y tomar el primer valor de 'Total de la venta' (no sumarlo)
             numero_venta_col = columnas_buscadas['número de venta']
@@ -911,7 +921,7 @@ if files_to_process:
         # Formatear fecha de venta (eliminar hora)
         if 'Fecha de venta' in ventas_unicas_renombradas.columns:
             try:
-                ventas_unicas_renombradas['Fecha de venta'] = pd.to_datetime(ventas_unicas_renombradas['Fecha de venta']).dt.strftime('%d/%m/%Y')
+                ventas_unicas_renombradas['Fecha de venta'] = parsear_fechas_ml(ventas_unicas_renombradas['Fecha de venta']).dt.strftime('%d/%m/%Y')
             except:
                 pass
         
@@ -981,7 +991,7 @@ if files_to_process:
                 product_costs_extension = product_costs_to_process.name.lower().split('.')[-1]
                 
                 if product_costs_extension in ['xlsx', 'xls']:
-                    df_product_costs = pd.read_excel(product_costs_to_process)
+                    df_product_costs = leer_excel(product_costs_to_process)
                 else:
                     df_product_costs = pd.read_csv(product_costs_to_process)
                 
@@ -1048,7 +1058,7 @@ if files_to_process:
                 # Detectar el tipo de archivo
                 costs_file_extension = uploaded_file.name.lower().split('.')[-1]
                 if costs_file_extension in ['xlsx', 'xls']:
-                    df_preview = pd.read_excel(uploaded_file, header=None)
+                    df_preview = leer_excel(uploaded_file, header=None, nrows=50)
                     header_row = None
                     # Buscar más abajo en el archivo (hasta la fila 50)
                     for i, row in df_preview.head(50).iterrows():
@@ -1061,7 +1071,7 @@ if files_to_process:
                         st.write(f"Primeras filas detectadas:\n{df_preview.head(20)}")
                         st.stop()
                     uploaded_file.seek(0)
-                    df_costs = pd.read_excel(uploaded_file, header=header_row)
+                    df_costs = leer_excel(uploaded_file, header=header_row)
                 else:
                     df_costs = pd.read_csv(uploaded_file)
                 df_costs.columns = df_costs.columns.str.strip().str.lower()
@@ -1158,7 +1168,7 @@ if files_to_process:
                     df_desc = df_desc.rename(columns=rename_desc)
                     # Formatear fecha de venta sin hora
                     if 'Fecha de venta' in df_desc.columns:
-                        df_desc['Fecha de venta'] = pd.to_datetime(df_desc['Fecha de venta'], errors='coerce').dt.strftime('%d/%m/%Y')
+                        df_desc['Fecha de venta'] = parsear_fechas_ml(df_desc['Fecha de venta']).dt.strftime('%d/%m/%Y')
                     # Unir descriptivos usando solo las claves que existen en ambos DataFrames
                     claves_merge = [col for col in ['Número de venta', 'Número de paquete'] if col in df_pivot.columns and col in df_desc.columns]
                     if claves_merge:
@@ -178,358 +178,38 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# ==================== CLASES DE DATOS ====================
-
-class Categoria:
-    def __init__(self, id: str, nombre: str, comision_pct: float, 
-                 vigente_desde: date = None, vigente_hasta: date = None):
-        self.id = id
-        self.nombre = nombre
-        self.comision_pct = comision_pct
-        self.vigente_desde = vigente_desde
-        self.vigente_hasta = vigente_hasta
-
-class RangoPrecio:
-    def __init__(self, id: str, moneda: str, min_precio: float, max_precio: float,
-                 costo_fijo: float, vigente_desde: date = None, vigente_hasta: date = None):
-        self.id = id
-        self.moneda = moneda
-        self.min_precio = min_precio
-        self.max_precio = max_precio
-        self.costo_fijo = costo_fijo
-        self.vigente_desde = vigente_desde
-        self.vigente_hasta = vigente_hasta
-
-class BandaEnvio:
-    def __init__(self, id: str, regimen: str, peso_min_kg: float, peso_max_kg: float,
-                 costo_envio_ars: float, subsidio_vendedor_pct: float = 0,
-                 subsidio_vendedor_monto: float = 0, volumetrico_factor: float = None,
-                 zona: str = "nacional", vigente_desde: date = None, vigente_hasta: date = None):
-        self.id = id
-        self.regimen = regimen
-        self.peso_min_kg = peso_min_kg
-        self.peso_max_kg = peso_max_kg
-        self.costo_envio_ars = costo_envio_ars
-        self.subsidio_vendedor_pct = subsidio_vendedor_pct
-        self.subsidio_vendedor_monto = subsidio_vendedor_monto
-        self.volumetrico_factor = volumetrico_factor
-        self.zona = zona
-        self.vigente_desde = vigente_desde
-        self.vigente_hasta = vigente_hasta
-
-class Variante:
-    def __init__(self, variant_id: str, sku: str, titulo: str, categoria_id: str,
-                 costo_unitario_usd: float, peso_kg: float,
-                 largo_cm: float = 0, ancho_cm: float = 0, alto_cm: float = 0,
-                 atributos: Dict = None):
-        self.variant_id = variant_id
-        self.sku = sku
-        self.titulo = titulo
-        self.categoria_id = categoria_id
-        self.costo_unitario_usd = costo_unitario_usd
-        self.peso_kg = peso_kg
-        self.largo_cm = largo_cm
-        self.ancho_cm = ancho_cm
-        self.alto_cm = alto_cm
-        self.atributos = atributos or {}
-
-# ==================== CONFIGURACIONES POR DEFECTO ====================
-
-def get_categorias_default() -> List[Categoria]:
-    """Categorías con comisiones REALES de MercadoLibre Argentina 2024-2025 (promedio nacional 11.8% - 17.14%)"""
-    return [
-        # Comisiones basadas en el rango real de Argentina (ajustadas por provincia)
-        # Usando valores promedio nacionales más representativos
-        Categoria("MLA1055", "Electrónica, Audio y Video", 0.1585),  # ~15.85% promedio
-        Categoria("MLA1648", "Computación", 0.1520),  # ~15.20% promedio 
-        Categoria("MLA1039", "Cámaras y Accesorios", 0.1565),  # ~15.65% promedio
-        Categoria("MLA1051", "Celulares y Teléfonos", 0.1620),  # ~16.20% promedio (categoría alta)
-        Categoria("MLA1276", "Deportes y Fitness", 0.1380),  # ~13.80% promedio
-        Categoria("MLA1430", "Ropa y Accesorios", 0.1320),   # ~13.20% promedio
-        Categoria("MLA1367", "Hogar, Muebles y Jardín", 0.1420),  # ~14.20% promedio
-        Categoria("MLA1071", "Animales y Mascotas", 0.1450),  # ~14.50% promedio
-        Categoria("MLA1132", "Juegos y Juguetes", 0.1480),   # ~14.80% promedio
-        Categoria("MLA1168", "Música, Películas y Series", 0.1350),  # ~13.50% promedio
-        Categoria("MLA1182", "Herramientas", 0.1440),   # ~14.40% promedio
-        Categoria("MLA1196", "Electrodomésticos", 0.1550),  # ~15.50% promedio
-        Categoria("MLA1000", "Supermercado", 0.1680),   # ~16.80% (sin costos fijos adicionales)
-        Categoria("MLA1499", "Industrias y Oficinas", 0.1290),  # ~12.90% promedio B2B
-        Categoria("MLA1953", "Servicios", 0.1250),   # ~12.50% promedio servicios
-        # Nuevas categorías específicas de Argentina
-        Categoria("MLA1743", "Autos, Motos y Otros", 0.1180),  # ~11.80% mínima
-        Categoria("MLA1540", "Inmuebles", 0.1200),  # ~12.00% inmuebles
-        Categoria("MLA1953", "Arte y Entretenimiento", 0.1380),  # ~13.80%
-    ]
-
-def get_rangos_precio_default() -> List[RangoPrecio]:
-    """Rangos de precio con costos fijos OFICIALES de MercadoLibre Argentina 2024-2025"""
-    return [
-        # Costos fijos OFICIALES según información de MercadoLibre Argentina
-        # Fuente: https://www.mercadolibre.com.ar/ayuda/Cargos-por-vender-productos_870
-        RangoPrecio("R1", "ARS", 1000, 14999, 1095),    # $1k-$15k: $1.095 por unidad vendida
-        RangoPrecio("R2", "ARS", 15000, 24999, 2190),   # $15k-$25k: $2.190 por unidad vendida
-        RangoPrecio("R3", "ARS", 25000, 32999, 2628),   # $25k-$33k: $2.628 por unidad vendida
-        RangoPrecio("R4", "ARS", 33000, 49999, 0),      # $33k-$50k: Sin costo fijo
-        RangoPrecio("R5", "ARS", 50000, 99999, 0),      # $50k-$100k: Sin costo fijo
-        RangoPrecio("R6", "ARS", 100000, 199999, 0),    # $100k-$200k: Sin costo fijo
-        RangoPrecio("R7", "ARS", 200000, 499999, 0),    # $200k-$500k: Sin costo fijo
-        RangoPrecio("R8", "ARS", 500000, 999999, 0),    # $500k-$1M: Sin costo fijo
-        RangoPrecio("R9", "ARS", 1000000, float('inf'), 0),  # +$1M: Sin costo fijo
-        # NOTA: Productos de supermercado Full Súper NO pagan costo fijo, pero sí pagan 3 puntos porcentuales adicionales
-    ]
-
-def get_bandas_envio_default() -> List[BandaEnvio]:
-    """Bandas de envío OFICIALES MercadoLibre Argentina 2024-2025 - MercadoLíder Platinum"""
-    bandas = []
-    
-    # MercadoEnvíos - Tarifas OFICIALES Argentina con descuento Platinum 50%
-    # Fuente: Información oficial de MercadoLibre Argentina - Costos de envío actualizados
-    # MercadoLíder Platinum: 50% descuento en envíos para productos >= $33k
-    # Todos los métodos de envío (Full, Flex) tienen el mismo costo base
-    bandas.extend([
-        BandaEnvio("E1", "envio", 0, 0.3, 5304, zona="nacional"),       # Hasta 0,3 kg - $5.304 (50% descuento)
-        BandaEnvio("E2", "envio", 0.3, 0.5, 5736, zona="nacional"),     # De 0,3 a 0,5 kg - $5.736 (50% descuento)
-        BandaEnvio("E3", "envio", 0.5, 1.0, 6431, zona="nacional"),     # De 0,5 a 1 kg - $6.431 (50% descuento)
-        BandaEnvio("E4", "envio", 1.0, 2.0, 6862, zona="nacional"),     # De 1 a 2 kg - $6.862 (50% descuento)
-        BandaEnvio("E5", "envio", 2.0, 5.0, 9127, zona="nacional"),     # De 2 a 5 kg - $9.127 (50% descuento)
-        BandaEnvio("E6", "envio", 5.0, 10.0, 10840, zona="nacional"),   # De 5 a 10 kg - $10.840 (50% descuento)
-        BandaEnvio("E7", "envio", 10.0, 15.0, 12544, zona="nacional"),  # De 10 a 15 kg - $12.544 (50% descuento)
-        BandaEnvio("E8", "envio", 15.0, 20.0, 14985.5, zona="nacional"), # De 15 a 20 kg - $14.985,50 (50% descuento)
-        BandaEnvio("E9", "envio", 20.0, 25.0, 17879.5, zona="nacional"), # De 20 a 25 kg - $17.879,50 (50% descuento)
-        BandaEnvio("E10", "envio", 25.0, 30.0, 24540.5, zona="nacional"), # De 25 a 30 kg - $24.540,50 (50% descuento)
-        BandaEnvio("E11", "envio", 30.0, 40.0, 28015.5, zona="nacional"), # De 30 a 40 kg - $28.015,50 (50% descuento)
-        BandaEnvio("E12", "envio", 40.0, 50.0, 29473, zona="nacional"),  # De 40 a 50 kg - $29.473 (50% descuento)
-        BandaEnvio("E13", "envio", 50.0, 60.0, 32747.5, zona="nacional"), # De 50 a 60 kg - $32.747,50 (50% descuento)
-        BandaEnvio("E14", "envio", 60.0, 70.0, 34057, zona="nacional"),  # De 60 a 70 kg - $34.057 (50% descuento)
-        BandaEnvio("E15", "envio", 70.0, 80.0, 39379, zona="nacional"),  # De 70 a 80 kg - $39.379 (50% descuento)
-        BandaEnvio("E16", "envio", 80.0, 90.0, 48691.5, zona="nacional"), # De 80 a 90 kg - $48.691,50 (50% descuento)
-        BandaEnvio("E17", "envio", 90.0, 100.0, 56150.5, zona="nacional"), # De 90 a 100 kg - $56.150,50 (50% descuento)
-        BandaEnvio("E18", "envio", 100.0, 120.0, 61301.5, zona="nacional"), # De 100 a 120 kg - $61.301,50 (50% descuento)
-        BandaEnvio("E19", "envio", 120.0, 140.0, 69029, zona="nacional"),  # De 120 a 140 kg - $69.029 (50% descuento)
-        BandaEnvio("E20", "envio", 140.0, 160.0, 76755.5, zona="nacional"), # De 140 a 160 kg - $76.755,50 (50% descuento)
-        BandaEnvio("E21", "envio", 160.0, 180.0, 84482.5, zona="nacional"), # De 160 a 180 kg - $84.482,50 (50% descuento)
-        BandaEnvio("E22", "envio", 180.0, float('inf'), 92210, zona="nacional"), # Más de 180 kg - $92.210 (50% descuento)
-    ])
-    
-    return bandas
-
-def get_variantes_ejemplo() -> List[Variante]:
-    """Variantes de ejemplo realistas para MercadoLíder Platinum"""
-    return [
-        # Celulares - Alta comisión pero alto volumen
-        Variante("V1", "IPHONE15-BLK-128", "iPhone 15 128GB Negro", "MLA1051", 
-                850.0, 0.2, 14.7, 7.1, 0.8),
-        Variante("V2", "SAMSUNG-S24-WHT-256", "Samsung Galaxy S24 256GB Blanco", "MLA1051",
-                720.0, 0.18, 14.6, 7.0, 0.8),
-        Variante("V3", "XIAOMI-13-BLU-128", "Xiaomi 13 128GB Azul", "MLA1051",
-                380.0, 0.19, 15.2, 7.4, 0.81),
-        
-        # Electrónica - Gama media/alta
-        Variante("V4", "AIRPODS-PRO-2", "AirPods Pro 2da Gen", "MLA1055",
-                200.0, 0.06, 6.1, 4.5, 2.2),
-        Variante("V5", "SONY-WH1000XM5", "Sony WH-1000XM5 Headphones", "MLA1055",
-                280.0, 0.25, 25.4, 20.3, 7.6),
-        Variante("V6", "GOPRO-HERO12", "GoPro Hero 12 Black", "MLA1039",
-                420.0, 0.15, 7.1, 5.5, 3.3),
-        
-        # Computación - Alto valor
-        Variante("V7", "MACBOOK-AIR-M3", "MacBook Air M3 13'' 256GB", "MLA1648",
-                1200.0, 1.24, 30.4, 21.5, 1.1),
-        Variante("V8", "LENOVO-LEGION-5", "Lenovo Legion 5 Gaming Laptop", "MLA1648",
-                850.0, 2.3, 36.2, 26.0, 2.4),
-        
-        # Gaming - Volumen medio
-        Variante("V9", "PLAYSTATION5-STD", "PlayStation 5 Standard Edition", "MLA1132",
-                450.0, 4.5, 39.0, 10.4, 26.0),
-        Variante("V10", "NINTENDO-SWITCH-OLED", "Nintendo Switch OLED", "MLA1132",
-                280.0, 0.42, 24.2, 10.6, 1.4),
-        
-        # Electrodomésticos - Peso y volumen altos
-        Variante("V11", "PHILIPS-AIRFRYER-XL", "Philips Airfryer XXL 7.3L", "MLA1196",
-                180.0, 5.8, 31.5, 40.3, 36.8),
-        Variante("V12", "SAMSUNG-TV-55-4K", "Samsung Smart TV 55'' 4K", "MLA1055",
-                520.0, 18.5, 123.2, 70.8, 8.1),
-        
-        # Ropa - Comisión mínima, alto volumen
-        Variante("V13", "NIKE-AIR-MAX-270", "Nike Air Max 270 Running", "MLA1430",
-                85.0, 0.8, 33.0, 20.5, 12.0),
-        Variante("V14", "ADIDAS-ULTRABOOST-22", "Adidas Ultraboost 22", "MLA1430",
-                140.0, 0.9, 34.2, 21.0, 12.5),
-        
-        # Hogar - Variedad de pesos
-        Variante("V15", "DYSON-V15-DETECT", "Dyson V15 Detect Absolute", "MLA1367",
-                480.0, 3.1, 126.0, 25.0, 25.0),
-    ]
-
-# ==================== FUNCIONES DE BÚSQUEDA ====================
-
-def buscar_categoria(categorias: List[Categoria], categoria_id: str) -> Optional[Categoria]:
-    """Busca una categoría por ID"""
-    for cat in categorias:
-        if cat.id == categoria_id:
-            return cat
-    return None
-
-def buscar_rango_precio(rangos: List[RangoPrecio], precio: float, moneda: str = "ARS") -> Optional[RangoPrecio]:
-    """Busca el rango de precio que corresponde al precio dado"""
-    for rango in rangos:
-        if (rango.moneda == moneda and 
-            rango.min_precio <= precio <= rango.max_precio):
-            return rango
-    return None
-
-def buscar_banda_envio(bandas: List[BandaEnvio], regimen: str, peso_kg: float, 
-                      zona: str = "nacional") -> Optional[BandaEnvio]:
-    """Busca la banda de envío que corresponde al peso (todos los regímenes tienen el mismo costo)"""
-    for banda in bandas:
-        if (banda.zona == zona and
-            banda.peso_min_kg <= peso_kg <= banda.peso_max_kg):
-            return banda
-    return None
-
-def calcular_peso_facturable(variante: Variante, volumetrico_factor: float = None) -> float:
-    """Calcula el peso facturable considerando peso volumétrico"""
-    peso_real = variante.peso_kg
-    
-    if volumetrico_factor and variante.largo_cm and variante.ancho_cm and variante.alto_cm:
-        volumen_cm3 = variante.largo_cm * variante.ancho_cm * variante.alto_cm
-        peso_volumetrico = volumen_cm3 / volumetrico_factor / 1000  # convertir a kg
-        return max(peso_real, peso_volumetrico)
-    
-    return peso_real
-
-# ==================== SOLVER DE PRECIOS ====================
-
-def calcular_costo_envio_vendedor(banda: BandaEnvio, precio_producto: float = 0) -> float:
-    """Calcula el costo de envío que asume el vendedor con beneficios Platinum automáticos"""
-    costo_base = banda.costo_envio_ars
-    
-    # Beneficio MercadoLíder Platinum: 50% descuento en envíos para productos desde $33k
-    # (Los precios ya tienen el descuento aplicado)
-    if precio_producto >= 33000:
-        # El descuento ya está aplicado en las tarifas, no hacer nada adicional
-        pass
-    
-    # Aplicar subsidio adicional del vendedor si existe
-    if banda.subsidio_vendedor_monto > 0:
-        return banda.subsidio_vendedor_monto
-    else:
-        return costo_base * banda.subsidio_vendedor_pct
-
-def calcular_impuestos_sobre_precio(precio: float, iva_pct: float = 0, 
-                                   iibb_pct: float = 0, pais_pct: float = 0) -> float:
-    """Calcula impuestos aplicados sobre el precio de venta"""
-    return precio * (iva_pct + iibb_pct + pais_pct) / 100
-
-def ganancia_neta(precio: float, costo_ars: float, categoria: Categoria,
-                 rango: RangoPrecio, envio_vendedor: float,
-                 iva_pct: float = 0, iibb_pct: float = 0, pais_pct: float = 0) -> float:
-    """Calcula la ganancia neta para un precio dado"""
-    comision_variable = precio * categoria.comision_pct
-    costo_fijo = rango.costo_fijo if rango else 0
-    impuestos = calcular_impuestos_sobre_precio(precio, iva_pct, iibb_pct, pais_pct)
-    
-    return precio - comision_variable - costo_fijo - envio_vendedor - impuestos - costo_ars
-
-def solver_precio_optimo(costo_ars: float, margen_objetivo: float, 
-                        categoria: Categoria, rangos: List[RangoPrecio],
-                        envio_vendedor: float, iva_pct: float = 0,
-                        iibb_pct: float = 0, pais_pct: float = 0,
-                        es_margen_pct: bool = False, max_iter: int = 100,
-                        tolerancia: float = 0.01) -> Tuple[float, Dict]:
-    """
-    Solver iterativo para encontrar el precio óptimo.
-    Retorna (precio_optimo, desglose_detallado)
-    """
-    
-    # Estimación inicial
-    factor_inicial = 1.0 + (categoria.comision_pct if categoria else 0.13) + 0.1  # +10% buffer
-    precio = (costo_ars + envio_vendedor + margen_objetivo) * factor_inicial
-    
-    precio_anterior = 0
-    iteracion = 0
-    
-    while iteracion < max_iter and abs(precio - precio_anterior) > tolerancia:
-        precio_anterior = precio
-        
-        # Buscar rango actual
-        rango_actual = buscar_rango_precio(rangos, precio)
-        
-        # Calcular ganancia actual
-        ganancia_actual = ganancia_neta(precio, costo_ars, categoria, rango_actual,
-                                      envio_vendedor, iva_pct, iibb_pct, pais_pct)
-        
-        # Calcular error
-        if es_margen_pct:
-            margen_actual_pct = (ganancia_actual / precio) * 100 if precio > 0 else 0
-            error = margen_actual_pct - margen_objetivo
-            # Ajustar precio basado en diferencia porcentual
-            if abs(error) > tolerancia:
-                factor_ajuste = 1 + (error / 100)
-                precio = precio * factor_ajuste
-        else:
-            error = ganancia_actual - margen_objetivo
-            # Ajustar precio basado en diferencia absoluta
-            if abs(error) > tolerancia:
-                # Usar método de Newton simplificado
-                derivada = 1 - (categoria.comision_pct if categoria else 0.13) - (iva_pct + iibb_pct + pais_pct) / 100
-                if derivada != 0:
-                    precio = precio - error / derivada
-                else:
-                    precio = precio + error  # fallback simple
-        
-        iteracion += 1
-    
-    # Calcular desglose final
-    rango_final = buscar_rango_precio(rangos, precio)
-    ganancia_final = ganancia_neta(precio, costo_ars, categoria, rango_final,
-                                 envio_vendedor, iva_pct, iibb_pct, pais_pct)
-    
-    desglose = {
-        'precio_final': precio,
-        'costo_ars': costo_ars,
-        'comision_variable': precio * (categoria.comision_pct if categoria else 0),
-        'costo_fijo': rango_final.costo_fijo if rango_final else 0,
-        'envio_vendedor': envio_vendedor,
-        'impuestos_total': calcular_impuestos_sobre_precio(precio, iva_pct, iibb_pct, pais_pct),
-        'ganancia_neta': ganancia_final,
-        'margen_pct': (ganancia_final / precio * 100) if precio > 0 else 0,
-        'iteraciones': iteracion,
-        'categoria_aplicada': categoria.nombre if categoria else "N/A",
-        'rango_aplicado': f"${rango_final.min_precio:,.0f} - ${rango_final.max_precio:,.0f}" if rango_final else "N/A"
-    }
-    
-    return precio, desglose
+from calculadora_ml import (
+    Categoria, RangoPrecio, BandaEnvio, Variante,
+    get_categorias_default, get_rangos_precio_default, get_bandas_envio_default,
+    get_variantes_ejemplo, TablaTarifas, TablaVariantes, HistorialTarifas,
+    calcular_peso_facturable, calcular_costo_envio_vendedor, ganancia_neta,
+    solver_precio_optimo, aplicar_redondeo, preciar_catalogo, exportar_lista_precios,
+    superficie_sensibilidad, PARAMETROS_SENSIBILIDAD, VARIANTES_ML_CSV
+)
 
-def aplicar_redondeo(precio: float, regla: str) -> float:
-    """Aplica reglas de redondeo al precio"""
-    if regla == "sin_decimales":
-        return round(precio)
-    elif regla == "multiplo_10":
-        return round(precio / 10) * 10
-    elif regla == "multiplo_100":
-        return round(precio / 100) * 100
-    elif regla == "terminacion_990":
-        base = int(precio / 1000) * 1000
-        return base + 990 if precio > base + 500 else base - 10
-    else:
-        return precio
+# Productos calculados por la página de contenedor
+PRODUCTOS_CONTENEDOR_CSV = "productos_guardados.csv"
 
 # ==================== INICIALIZACIÓN DE DATOS ====================
 
+@st.cache_data(max_entries=4, show_spinner=False)
+def exportar_lista_cacheada(df_catalogo, formato):
+    """Archivo de la lista de precios; se arma una vez por catálogo y formato, no en cada rerun"""
+    return exportar_lista_precios(df_catalogo, formato)
+
 def inicializar_datos():
     """Inicializa los datos en session_state si no existen"""
-    if 'categorias' not in st.session_state:
-        st.session_state.categorias = get_categorias_default()
-    
-    if 'rangos_precio' not in st.session_state:
-        st.session_state.rangos_precio = get_rangos_precio_default()
+    # Historial de tarifas con fechas de vigencia (persistent_files/tarifas_ml.json)
+    if 'historial_tarifas' not in st.session_state:
+        st.session_state.historial_tarifas = HistorialTarifas.cargar()
     
-    if 'bandas_envio' not in st.session_state:
-        st.session_state.bandas_envio = get_bandas_envio_default()
+    # Tarifas compiladas vigentes hoy; se actualizan con la fecha elegida en la barra lateral
+    if 'tarifas' not in st.session_state:
+        st.session_state.tarifas = st.session_state.historial_tarifas.tarifas_al()
     
     if 'variantes' not in st.session_state:
-        st.session_state.variantes = get_variantes_ejemplo()
+        # Variantes importadas si existen; si no, las de ejemplo
+        st.session_state.variantes = TablaVariantes.cargar() or TablaVariantes.desde_variantes(get_variantes_ejemplo())
     
     # Parámetros por defecto
     if 'tc_ars_usd' not in st.session_state:
@@ -623,6 +303,15 @@ with st.sidebar:
     )
     st.session_state.pais_pct = pais
     
+    st.markdown("### 🗓️ Tarifas")
+    
+    fecha_tarifas = st.date_input(
+        "Tarifas vigentes al",
+        value=date.today(),
+        help="Usa las comisiones, costos fijos y envíos vigentes en esa fecha"
+    )
+    st.session_state.tarifas = st.session_state.historial_tarifas.tarifas_al(fecha_tarifas)
+    
     st.markdown("### 🎯 Configuración de Cálculo")
     
     regla_redondeo = st.selectbox(
@@ -632,12 +321,74 @@ with st.sidebar:
         help="Cómo redondear el precio final"
     )
 
+# Importar productos del contenedor como variantes
+with st.expander("📦 Importar Productos del Contenedor"):
+    st.markdown(f"Convierte los productos guardados en `{PRODUCTOS_CONTENEDOR_CSV}` en variantes para calcular sus precios.")
+    categorias_opciones = {f"{cat.nombre} ({cat.id})": cat.id for cat in st.session_state.tarifas.categorias}
+    categoria_importacion = st.selectbox(
+        "Categoría ML por defecto",
+        options=list(categorias_opciones.keys()),
+        help="Se usa para los productos sin columna 'Categoría ML'"
+    )
+    
+    col_imp1, col_imp2 = st.columns(2)
+    with col_imp1:
+        if st.button("📦 Importar Productos", use_container_width=True):
+            if not os.path.exists(PRODUCTOS_CONTENEDOR_CSV):
+                st.error("❌ No hay productos guardados en el contenedor")
+            else:
+                try:
+                    df_contenedor = pd.read_csv(PRODUCTOS_CONTENEDOR_CSV)
+                    variantes_importadas = TablaVariantes.desde_productos_contenedor(
+                        df_contenedor, categorias_opciones[categoria_importacion]
+                    )
+                    variantes_importadas.guardar()
+                    st.session_state.variantes = variantes_importadas
+                    st.session_state.lista_precios = None
+                    st.success(f"✅ {len(variantes_importadas)} productos importados")
+                except Exception as e:
+                    st.error(f"❌ Error importando productos: {str(e)}")
+    with col_imp2:
+        if st.button("↩️ Volver a Productos de Ejemplo", use_container_width=True):
+            if os.path.exists(VARIANTES_ML_CSV):
+                os.remove(VARIANTES_ML_CSV)
+            st.session_state.variantes = TablaVariantes.desde_variantes(get_variantes_ejemplo())
+            st.session_state.lista_precios = None
+            st.success("✅ Productos de ejemplo restaurados")
+
+# Cambios de comisión con fecha de vigencia (se guardan en el historial de tarifas)
+with st.expander("🗓️ Registrar Cambio de Comisión"):
+    st.markdown("La comisión anterior queda vigente hasta el día previo; el historial se usa también para recalcular las ventas del módulo de ganancias.")
+    col_com1, col_com2, col_com3 = st.columns(3)
+    with col_com1:
+        categoria_cambio = st.selectbox("Categoría", options=list(categorias_opciones.keys()), key="categoria_cambio")
+    with col_com2:
+        nueva_comision = st.number_input("Nueva comisión (%)", min_value=0.0, max_value=100.0, value=15.0, step=0.1)
+    with col_com3:
+        vigente_desde = st.date_input("Vigente desde", value=date.today())
+
+    if st.button("💾 Guardar Comisión", use_container_width=True):
+        try:
+            historial = st.session_state.historial_tarifas.con_comision(
+                categorias_opciones[categoria_cambio], nueva_comision / 100, vigente_desde
+            )
+            historial.guardar()
+            st.session_state.historial_tarifas = historial
+            st.session_state.tarifas = historial.tarifas_al(fecha_tarifas)
+            st.session_state.lista_precios = None
+            st.success(f"✅ Comisión de {categoria_cambio} guardada: {nueva_comision:.2f}% desde {vigente_desde:%d/%m/%Y}")
+        except Exception as e:
+            st.error(f"❌ Error guardando la comisión: {str(e)}")
+
 # Área principal - Calculadora Simplificada
 st.markdown("## 🧮 Calculadora de Precio ML")
 
 # Selección rápida de producto
 st.markdown("### 📦 Producto")
-variantes_opciones = {f"{v.titulo} ({v.sku})": i for i, v in enumerate(st.session_state.variantes)}
+variantes_opciones = {
+    f"{titulo} ({sku})": i
+    for i, (titulo, sku) in enumerate(zip(st.session_state.variantes.titulo, st.session_state.variantes.sku))
+}
 variante_seleccionada_key = st.selectbox(
     "Seleccionar Producto",
     options=list(variantes_opciones.keys()),
@@ -714,7 +465,7 @@ st.markdown("---")
 if st.button("🚀 Calcular Precio", use_container_width=True, type="primary", help="Calcular precio óptimo para MercadoLibre"):
     try:
         # Validaciones rápidas
-        categoria = buscar_categoria(st.session_state.categorias, variante.categoria_id)
+        categoria = st.session_state.tarifas.buscar_categoria(variante.categoria_id)
         if not categoria:
             st.error(f"❌ Categoría {variante.categoria_id} no encontrada")
             st.stop()
@@ -723,14 +474,14 @@ if st.button("🚀 Calcular Precio", use_container_width=True, type="primary", h
         peso_facturable = calcular_peso_facturable(variante)
         
         # Buscar banda de envío (simplificado)
-        banda = buscar_banda_envio(st.session_state.bandas_envio, "envio", peso_facturable, "nacional")
+        banda = st.session_state.tarifas.buscar_banda_envio(peso_facturable, "nacional")
         if not banda:
             st.error(f"❌ No se encontró banda de envío para {peso_facturable}kg")
             st.stop()
         
         # Cálculos principales
         costo_ars = (variante.costo_unitario_usd * tc_ars_usd) + costos_extra
-        banda.subsidio_vendedor_pct = subsidio_envio
+        banda.subsidio_vendedor_pct = subsidio_envio / 100
         envio_vendedor = calcular_costo_envio_vendedor(banda)
         
         # Ejecutar solver
@@ -738,7 +489,7 @@ if st.button("🚀 Calcular Precio", use_container_width=True, type="primary", h
             costo_ars=costo_ars,
             margen_objetivo=margen_objetivo,
             categoria=categoria,
-            rangos=st.session_state.rangos_precio,
+            rangos=st.session_state.tarifas,
             envio_vendedor=envio_vendedor,
             iva_pct=iva_ventas,
             iibb_pct=iibb,
@@ -746,11 +497,11 @@ if st.button("🚀 Calcular Precio", use_container_width=True, type="primary", h
             es_margen_pct=es_margen_pct
         )
         
-        # Aplicar redondeo automático (sin decimales)
-        precio_final = aplicar_redondeo(precio_optimo, "sin_decimales")
+        # Aplicar la regla de redondeo elegida
+        precio_final = aplicar_redondeo(precio_optimo, regla_redondeo)
         
         # Recalcular ganancia final
-        rango_final = buscar_rango_precio(st.session_state.rangos_precio, precio_final)
+        rango_final = st.session_state.tarifas.buscar_rango_precio(precio_final)
         ganancia_final = ganancia_neta(precio_final, costo_ars, categoria, 
                                      rango_final, envio_vendedor, iva_ventas, iibb, pais)
         margen_final_pct = (ganancia_final / precio_final * 100) if precio_final > 0 else 0
@@ -812,6 +563,127 @@ if st.button("🚀 Calcular Precio", use_container_width=True, type="primary", h
     except Exception as e:
         st.error(f"Error en el cálculo: {str(e)}")
 
+# Precios de todo el catálogo con la misma configuración
+st.markdown("---")
+st.markdown("## 📚 Precios del Catálogo Completo")
+
+if st.button("📚 Calcular Todo el Catálogo", use_container_width=True,
+             help="Calcula el precio óptimo de todas las variantes a la vez"):
+    st.session_state.lista_precios = preciar_catalogo(
+        st.session_state.variantes,
+        st.session_state.tarifas,
+        tc_ars_usd=tc_ars_usd,
+        margen_objetivo=margen_objetivo,
+        es_margen_pct=es_margen_pct,
+        subsidio_envio_pct=subsidio_envio,
+        costos_extra=costos_extra,
+        iva_pct=iva_ventas,
+        iibb_pct=iibb,
+        pais_pct=pais,
+        regla_redondeo=regla_redondeo
+    )
+
+if st.session_state.get('lista_precios') is not None:
+    df_catalogo = st.session_state.lista_precios
+    sin_precio = df_catalogo['precio_final'].isna()
+    
+    st.dataframe(
+        df_catalogo[['sku', 'titulo', 'categoria_id', 'peso_facturable', 'banda_envio', 'costo_ars', 'precio_final',
+                     'comision_variable', 'costo_fijo', 'envio_vendedor', 'ganancia_neta', 'margen_pct', 'cumple_objetivo']],
+        use_container_width=True,
+        hide_index=True
+    )
+    if sin_precio.any():
+        st.warning(f"⚠️ {sin_precio.sum()} productos sin precio posible para el margen pedido (o sin categoría/banda de envío)")
+    else:
+        st.success(f"✅ {len(df_catalogo)} productos calculados")
+    no_cumplen = (~df_catalogo['cumple_objetivo'] & ~sin_precio).sum()
+    if no_cumplen:
+        st.info(f"ℹ️ {no_cumplen} productos quedan por debajo del objetivo después del redondeo")
+    no_positivos = (df_catalogo['precio_final'] <= 0).sum()
+    if no_positivos:
+        st.error(f"❌ {no_positivos} productos tienen precio menor o igual a 0; revísalos antes de exportar la lista")
+    
+    col_exp1, col_exp2 = st.columns(2)
+    fecha_archivo = datetime.now().strftime('%Y%m%d_%H%M')
+    with col_exp1:
+        st.download_button(
+            "📥 Descargar Excel",
+            data=exportar_lista_cacheada(df_catalogo, "excel"),
+            file_name=f"lista_precios_ml_{fecha_archivo}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True
+        )
+    with col_exp2:
+        st.download_button(
+            "📥 Descargar CSV",
+            data=exportar_lista_cacheada(df_catalogo, "csv"),
+            file_name=f"lista_precios_ml_{fecha_archivo}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+
+# Sensibilidad del precio para el producto seleccionado
+st.markdown("---")
+st.markdown("## 📈 Análisis de Sensibilidad")
+
+if variante_seleccionada_key:
+    valores_actuales = {
+        'tc_ars_usd': tc_ars_usd,
+        'margen_objetivo': margen_objetivo,
+        'subsidio_envio_pct': subsidio_envio,
+        'iibb_pct': iibb
+    }
+    nombres_parametros = list(PARAMETROS_SENSIBILIDAD.keys())
+    
+    col_sens1, col_sens2 = st.columns(2)
+    ejes = {}
+    for col_sens, eje, indice in ((col_sens1, "X", 0), (col_sens2, "Y", 1)):
+        with col_sens:
+            parametro = st.selectbox(
+                f"Eje {eje}",
+                nombres_parametros,
+                index=indice,
+                format_func=lambda clave: PARAMETROS_SENSIBILIDAD[clave],
+                key=f"sens-param-{eje}"
+            )
+            base = float(valores_actuales[parametro])
+            minimo = st.number_input(f"Desde ({eje})", value=base * 0.5, key=f"sens-min-{eje}-{parametro}")
+            maximo = st.number_input(f"Hasta ({eje})", value=base * 1.5 if base > 0 else 100.0, key=f"sens-max-{eje}-{parametro}")
+            pasos = st.slider(f"Puntos ({eje})", min_value=2, max_value=100, value=25, key=f"sens-pasos-{eje}")
+            ejes[eje] = (parametro, np.linspace(minimo, maximo, pasos))
+    
+    if ejes["X"][0] == ejes["Y"][0]:
+        st.warning("⚠️ Elige dos parámetros distintos para los ejes")
+    elif st.button("📈 Calcular Sensibilidad", use_container_width=True):
+        (param_x, valores_x), (param_y, valores_y) = ejes["X"], ejes["Y"]
+        precios, margenes = superficie_sensibilidad(
+            variante, st.session_state.tarifas,
+            param_x, valores_x, param_y, valores_y,
+            regla_redondeo=regla_redondeo,
+            tc_ars_usd=tc_ars_usd, margen_objetivo=margen_objetivo, es_margen_pct=es_margen_pct,
+            subsidio_envio_pct=subsidio_envio, costos_extra=costos_extra,
+            iva_pct=iva_ventas, iibb_pct=iibb, pais_pct=pais
+        )
+        etiquetas = dict(x=PARAMETROS_SENSIBILIDAD[param_x], y=PARAMETROS_SENSIBILIDAD[param_y])
+        
+        col_heat1, col_heat2 = st.columns(2)
+        with col_heat1:
+            fig_precio = px.imshow(
+                precios, x=valores_x, y=valores_y, origin='lower', aspect='auto',
+                labels={**etiquetas, 'color': "Precio (ARS)"},
+                title=f"💰 Precio - {variante.sku}", color_continuous_scale='Blues'
+            )
+            st.plotly_chart(fig_precio, use_container_width=True)
+        with col_heat2:
+            fig_margen = px.imshow(
+                margenes, x=valores_x, y=valores_y, origin='lower', aspect='auto',
+                labels={**etiquetas, 'color': "Margen (%)"},
+                title=f"📊 Margen Real - {variante.sku}", color_continuous_scale='RdYlGn'
+            )
+            st.plotly_chart(fig_margen, use_container_width=True)
+        st.caption(f"{precios.size} combinaciones calculadas en una sola pasada del solver")
+
 # Configuración simplificada en expander
 with st.expander("⚙️ Configuración Avanzada"):
     st.markdown("### 🔧 Parámetros del Sistema")
@@ -821,9 +693,9 @@ with st.expander("⚙️ Configuración Avanzada"):
     with col_adv1:
         st.info(f"""
         **💱 Tipo de Cambio:** ${tc_ars_usd:,.0f}
-        **🏷️ Categorías:** {len(st.session_state.categorias)}
-        **💰 Rangos Precio:** {len(st.session_state.rangos_precio)}
-        **🚚 Bandas Envío:** {len(st.session_state.bandas_envio)}
+        **🏷️ Categorías:** {len(st.session_state.tarifas.categorias)}
+        **💰 Rangos Precio:** {len(st.session_state.tarifas.rangos)}
+        **🚚 Bandas Envío:** {len(st.session_state.tarifas.bandas)}
         """)
     
     with col_adv2:
@@ -1,80 +1,52 @@
 import pandas as pd
 import numpy as np
-import re
+
+from lector_excel import leer_excel
+from encabezados_proveedores import (
+    ALIAS_CAMPOS, detectar_encabezados, numeros_desde_texto, contar_numeros_producto
+)
+from tipos_cambio import MONEDA_BASE, MONEDA_PROVEEDOR, detectar_moneda, monedas_desde_texto, convertir_a_usd
+from trazas import en_etapa, contar, evento, ETAPA_DETECCION, ETAPA_EXTRACCION, ETAPA_NORMALIZACION
 
 class ProcesadorArchivosProveedores:
     def __init__(self):
-        self.patrones_campos = {
-            'nombre': [
-                r'商品', r'product', r'item', r'name', r'description', r'desc',
-                r'产品', r'名称', r'品名', r'商品名称', r'product name', r'item name'
-            ],
-            'sku': [
-                r'sku', r'item no', r'item number', r'code', r'编号', r'货号',
-                r'product code', r'item code', r'商品编号', r'产品编号'
-            ],
-            'cantidad': [
-                r'quantity', r'qty', r'amount', r'数量', r'件数', r'数量',
-                r'pcs', r'pieces', r'carton', r'box', r'箱数', r'箱'
-            ],
-            'precio': [
-                r'price', r'cost', r'单价', r'价格', r'cost price', r'unit price',
-                r'price per', r'price/pc', r'price per piece', r'价格/件'
-            ],
-            'cbm': [
-                r'cbm', r'volume', r'体积', r'总体积', r'cubic', r'm3',
-                r'cubic meter', r'volume m3', r'体积（m3）', r'总体积（m3）'
-            ],
-            'peso': [
-                r'weight', r'g.w.', r'gross weight', r'重量', r'毛重', r'kg',
-                r'weight kg', r'gross weight kg', r'总毛重（kg）', r'重量（kg）'
-            ]
-        }
+        self.patrones_campos = ALIAS_CAMPOS
     
+    @en_etapa(ETAPA_DETECCION)
     def detectar_estructura_archivo(self, df):
         """Detecta automáticamente la estructura del archivo de proveedor"""
-        print("🔍 Analizando estructura del archivo...")
-        
-        # Buscar encabezados de tabla
-        encabezados_encontrados = {}
-        fila_encabezados = None
+        evento("🔍 Analizando estructura del archivo...")
         
-        for i in range(min(20, len(df))):  # Buscar en primeras 20 filas
-            fila = df.iloc[i]
-            for j, valor in enumerate(fila):
-                if pd.notna(valor):
-                    valor_str = str(valor).lower()
-                    
-                    # Buscar patrones de encabezados
-                    for campo, patrones in self.patrones_campos.items():
-                        for patron in patrones:
-                            if patron in valor_str:
-                                encabezados_encontrados[campo] = j
-                                fila_encabezados = i
-                                print(f"✅ Encontrado {campo} en columna {j}: '{valor}'")
-                                break
-                        if campo in encabezados_encontrados:
-                            break
-        
-        # Si no se encontraron encabezados, verificar si es un archivo simple
-        if not encabezados_encontrados:
-            # Verificar si el archivo tiene columnas estándar
-            columnas_estandar = ['Nombre', 'Cantidad por Carton', 'Precio En USD', 'CBM', 'GW']
-            if all(col in df.columns for col in columnas_estandar):
-                print("🔧 Archivo con formato estándar detectado...")
-                encabezados_encontrados = {
-                    'nombre': 'Nombre',
-                    'cantidad': 'Cantidad por Carton',
-                    'precio': 'Precio En USD',
-                    'cbm': 'CBM',
-                    'peso': 'GW'
-                }
-                # Agregar SKU solo si existe
-                if 'SKU' in df.columns:
-                    encabezados_encontrados['sku'] = 'SKU'
-                fila_encabezados = 0  # Los datos empiezan desde la primera fila
-            else:
-                print("🔧 Usando estructura conocida para archivos de proveedores chinos...")
+        columnas_estandar = ['Nombre', 'Cantidad por Carton', 'Precio En USD', 'CBM', 'GW']
+        if all(col in df.columns for col in columnas_estandar):
+            evento("🔧 Archivo con formato estándar detectado...")
+            encabezados_encontrados = {
+                'nombre': 'Nombre',
+                'cantidad': 'Cantidad por Carton',
+                'precio': 'Precio En USD',
+                'cbm': 'CBM',
+                'peso': 'GW'
+            }
+            # Agregar SKU solo si existe
+            if 'SKU' in df.columns:
+                encabezados_encontrados['sku'] = 'SKU'
+            fila_encabezados = -1  # Los datos empiezan desde la primera fila
+            moneda = MONEDA_BASE
+        else:
+            # Buscar encabezados de tabla (fila -1 = nombres de columnas)
+            fila_encabezados, encabezados_encontrados = detectar_encabezados(df, filas=20)
+            for campo, columna in encabezados_encontrados.items():
+                evento("✅ Encontrado %s en columna %s", campo, columna)
+            
+            # Moneda indicada en el encabezado de precio ('Price USD', '单价(元)')
+            moneda = MONEDA_BASE
+            if 'precio' in encabezados_encontrados:
+                columna = encabezados_encontrados['precio']
+                encabezado = df.columns[columna] if fila_encabezados < 0 else df.iloc[fila_encabezados, columna]
+                moneda = detectar_moneda(encabezado, MONEDA_BASE)
+            
+            if not encabezados_encontrados:
+                evento("🔧 Usando estructura conocida para archivos de proveedores chinos...")
                 # Estructura típica de archivos chinos
                 encabezados_encontrados = {
                     'sku': 1,      # Columna 1: SKU/Código
@@ -85,122 +57,96 @@ class ProcesadorArchivosProveedores:
                     'peso': 9      # Columna 9: G.W.
                 }
                 fila_encabezados = 4  # Fila 4 contiene los encabezados
+                moneda = MONEDA_PROVEEDOR
         
-        print(f"📋 Fila de encabezados: {fila_encabezados}")
+        evento("📋 Fila de encabezados: %s", fila_encabezados)
         return {
             'encabezados': encabezados_encontrados,
             'fila_encabezados': fila_encabezados,
+            'moneda': moneda,
             'datos_inicio': fila_encabezados + 1 if fila_encabezados is not None else 0
         }
     
+    @en_etapa(ETAPA_EXTRACCION)
     def extraer_datos_productos(self, df, estructura):
-        """Extrae los datos de productos basándose en la estructura detectada"""
+        """Extrae los datos de productos basándose en la estructura detectada.
+        
+        Retorna un DataFrame con una columna por campo (valores sin normalizar).
+        """
         if not estructura:
             return None
         
-        productos = []
         encabezados = estructura['encabezados']
-        inicio_datos = estructura['datos_inicio']
+        datos = df.iloc[max(estructura['datos_inicio'], 0):]
         
-        print(f"📦 Extrayendo datos desde fila {inicio_datos}...")
+        evento("📦 Extrayendo datos desde fila %s...", estructura['datos_inicio'])
         
-        for i in range(inicio_datos, len(df)):
-            fila = df.iloc[i]
-            producto = {}
-            
-            # Extraer datos según los encabezados encontrados
-            for campo, col_ref in encabezados.items():
-                if isinstance(col_ref, int):
-                    # Índice numérico (para archivos chinos)
-                    valor = fila.iloc[col_ref]
-                else:
-                    # Nombre de columna (para archivos estándar)
-                    valor = fila[col_ref]
-                
-                if pd.notna(valor):
-                    producto[campo] = valor
-            
-            # Validar que sea una fila de producto válida
-            # Debe tener al menos nombre y algún dato numérico
-            if ('nombre' in producto and 
-                len(producto) > 1 and 
-                self._es_fila_producto_valida(fila)):
-                productos.append(producto)
+        # Índice numérico (archivos chinos) o nombre de columna (archivos estándar)
+        productos = pd.DataFrame({
+            campo: datos.iloc[:, col_ref] if isinstance(col_ref, int) else datos[col_ref]
+            for campo, col_ref in encabezados.items()
+            if (col_ref < datos.shape[1] if isinstance(col_ref, int) else col_ref in datos.columns)
+        }, index=datos.index)
         
-        print(f"✅ Extraídos {len(productos)} productos")
+        # Fila de producto: nombre, algún otro dato y al menos 3 números en el rango de datos
+        if 'nombre' not in productos.columns:
+            return productos.iloc[0:0]
+        valida = (productos['nombre'].notna() &
+                  (productos.notna().sum(axis=1) > 1) &
+                  (contar_numeros_producto(datos) >= 3))
+        contar('filas_conservadas', valida.sum())
+        contar('filas_descartadas', len(valida) - valida.sum())
+        productos = productos[valida]
+        
+        evento("✅ Extraídos %s productos", len(productos), nivel='info')
         return productos
     
-    def _es_fila_producto_valida(self, fila):
-        """Verifica si una fila contiene datos válidos de producto"""
-        # Debe tener al menos un número en las columnas de datos
-        numeros_encontrados = 0
-        for valor in fila:
-            if pd.notna(valor):
-                try:
-                    num = float(str(valor))
-                    if 0 < num < 10000:  # Rango razonable para datos de producto
-                        numeros_encontrados += 1
-                except:
-                    pass
+    @en_etapa(ETAPA_NORMALIZACION)
+    def normalizar_datos(self, productos, moneda=MONEDA_BASE):
+        """Normaliza los datos extraídos al formato estándar (DataFrame tipado).
         
-        return numeros_encontrados >= 3  # Al menos 3 números para ser válida
-    
-    def normalizar_datos(self, productos):
-        """Normaliza los datos extraídos al formato estándar"""
-        productos_normalizados = []
+        moneda es la de los precios sin marca de moneda en la celda.
+        """
+        productos = pd.DataFrame(productos).reset_index(drop=True)
         
-        for producto in productos:
-            normalizado = {
-                'Nombre': producto.get('nombre', 'Producto Sin Nombre'),
-                'SKU': producto.get('sku', f'SKU{len(productos_normalizados)+1:03d}'),
-                'Cantidad por Carton': self._extraer_numero(producto.get('cantidad', 1)),
-                'Precio En USD': self._extraer_precio(producto.get('precio', 0)),
-                'CBM': self._extraer_numero(producto.get('cbm', 0)),
-                'GW': self._extraer_numero(producto.get('peso', 0))
-            }
-            
-            # Validar que tenga datos mínimos
-            if (normalizado['Cantidad por Carton'] > 0 and 
-                (normalizado['Precio En USD'] > 0 or normalizado['CBM'] > 0)):
-                productos_normalizados.append(normalizado)
+        def campo(nombre):
+            if nombre in productos.columns:
+                return productos[nombre]
+            return pd.Series(np.nan, index=productos.index, dtype=object)
         
-        return productos_normalizados
-    
-    def _extraer_numero(self, valor):
-        """Extrae un número de un valor que puede contener texto"""
-        if pd.isna(valor):
-            return 0
+        cantidad = numeros_desde_texto(campo('cantidad').fillna(1))
+        precio = numeros_desde_texto(campo('precio'))
+        cbm = numeros_desde_texto(campo('cbm'))
+        peso = numeros_desde_texto(campo('peso'))
         
-        valor_str = str(valor)
-        # Buscar números en el texto
-        numeros = re.findall(r'[\d,]+\.?\d*', valor_str)
-        if numeros:
-            try:
-                return float(numeros[0].replace(',', ''))
-            except:
-                return 0
-        return 0
-    
-    def _extraer_precio(self, valor):
-        """Extrae precio, manejando diferentes formatos"""
-        if pd.isna(valor):
-            return 0
+        # Precios convertidos a USD según la moneda de cada celda
+        precio = convertir_a_usd(precio, monedas_desde_texto(campo('precio'), moneda))
         
-        valor_str = str(valor).lower()
+        # Validar que tenga datos mínimos
+        valida = (cantidad > 0) & ((precio > 0) | (cbm > 0))
+        contar('filas_conservadas', valida.sum())
+        contar('filas_descartadas', len(valida) - valida.sum())
         
-        # Detectar si es RMB
-        if any(moneda in valor_str for moneda in ['rmb', '¥', '元', '人民币']):
-            precio = self._extraer_numero(valor)
-            return precio / 7.10  # Convertir RMB a USD
+        # SKU por defecto según la posición entre los productos válidos
+        posicion = valida.cumsum()
+        sku_default = 'SKU' + posicion.astype(str).str.zfill(3)
         
-        return self._extraer_numero(valor)
+        normalizados = pd.DataFrame({
+            'Nombre': campo('nombre').fillna('Producto Sin Nombre'),
+            'SKU': campo('sku').fillna(sku_default),
+            'Cantidad por Carton': cantidad,
+            'Precio En USD': precio,
+            'CBM': cbm,
+            'GW': peso
+        })
+        return normalizados[valida].reset_index(drop=True)
     
     def procesar_archivo(self, archivo_path):
         """Procesa un archivo de proveedor y retorna datos normalizados"""
         try:
-            df = pd.read_excel(archivo_path)
-            print(f"📄 Archivo cargado: {archivo_path}")
-            print(f"📊 Dimensiones: {df.shape}")
+            df = leer_excel(archivo_path)
+            evento("📄 Archivo cargado: %s", archivo_path)
+            evento("📊 Dimensiones: %s", df.shape)
             
             # Detectar estructura
             estructura = self.detectar_estructura_archivo(df)
@@ -209,17 +155,17 @@ class ProcesadorArchivosProveedores:
             
             # Extraer datos
             productos = self.extraer_datos_productos(df, estructura)
-            if not productos:
+            if productos is None or productos.empty:
                 return None
             
             # Normalizar datos
-            productos_normalizados = self.normalizar_datos(productos)
+            productos_normalizados = self.normalizar_datos(productos, estructura['moneda'])
             
-            print(f"🎯 Productos procesados: {len(productos_normalizados)}")
-            return productos_normalizados
+            evento("🎯 Productos procesados: %s", len(productos_normalizados), nivel='info')
+            return productos_normalizados.to_dict('records')
             
         except Exception as e:
-            print(f"❌ Error procesando archivo: {e}")
+            evento("❌ Error procesando archivo: %s", e, nivel='error')
             return None
 
 # Función de utilidad para usar en Streamlit
@@ -1,6 +1,15 @@
 import pandas as pd
 import numpy as np
-import re
+
+from lector_excel import leer_excel
+from encabezados_proveedores import (
+    detectar_encabezados, numeros_desde_texto, contar_numeros_producto,
+    textos_validos, codigos_como_texto, PATRON_TOTAL
+)
+from tipos_cambio import MONEDA_PROVEEDOR, detectar_moneda, monedas_desde_texto, convertir_a_usd
+from trazas import etapa, en_etapa, contar, evento, ETAPA_DETECCION, ETAPA_NORMALIZACION
+
+COLUMNAS_PRODUCTO = ['Nombre', 'SKU', 'Cantidad por Carton', 'Precio En USD', 'CBM', 'GW']
 
 class ProcesadorArchivosChinos:
     def __init__(self):
@@ -9,194 +18,149 @@ class ProcesadorArchivosChinos:
     def procesar_archivo(self, archivo_path):
         """Procesa archivos de proveedores chinos con estructura conocida"""
         try:
-            df = pd.read_excel(archivo_path)
-            print(f"📄 Archivo cargado: {archivo_path}")
-            print(f"📊 Dimensiones: {df.shape}")
+            df = leer_excel(archivo_path)
+            evento("📄 Archivo cargado: %s", archivo_path)
+            evento("📊 Dimensiones: %s", df.shape)
             
             # Buscar la fila que contiene los encabezados
-            fila_encabezados = self._encontrar_fila_encabezados(df)
+            fila_encabezados, mapeo = self._encontrar_encabezados(df)
             if fila_encabezados is None:
-                print("❌ No se encontraron encabezados")
+                evento("❌ No se encontraron encabezados", nivel='info')
                 return None
             
-            print(f"📋 Fila de encabezados encontrada: {fila_encabezados}")
+            evento("📋 Fila de encabezados encontrada: %s", fila_encabezados)
             
             # Extraer productos desde la fila siguiente
-            productos = self._extraer_productos(df, fila_encabezados + 1)
+            productos = self._extraer_productos(df, fila_encabezados + 1, mapeo).to_dict('records')
             
             if productos:
-                print(f"✅ Productos extraídos: {len(productos)}")
+                evento("✅ Productos extraídos: %s", len(productos), nivel='info')
                 return productos
             else:
-                print("❌ No se pudieron extraer productos")
+                evento("❌ No se pudieron extraer productos", nivel='info')
                 return None
                 
         except Exception as e:
-            print(f"❌ Error procesando archivo: {e}")
+            evento("❌ Error procesando archivo: %s", e, nivel='error')
             return None
     
-    def _encontrar_fila_encabezados(self, df):
-        """Encuentra la fila que contiene los encabezados de la tabla"""
-        for i in range(min(10, len(df))):
-            fila = df.iloc[i]
-            texto_fila = ' '.join([str(v) for v in fila if pd.notna(v)]).lower()
-            
-            # Buscar patrones que indiquen encabezados
-            if any(palabra in texto_fila for palabra in ['qty/ctn', 'price', 'cbm', 'g.w.', '装箱量', '价格', '体积', '重量']):
-                print(f"✅ Encabezados encontrados en fila {i}")
-                return i
-            
-            # Buscar patrones específicos de este archivo
-            if any(palabra in texto_fila for palabra in ['序号', 'item no', 'description', 'ctn', 'qty/ctn', 'price', 'cbm', 'g.w.']):
-                print(f"✅ Encabezados encontrados en fila {i}")
-                return i
-            
-            # También buscar patrones numéricos que indiquen datos de productos
-            # Si encontramos una fila con varios números, puede ser la primera fila de datos
-            numeros_en_fila = 0
-            for valor in fila:
-                if pd.notna(valor):
-                    try:
-                        num = float(str(valor))
-                        if 0 < num < 10000:  # Rango razonable
-                            numeros_en_fila += 1
-                    except:
-                        pass
-            
-            # Si hay suficientes números, puede ser la primera fila de datos
-            if numeros_en_fila >= 3:
-                print(f"✅ Primera fila de datos encontrada en fila {i}")
-                return i - 1  # La fila anterior sería la de encabezados
+    @en_etapa(ETAPA_DETECCION)
+    def _encontrar_encabezados(self, df):
+        """Encuentra la fila de encabezados (-1 si son los nombres de columnas) y el mapeo campo -> columna"""
+        fila, mapeo = detectar_encabezados(df, filas=15)
+        if fila is not None:
+            evento("✅ Encabezados encontrados en fila %s", fila)
+        return fila, mapeo
+    
+    def _extraer_productos(self, df, inicio_datos, mapeo=None):
+        """Extrae productos desde la fila especificada como DataFrame tipado.
         
-        # Si no encontramos patrones específicos, buscar la primera fila con datos numéricos
-        for i in range(min(15, len(df))):
-            fila = df.iloc[i]
-            numeros_en_fila = 0
-            texto_en_fila = 0
-            
-            for valor in fila:
-                if pd.notna(valor):
-                    try:
-                        num = float(str(valor))
-                        if 0 < num < 10000:
-                            numeros_en_fila += 1
-                    except:
-                        if isinstance(valor, str) and len(str(valor)) > 2:
-                            texto_en_fila += 1
-            
-            # Si hay una mezcla de números y texto, puede ser una fila de datos
-            if numeros_en_fila >= 2 and texto_en_fila >= 1:
-                print(f"✅ Fila de datos encontrada en fila {i}")
-                return i - 1  # La fila anterior sería la de encabezados
+        Con el mapeo de encabezados se toman las columnas detectadas; sin él
+        se clasifican los números de cada fila por su rango típico. Los precios
+        se convierten a USD según la moneda del encabezado o de cada celda
+        (RMB si no se indica). El índice del resultado es el de las filas de
+        origen en df.
+        """
+        datos = df.iloc[max(inicio_datos, 0):]
+        if datos.empty or datos.shape[1] == 0:
+            return pd.DataFrame(columns=COLUMNAS_PRODUCTO)
         
-        return None
-    
-    def _extraer_productos(self, df, inicio_datos):
-        """Extrae productos desde la fila especificada"""
-        productos = []
+        # Filas de producto: al menos 3 números en el rango de datos
+        valida = contar_numeros_producto(datos) >= 3
         
-        for i in range(inicio_datos, len(df)):
-            fila = df.iloc[i]
-            
-            # Verificar si es una fila de producto válida
-            if self._es_fila_producto_valida(fila):
-                producto = self._extraer_producto_individual(fila)
-                if producto:
-                    productos.append(producto)
+        if mapeo and 'nombre' in mapeo:
+            productos = self._extraer_por_columnas(datos, mapeo, self._moneda_encabezado(df, inicio_datos, mapeo))
+        else:
+            productos = self._extraer_por_rangos(datos)
         
-        return productos
+        with etapa(ETAPA_NORMALIZACION):
+            # Las filas de subtotales no son productos
+            es_total = productos['Nombre'].astype(str).str.contains(PATRON_TOTAL, na=False)
+            valida &= (productos['Nombre'].notna() & ~es_total & (productos['Cantidad por Carton'] > 0) &
+                       ((productos['Precio'] > 0) | (productos['CBM'] > 0))).to_numpy()
+            contar('filas_conservadas', valida.sum())
+            contar('filas_descartadas', len(valida) - valida.sum())
+            contar('subtotales', es_total.sum())
+            productos = productos[valida]
+            
+            return pd.DataFrame({
+                'Nombre': productos['Nombre'],
+                'SKU': productos['SKU'].fillna('SKU_' + productos['Nombre'].str.len().astype(str)),
+                'Cantidad por Carton': productos['Cantidad por Carton'],
+                'Precio En USD': convertir_a_usd(productos['Precio'], productos['Moneda']),
+                'CBM': productos['CBM'],
+                'GW': productos['GW']
+            })
+    
+    def _moneda_encabezado(self, df, inicio_datos, mapeo):
+        """Moneda indicada en el encabezado de la columna de precio (RMB si no la indica)"""
+        if 'precio' not in mapeo:
+            return MONEDA_PROVEEDOR
+        fila = inicio_datos - 1
+        encabezado = df.columns[mapeo['precio']] if fila < 0 else df.iloc[fila, mapeo['precio']]
+        return detectar_moneda(encabezado, MONEDA_PROVEEDOR)
     
-    def _es_fila_producto_valida(self, fila):
-        """Verifica si una fila contiene datos válidos de producto"""
-        # Debe tener al menos 3 números en las columnas de datos
-        numeros_encontrados = 0
-        for valor in fila:
-            if pd.notna(valor):
-                try:
-                    num = float(str(valor))
-                    if 0 < num < 10000:  # Rango razonable
-                        numeros_encontrados += 1
-                except:
-                    pass
+    def _extraer_por_columnas(self, datos, mapeo, moneda=MONEDA_PROVEEDOR):
+        """Toma cada campo de la columna detectada en los encabezados"""
+        def numeros(campo):
+            if campo not in mapeo:
+                return np.zeros(len(datos))
+            return numeros_desde_texto(datos.iloc[:, mapeo[campo]]).to_numpy()
         
-        return numeros_encontrados >= 3
+        nombres = datos.iloc[:, mapeo['nombre']]
+        nombres = nombres.astype(str).str.strip().where(textos_validos(nombres))
+        skus = codigos_como_texto(datos.iloc[:, mapeo['sku']]) if 'sku' in mapeo else pd.Series(None, index=datos.index, dtype=object)
+        # Una celda con marca de moneda ('$12.5', '¥80') manda sobre el encabezado
+        monedas = monedas_desde_texto(datos.iloc[:, mapeo['precio']], moneda) if 'precio' in mapeo else moneda
+        return pd.DataFrame({
+            'Nombre': nombres,
+            'SKU': skus,
+            'Cantidad por Carton': numeros('cantidad'),
+            'Precio': numeros('precio'),
+            'Moneda': monedas,
+            'CBM': numeros('cbm'),
+            'GW': numeros('peso')
+        }, index=datos.index)
     
-    def _extraer_producto_individual(self, fila):
-        """Extrae un producto individual de una fila"""
-        try:
-            # Hacer el procesador más flexible para diferentes estructuras
-            datos_encontrados = {}
-            
-            # Buscar nombre (generalmente en las primeras columnas)
-            for i in range(min(5, len(fila))):
-                valor = fila.iloc[i]
-                if pd.notna(valor) and isinstance(valor, str) and len(str(valor)) > 2:
-                    # Si no es numérico y tiene suficiente longitud, puede ser nombre
-                    try:
-                        float(str(valor))
-                    except:
-                        datos_encontrados['nombre'] = str(valor)
-                        datos_encontrados['nombre_pos'] = i
-                        break
-            
-            # Buscar números en diferentes posiciones
-            numeros_encontrados = []
-            for i in range(len(fila)):
-                valor = fila.iloc[i]
-                if pd.notna(valor):
-                    numero = self._extraer_numero(valor)
-                    if numero > 0:
-                        numeros_encontrados.append((i, numero))
-            
-            # Clasificar números por rango típico
-            cantidad = 0
-            precio_rmb = 0
-            cbm = 0
-            peso = 0
-            sku = ""
-            
-            for pos, num in numeros_encontrados:
-                if 1 <= num <= 1000:  # Cantidad típica
-                    cantidad = num
-                elif 1 <= num <= 100:  # Precio RMB típico
-                    precio_rmb = num
-                elif 0.001 <= num <= 1:  # CBM típico
-                    cbm = num
-                elif 0.1 <= num <= 50:  # Peso típico
-                    peso = num
-                elif 10000 <= num <= 99999:  # SKU típico
-                    sku = str(int(num))
-            
-            # Validar datos mínimos
-            if (datos_encontrados.get('nombre') and cantidad > 0 and (precio_rmb > 0 or cbm > 0)):
-                return {
-                    'Nombre': datos_encontrados['nombre'],
-                    'SKU': sku if sku else f"SKU_{len(datos_encontrados['nombre'])}",
-                    'Cantidad por Carton': cantidad,
-                    'Precio En USD': precio_rmb / 7.10,  # Convertir RMB a USD
-                    'CBM': cbm,
-                    'GW': peso
-                }
+    def _extraer_por_rangos(self, datos):
+        """Sin encabezados: nombre en las primeras columnas y números clasificados por rango"""
+        n_filas = len(datos)
+        filas = np.arange(n_filas)
         
-        except Exception as e:
-            print(f"⚠️ Error extrayendo producto: {e}")
+        # Nombre: primer texto no numérico de más de 2 caracteres en las primeras 5 columnas
+        primeras = datos.iloc[:, :5]
+        es_nombre = np.column_stack([textos_validos(primeras.iloc[:, c], 3) for c in range(primeras.shape[1])]) \
+            if primeras.shape[1] else np.zeros((n_filas, 1), dtype=bool)
+        col_nombre = es_nombre.argmax(axis=1)
+        nombres = primeras.to_numpy(dtype=object)[filas, col_nombre] if primeras.shape[1] else np.full(n_filas, None)
+        nombres = pd.Series(nombres, index=datos.index, dtype=object).where(es_nombre.any(axis=1))
         
-        return None
-    
-    def _extraer_numero(self, valor):
-        """Extrae un número de un valor que puede contener texto"""
-        if pd.isna(valor):
-            return 0
+        # Cada número toma el primer rango que lo contiene; gana el último de la fila
+        numeros = np.column_stack([numeros_desde_texto(datos.iloc[:, c]).to_numpy() for c in range(datos.shape[1])])
+        categoria = np.select(
+            [(numeros >= 1) & (numeros <= 1000),      # Cantidad típica
+             (numeros >= 1) & (numeros <= 100),       # Precio RMB típico
+             (numeros >= 0.001) & (numeros <= 1),     # CBM típico
+             (numeros >= 0.1) & (numeros <= 50),      # Peso típico
+             (numeros >= 10000) & (numeros <= 99999)], # SKU típico
+            [0, 1, 2, 3, 4], default=-1
+        )
+        
+        def ultimo(cat):
+            mascara = categoria == cat
+            col = mascara.shape[1] - 1 - mascara[:, ::-1].argmax(axis=1)
+            return np.where(mascara.any(axis=1), numeros[filas, col], 0.0)
         
-        valor_str = str(valor)
-        # Buscar números en el texto
-        numeros = re.findall(r'[\d,]+\.?\d*', valor_str)
-        if numeros:
-            try:
-                return float(numeros[0].replace(',', ''))
-            except:
-                return 0
-        return 0
+        skus = ultimo(4)
+        return pd.DataFrame({
+            'Nombre': nombres,
+            'SKU': pd.Series(skus.astype('int64').astype(str), index=datos.index).where(skus > 0),
+            'Cantidad por Carton': ultimo(0),
+            'Precio': ultimo(1),
+            'Moneda': MONEDA_PROVEEDOR,
+            'CBM': ultimo(2),
+            'GW': ultimo(3)
+        }, index=datos.index)
 
 # Función de utilidad para usar en Streamlit
 def procesar_archivo_proveedor_chino(archivo):
@@ -247,10 +211,10 @@ def procesar_dataframe_proveedor_chino(df):
                 break
     
     if caracteristicas_chinas or (tiene_unnamed and caracteres_chinos):
-        print("✅ Características de archivo chino detectadas")
+        evento("✅ Características de archivo chino detectadas", nivel='info')
         return procesar_dataframe_chino(df)
     else:
-        print("❌ No es archivo chino")
+        evento("❌ No es archivo chino", nivel='info')
         return None
 
 def procesar_dataframe_chino(df):
@@ -258,22 +222,22 @@ def procesar_dataframe_chino(df):
     procesador = ProcesadorArchivosChinos()
     
     try:
-        print(f"📄 Procesando DataFrame chino: {df.shape}")
+        evento("📄 Procesando DataFrame chino: %s", df.shape)
         
         # Encontrar fila de encabezados
-        fila_encabezados = procesador._encontrar_fila_encabezados(df)
+        fila_encabezados, mapeo = procesador._encontrar_encabezados(df)
         
         if fila_encabezados is not None:
-            print(f"📋 Fila de encabezados encontrada: {fila_encabezados}")
+            evento("📋 Fila de encabezados encontrada: %s", fila_encabezados)
             
             # Extraer productos desde la fila siguiente
-            productos = procesador._extraer_productos(df, fila_encabezados + 1)
-            print(f"✅ Productos extraídos: {len(productos)}")
+            productos = procesador._extraer_productos(df, fila_encabezados + 1, mapeo).to_dict('records')
+            evento("✅ Productos extraídos: %s", len(productos), nivel='info')
             return productos
         else:
-            print("❌ No se encontraron encabezados")
+            evento("❌ No se encontraron encabezados", nivel='info')
             return None
             
     except Exception as e:
-        print(f"❌ Error procesando archivo chino: {e}")
+        evento("❌ Error procesando archivo chino: %s", e, nivel='error')
         return None 
\ No newline at end of file
@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
 
+from lector_excel import leer_excel
+from trazas import en_etapa, contar, evento, ETAPA_EXTRACCION
+
 class ProcesadorFormatoOriginal:
     def __init__(self):
         pass
@@ -8,9 +11,9 @@ class ProcesadorFormatoOriginal:
     def procesar_archivo(self, archivo_path):
         """Procesa archivos con el formato original de costos"""
         try:
-            df = pd.read_excel(archivo_path)
-            print(f"📄 Archivo cargado: {archivo_path}")
-            print(f"📊 Dimensiones: {df.shape}")
+            df = leer_excel(archivo_path)
+            evento("📄 Archivo cargado: %s", archivo_path)
+            evento("📊 Dimensiones: %s", df.shape)
             
             # Verificar si tiene el formato original
             columnas_originales = [
@@ -20,65 +23,53 @@ class ProcesadorFormatoOriginal:
             ]
             
             if all(col in df.columns for col in columnas_originales):
-                print("✅ Formato original detectado")
-                return self._procesar_formato_original(df)
+                evento("✅ Formato original detectado", nivel='info')
+                return self._procesar_formato_original(df).to_dict('records')
             else:
-                print("❌ No es formato original")
+                evento("❌ No es formato original", nivel='info')
                 return None
                 
         except Exception as e:
-            print(f"❌ Error procesando archivo: {e}")
+            evento("❌ Error procesando archivo: %s", e, nivel='error')
             return None
     
+    @en_etapa(ETAPA_EXTRACCION)
     def _procesar_formato_original(self, df):
-        """Procesa el formato original de costos"""
-        productos = []
+        """Procesa el formato original de costos con operaciones por columna (DataFrame tipado)"""
+        def numero(columna):
+            return pd.to_numeric(df[columna], errors='coerce').to_numpy(dtype=float)
         
-        for idx, row in df.iterrows():
-            try:
-                # Calcular CBM por caja
-                largo = row['Largo (cm)'] / 100  # Convertir a metros
-                ancho = row['Ancho (cm)'] / 100
-                alto = row['Alto (cm)'] / 100
-                cbm_por_caja = largo * ancho * alto
-                
-                # Calcular CBM total
-                cajas_totales = row['Cantidad Total'] / row['Piezas por Caja']
-                cbm_total = cbm_por_caja * cajas_totales
-                
-                # Calcular peso total
-                peso_total = row['Peso por Caja (kg)'] * cajas_totales
-                
-                # Debug: Verificar el valor del DDI
-                ddi_valor = row['DDI (%)'] if 'DDI (%)' in row else 18.0
-                print(f"🔍 Producto: {row['Nombre']}, DDI leído: {ddi_valor}, Tipo: {type(ddi_valor)}")
-                
-                # Corregir interpretación del DDI: si es menor a 1, multiplicar por 100
-                if isinstance(ddi_valor, (int, float)) and ddi_valor < 1:
-                    ddi_valor = ddi_valor * 100
-                    print(f"🔧 DDI corregido: {ddi_valor}%")
-                
-                producto = {
-                    'Nombre': row['Nombre'],
-                    'SKU': row['SKU'],
-                    'Cantidad por Carton': row['Cantidad Total'],
-                    'Precio En USD': row['Precio FOB (USD)'],
-                    'CBM': cbm_total,
-                    'GW': peso_total,
-                    'DDI (%)': ddi_valor  # Incluir DDI específico
-                }
-                
-                # Validar datos mínimos
-                if (producto['Cantidad por Carton'] > 0 and 
-                    producto['Precio En USD'] > 0 and 
-                    producto['CBM'] > 0):
-                    productos.append(producto)
-                    
-            except Exception as e:
-                print(f"⚠️ Error procesando fila {idx+1}: {e}")
-                continue
+        # CBM por caja (dimensiones en metros)
+        cbm_por_caja = (numero('Largo (cm)') / 100) * (numero('Ancho (cm)') / 100) * (numero('Alto (cm)') / 100)
+        
+        # Cajas totales, CBM y peso total
+        cantidad = numero('Cantidad Total')
+        piezas = numero('Piezas por Caja')
+        cajas_totales = np.divide(cantidad, piezas, out=np.full(len(df), np.nan), where=piezas > 0)
+        cbm_total = cbm_por_caja * cajas_totales
+        peso_total = numero('Peso por Caja (kg)') * cajas_totales
+        
+        # DDI: si es menor a 1 viene como fracción y se pasa a porcentaje
+        ddi = numero('DDI (%)') if 'DDI (%)' in df.columns else np.full(len(df), 18.0)
+        ddi = np.where(ddi < 1, ddi * 100, ddi)
+        
+        productos = pd.DataFrame({
+            'Nombre': df['Nombre'].to_numpy(),
+            'SKU': df['SKU'].to_numpy(),
+            'Cantidad por Carton': cantidad,
+            'Precio En USD': numero('Precio FOB (USD)'),
+            'CBM': cbm_total,
+            'GW': peso_total,
+            'DDI (%)': ddi  # Incluir DDI específico
+        })
+        
+        # Validar datos mínimos
+        valida = (productos['Cantidad por Carton'] > 0) & (productos['Precio En USD'] > 0) & (productos['CBM'] > 0)
+        contar('filas_conservadas', valida.sum())
+        contar('filas_descartadas', len(valida) - valida.sum())
+        productos = productos[valida].reset_index(drop=True)
         
-        print(f"✅ Productos procesados: {len(productos)}")
+        evento("✅ Productos procesados: %s", len(productos), nivel='info')
         return productos
 
 # Función de utilidad para usar en Streamlit
@@ -117,8 +108,8 @@ def procesar_dataframe_formato_original(df):
     ]
     
     if all(col in df.columns for col in columnas_originales):
-        print("✅ Formato original detectado")
-        return procesador._procesar_formato_original(df)
+        evento("✅ Formato original detectado", nivel='info')
+        return procesador._procesar_formato_original(df).to_dict('records')
     else:
-        print("❌ No es formato original")
+        evento("❌ No es formato original", nivel='info')
         return None 
\ No newline at end of file
@@ -0,0 +1,170 @@
+import pandas as pd
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from lector_excel import abrir_libro, leer_excel, nombres_hojas
+from encabezados_proveedores import detectar_bloques, como_hoja_sin_encabezados, como_hoja_con_encabezados
+from procesador_especifico_chino import ProcesadorArchivosChinos
+from tipos_cambio import TipoCambioNoDisponible
+from trazas import trazar, incorporar, etapa, ETAPA_DETECCION, ETAPA_EXTRACCION
+
+# Columnas de procedencia que se agregan a cada producto
+COLUMNAS_PROCEDENCIA = ['Hoja', 'Bloque', 'Fila Excel']
+
+# Formatos cuyas hojas se procesan por bloques (varias tablas por hoja)
+FORMATOS_POR_BLOQUES = ('chino', 'proveedores')
+
+# Columnas que se conservan de las hojas cuyas filas ya son productos
+COLUMNAS_PRODUCTO = ['Nombre', 'SKU', 'Cantidad por Carton', 'Precio En USD', 'CBM', 'GW', 'DDI (%)']
+
+def extraer_productos_hoja(df, hoja=None):
+    """Extrae los productos de todos los bloques de una hoja leída con header=None.
+
+    Cada producto lleva la hoja (si se indica), el número de bloque y su fila en Excel.
+    """
+    procesador = ProcesadorArchivosChinos()
+    frames = []
+    with etapa(ETAPA_DETECCION):
+        bloques = detectar_bloques(df)
+    for numero, (inicio, fin, mapeo) in enumerate(bloques, start=1):
+        productos = procesador._extraer_productos(df.iloc[:fin], inicio, mapeo)
+        if productos.empty:
+            continue
+        if hoja is not None:
+            productos['Hoja'] = hoja
+        productos['Bloque'] = numero
+        productos['Fila Excel'] = productos.index + 1
+        frames.append(productos)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def procesar_hoja(df, hoja=None):
+    """Procesa una hoja leída con header=None con el formato que la reconozca.
+
+    La hoja se puntúa con el registro de detector_formatos. Los formatos de
+    FORMATOS_POR_BLOQUES (o una hoja que ningún formato reconoce) se extraen
+    por bloques; los demás los procesa su detector. Si el ganador no extrae
+    productos se prueba el siguiente, como en detectar_y_procesar.
+    """
+    # detector_formatos importa este módulo
+    from detector_formatos import puntuar_formatos
+
+    df_encabezados = como_hoja_con_encabezados(df)
+    with etapa(ETAPA_DETECCION):
+        puntajes = puntuar_formatos(df_encabezados) if not df_encabezados.empty else []
+    if not puntajes:
+        return extraer_productos_hoja(df, hoja)
+
+    for puntaje, detector in puntajes:
+        if detector.nombre in FORMATOS_POR_BLOQUES:
+            productos = extraer_productos_hoja(df, hoja)
+            if not productos.empty:
+                return productos
+            continue
+        with etapa(ETAPA_EXTRACCION):
+            if detector.filas_son_productos:
+                productos = df_encabezados[[col for col in COLUMNAS_PRODUCTO if col in df_encabezados.columns]]
+                productos = productos[productos['Nombre'].notna()]
+                fila_excel = (productos.index + 1).to_numpy()
+            else:
+                productos = pd.DataFrame(detector.parse(df_encabezados) or [])
+                # El detector no conserva la fila de origen de cada producto
+                fila_excel = None
+        if productos.empty:
+            continue
+        productos = productos.reset_index(drop=True)
+        if hoja is not None:
+            productos['Hoja'] = hoja
+        productos['Bloque'] = 1
+        productos['Fila Excel'] = fila_excel
+        return productos
+    return pd.DataFrame()
+
+def extraer_productos_dataframe(df, hoja=None):
+    """Igual que extraer_productos_hoja para un DataFrame leído con encabezados (header=0)"""
+    return extraer_productos_hoja(como_hoja_sin_encabezados(df), hoja)
+
+def procesar_hojas_proveedor(ruta, hojas):
+    """Leer y procesar un grupo de hojas abriendo el libro una sola vez (se ejecuta en el pool).
+
+    Retorna ({hoja: df_productos}, errores).
+    """
+    resultados = {}
+    errores = []
+    libro = abrir_libro(ruta)
+    try:
+        for hoja in hojas:
+            try:
+                resultados[hoja] = procesar_hoja(leer_excel(libro, hoja=hoja, header=None), hoja)
+            except TipoCambioNoDisponible:
+                # Falla igual en todas las hojas: se corta el libro con un solo error
+                raise
+            except Exception as e:
+                errores.append({'hoja': hoja, 'error': str(e)})
+    finally:
+        libro.close()
+    return resultados, errores
+
+def _procesar_hojas_en_pool(ruta, hojas):
+    """procesar_hojas_proveedor con su propia traza: el proceso del pool no ve la del que lo llamó"""
+    with trazar(ruta) as traza:
+        resultados, errores = procesar_hojas_proveedor(ruta, hojas)
+    return resultados, errores, traza.etapas, traza.contadores
+
+def _guardar_temporal(fuente):
+    """Los procesos del pool abren el libro desde disco"""
+    if hasattr(fuente, 'seek'):
+        fuente.seek(0)
+    # La extensión original decide si el libro se lee con openpyxl o como .xls
+    extension = os.path.splitext(str(getattr(fuente, 'name', '')))[1].lower() or '.xlsx'
+    with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as tmp_file:
+        tmp_file.write(fuente.read() if hasattr(fuente, 'read') else fuente)
+        return tmp_file.name
+
+def procesar_libro_proveedor(fuente, procesos=None):
+    """Procesa todas las hojas y bloques de una cotización en paralelo.
+
+    fuente puede ser una ruta, bytes o un archivo subido. Retorna
+    (df_productos, info_hojas, errores); los productos quedan en el orden de
+    las hojas del libro con las columnas de COLUMNAS_PROCEDENCIA.
+    """
+    es_ruta = isinstance(fuente, (str, os.PathLike))
+    ruta = fuente if es_ruta else _guardar_temporal(fuente)
+    try:
+        hojas = nombres_hojas(ruta)
+        resultados = {}
+        errores = []
+
+        # Cada proceso abre el libro una vez y procesa un grupo de hojas
+        procesos = min(procesos or os.cpu_count() or 1, len(hojas))
+        grupos = [hojas[i::procesos] for i in range(procesos)]
+        if procesos <= 1:
+            resultados, errores = procesar_hojas_proveedor(ruta, hojas)
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as executor:
+                futuros = {executor.submit(_procesar_hojas_en_pool, ruta, grupo): grupo for grupo in grupos}
+                for futuro in as_completed(futuros):
+                    try:
+                        resultados_grupo, errores_grupo, etapas_grupo, contadores_grupo = futuro.result()
+                        resultados.update(resultados_grupo)
+                        errores.extend(errores_grupo)
+                        incorporar(etapas_grupo, contadores_grupo)
+                    except TipoCambioNoDisponible:
+                        raise
+                    except Exception as e:
+                        errores.extend({'hoja': hoja, 'error': str(e)} for hoja in futuros[futuro])
+    finally:
+        if not es_ruta and os.path.exists(ruta):
+            os.unlink(ruta)
+
+    # Mantener el orden de las hojas para que la salida sea reproducible
+    info_hojas = [
+        {'hoja': hoja, 'productos': len(resultados[hoja]),
+         'bloques': resultados[hoja]['Bloque'].nunique() if not resultados[hoja].empty else 0}
+        for hoja in hojas if hoja in resultados
+    ]
+    frames = [resultados[hoja] for hoja in hojas if hoja in resultados and not resultados[hoja].empty]
+    df_productos = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return df_productos, info_hojas, errores
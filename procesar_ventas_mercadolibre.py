@@ -5,24 +5,53 @@ from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from fechas_mercadolibre import parsear_fechas_ml
+from lector_excel import leer_excel
+
+# Archivo por defecto usado por la vista de Streamlit
+ARCHIVO_VENTAS_DEFAULT = '20250704_Ventas_AR_Mercado_Libre_y_Mercado_Shops_2025-07-04_20-02hs_2152194966.csv'
+
+# Columnas necesarias del reporte de ventas
+COLUMNAS_NECESARIAS = [
+    '# de venta',
+    'Fecha de venta', 
+    'Estado',
+    'Unidades',
+    'Ingresos por productos (ARS)',
+    'Cargo por venta',
+    'Costo fijo',
+    'Ingresos por envío (ARS)',
+    'Costos de envío (ARS)',
+    'Impostos',
+    'Total (ARS)',
+    'Mes de facturación de tus cargos',
+    'SKU',
+    'Título de la publicación',
+    'Precio unitario de venta de la publicación (ARS)',
+    'Canal de venta'
+]
 
 def procesar_ventas_mercadolibre():
-    st.title("📊 Análisis de Ventas MercadoLibre")
-    st.markdown("---")
-    
-    # Configuración de la página
+    # Configuración de la página (debe ser la primera llamada a Streamlit)
     st.set_page_config(
         page_title="Análisis Ventas ML",
         page_icon="📊",
         layout="wide"
     )
     
+    st.title("📊 Análisis de Ventas MercadoLibre")
+    st.markdown("---")
+    
     # Cargar el archivo CSV
     try:
-        # Leer el archivo CSV - usar la línea 5 como encabezados (índice 4)
-        df = pd.read_csv('20250704_Ventas_AR_Mercado_Libre_y_Mercado_Shops_2025-07-04_20-02hs_2152194966.csv', 
-                        header=4,  # Usar la línea 5 (índice 4) como encabezados
-                        encoding='utf-8')
+        df = leer_reporte_ventas(ARCHIVO_VENTAS_DEFAULT)
         
         st.success("✅ Archivo CSV cargado exitosamente")
         
@@ -36,37 +65,11 @@ def procesar_ventas_mercadolibre():
             ventas_entregadas = len(df[df['Estado'] == 'Entregado'])
             st.metric("Ventas entregadas", ventas_entregadas)
         
-        # Seleccionar solo las columnas necesarias
-        columnas_necesarias = [
-            '# de venta',
-            'Fecha de venta', 
-            'Estado',
-            'Unidades',
-            'Ingresos por productos (ARS)',
-            'Cargo por venta',
-            'Costo fijo',
-            'Ingresos por envío (ARS)',
-            'Costos de envío (ARS)',
-            'Impostos',
-            'Total (ARS)',
-            'Mes de facturación de tus cargos',
-            'SKU',
-            'Título de la publicación',
-            'Precio unitario de venta de la publicación (ARS)',
-            'Canal de venta'
-        ]
-        
         # Filtrar columnas que existen en el archivo
-        columnas_existentes = [col for col in columnas_necesarias if col in df.columns]
-        df_filtrado = df[columnas_existentes].copy()
-        
-        st.info(f"📋 Columnas seleccionadas: {len(columnas_existentes)} de {len(columnas_necesarias)}")
-        
-        # Limpiar y procesar datos
-        df_filtrado = limpiar_datos(df_filtrado)
+        columnas_existentes = [col for col in COLUMNAS_NECESARIAS if col in df.columns]
+        st.info(f"📋 Columnas seleccionadas: {len(columnas_existentes)} de {len(COLUMNAS_NECESARIAS)}")
         
-        # Filtrar solo ventas entregadas
-        df_entregadas = df_filtrado[df_filtrado['Estado'] == 'Entregado'].copy()
+        df_entregadas = preparar_ventas_entregadas(df)
         
         if len(df_entregadas) > 0:
             # Calcular ganancia neta
@@ -81,6 +84,25 @@ def procesar_ventas_mercadolibre():
         st.error(f"❌ Error al procesar el archivo: {str(e)}")
         st.info("💡 Asegúrate de que el archivo CSV esté en el directorio correcto")
 
+def leer_reporte_ventas(ruta):
+    """Leer un reporte de ventas de MercadoLibre (CSV o Excel)"""
+    if ruta.lower().endswith(('.xlsx', '.xls')):
+        # Usar la línea 5 (índice 4) como encabezados
+        return leer_excel(ruta, header=4)
+    # Leer el archivo CSV - usar la línea 5 como encabezados (índice 4)
+    return pd.read_csv(ruta, header=4, encoding='utf-8')
+
+def preparar_ventas_entregadas(df):
+    """Seleccionar columnas necesarias, limpiar datos y quedarse con las ventas entregadas"""
+    columnas_existentes = [col for col in COLUMNAS_NECESARIAS if col in df.columns]
+    df_filtrado = df[columnas_existentes].copy()
+    
+    # Limpiar y procesar datos
+    df_filtrado = limpiar_datos(df_filtrado)
+    
+    # Filtrar solo ventas entregadas
+    return df_filtrado[df_filtrado['Estado'] == 'Entregado'].copy()
+
 def limpiar_datos(df):
     """Limpiar y procesar los datos del DataFrame"""
     
@@ -108,7 +130,7 @@ def limpiar_datos(df):
     
     # Procesar fecha de venta
     if 'Fecha de venta' in df.columns:
-        df['Fecha de venta'] = pd.to_datetime(df['Fecha de venta'], format='%d de %B de %Y %H:%M hs.', errors='coerce')
+        df['Fecha de venta'] = parsear_fechas_ml(df['Fecha de venta'])
         df['Mes'] = df['Fecha de venta'].dt.strftime('%Y-%m')
     
     return df
@@ -277,5 +299,150 @@ def mostrar_resultados(df):
         mime="text/csv"
     )
 
+# ==================== PROCESAMIENTO POR LOTES (SIN INTERFAZ) ====================
+
+def procesar_archivo_ventas(ruta):
+    """Procesar un reporte de ventas sin Streamlit y devolver el detalle con tiempos por etapa"""
+    tiempos = {}
+    
+    inicio = time.perf_counter()
+    df = leer_reporte_ventas(ruta)
+    tiempos['lectura'] = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    df_entregadas = preparar_ventas_entregadas(df)
+    tiempos['limpieza'] = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    if len(df_entregadas) > 0:
+        df_entregadas = calcular_ganancia_neta(df_entregadas)
+    tiempos['calculo'] = time.perf_counter() - inicio
+    
+    df_entregadas.insert(0, 'Archivo', os.path.basename(ruta))
+    
+    return df_entregadas, {
+        'archivo': os.path.basename(ruta),
+        'registros': len(df),
+        'ventas_entregadas': len(df_entregadas),
+        'tiempos': tiempos
+    }
+
+def procesar_directorio_ventas(directorio, patron='*.csv', procesos=None):
+    """Procesar en paralelo todos los reportes de un directorio.
+    
+    Retorna (df_detalle, lista_info, errores).
+    """
+    rutas = sorted(glob.glob(os.path.join(directorio, patron)))
+    resultados = []
+    errores = []
+    
+    if not rutas:
+        return pd.DataFrame(), resultados, errores
+    
+    procesos = procesos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(procesos, len(rutas))) as executor:
+        futuros = {executor.submit(procesar_archivo_ventas, ruta): ruta for ruta in rutas}
+        for futuro in as_completed(futuros):
+            ruta = futuros[futuro]
+            try:
+                resultados.append(futuro.result())
+            except Exception as e:
+                errores.append({'archivo': os.path.basename(ruta), 'error': str(e)})
+    
+    # Mantener el orden de los archivos para que la salida sea reproducible
+    resultados.sort(key=lambda r: r[1]['archivo'])
+    frames = [df for df, _ in resultados if not df.empty]
+    df_detalle = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    
+    return df_detalle, [info for _, info in resultados], errores
+
+def generar_resumenes(df_detalle):
+    """Generar resúmenes por archivo y por mes a partir del detalle de ventas"""
+    if df_detalle.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    
+    agregaciones = {
+        'Total (ARS)': 'sum',
+        'Ganancia_Neta': 'sum',
+        'Unidades': 'sum',
+        '# de venta': 'count'
+    }
+    agregaciones = {col: func for col, func in agregaciones.items() if col in df_detalle.columns}
+    
+    resumen_archivo = df_detalle.groupby('Archivo').agg(agregaciones).reset_index()
+    
+    resumen_mensual = pd.DataFrame()
+    if 'Mes' in df_detalle.columns:
+        resumen_mensual = df_detalle.groupby('Mes').agg(agregaciones).reset_index()
+    
+    for resumen in (resumen_archivo, resumen_mensual):
+        if not resumen.empty and 'Ganancia_Neta' in resumen.columns:
+            resumen['Margen_%'] = np.where(
+                resumen['Total (ARS)'] > 0,
+                resumen['Ganancia_Neta'] / resumen['Total (ARS)'] * 100,
+                0
+            )
+    
+    return resumen_archivo, resumen_mensual
+
+def guardar_tabla(df, ruta_base, formato):
+    """Guardar un DataFrame como Parquet o CSV. Si no hay motor Parquet disponible, usa CSV."""
+    if formato == 'parquet':
+        try:
+            df.to_parquet(f"{ruta_base}.parquet", index=False)
+            return f"{ruta_base}.parquet"
+        except ImportError:
+            print("⚠️ pyarrow/fastparquet no disponible, guardando en CSV")
+    df.to_csv(f"{ruta_base}.csv", index=False, encoding='utf-8-sig')
+    return f"{ruta_base}.csv"
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos para el procesamiento mensual (cron)"""
+    parser = argparse.ArgumentParser(
+        description="Procesa en lote los reportes de ventas de MercadoLibre de un directorio"
+    )
+    parser.add_argument('directorio', help="Directorio con los reportes de ventas")
+    parser.add_argument('--patron', default='*.csv', help="Patrón de archivos a procesar (default: *.csv)")
+    parser.add_argument('--salida', default='resultados_ventas_ml', help="Directorio de salida")
+    parser.add_argument('--formato', choices=['parquet', 'csv'], default='parquet', help="Formato de los resúmenes")
+    parser.add_argument('--procesos', type=int, default=None, help="Cantidad de procesos (default: núcleos disponibles)")
+    args = parser.parse_args(argv)
+    
+    inicio = time.perf_counter()
+    df_detalle, infos, errores = procesar_directorio_ventas(args.directorio, args.patron, args.procesos)
+    tiempo_proceso = time.perf_counter() - inicio
+    
+    if not infos and not errores:
+        print(f"❌ No se encontraron archivos '{args.patron}' en {args.directorio}")
+        return 1
+    
+    os.makedirs(args.salida, exist_ok=True)
+    resumen_archivo, resumen_mensual = generar_resumenes(df_detalle)
+    
+    salidas = [guardar_tabla(df_detalle, os.path.join(args.salida, 'detalle_ventas'), args.formato)]
+    if not resumen_archivo.empty:
+        salidas.append(guardar_tabla(resumen_archivo, os.path.join(args.salida, 'resumen_por_archivo'), args.formato))
+    if not resumen_mensual.empty:
+        salidas.append(guardar_tabla(resumen_mensual, os.path.join(args.salida, 'resumen_mensual'), args.formato))
+    
+    # Estadísticas de tiempo
+    print(f"{'Archivo':<60} {'Registros':>10} {'Entregadas':>10} {'Lectura':>9} {'Limpieza':>9} {'Cálculo':>9}")
+    for info in infos:
+        t = info['tiempos']
+        print(f"{info['archivo'][:60]:<60} {info['registros']:>10} {info['ventas_entregadas']:>10} "
+              f"{t['lectura']:>8.2f}s {t['limpieza']:>8.2f}s {t['calculo']:>8.2f}s")
+    for error in errores:
+        print(f"❌ {error['archivo']}: {error['error']}")
+    
+    total_filas = sum(info['registros'] for info in infos)
+    print(f"\n✅ {len(infos)} archivos procesados ({total_filas} registros) en {tiempo_proceso:.2f}s "
+          f"({total_filas / tiempo_proceso if tiempo_proceso > 0 else 0:,.0f} filas/s)")
+    for salida in salidas:
+        print(f"💾 {salida}")
+    
+    return 1 if errores else 0
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
     procesar_ventas_mercadolibre() 
\ No newline at end of file
@@ -37,6 +37,7 @@ setup(
     entry_points={
         "console_scripts": [
             "costos-app=app_costos_final:main",
+            "ventas-ml-lote=procesar_ventas_mercadolibre:main",
         ],
     },
     include_package_data=True,
@@ -0,0 +1,112 @@
+import pandas as pd
+import os
+import json
+import re
+from datetime import date
+
+# Tabla local de tipos de cambio: unidades de cada moneda por 1 USD, por fecha de vigencia.
+# Junto a este módulo (no depende del directorio actual); se puede cambiar con la variable de entorno
+TIPOS_CAMBIO_FILE = os.environ.get(
+    'TIPOS_CAMBIO_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tipos_cambio.json')
+)
+
+MONEDA_BASE = 'USD'
+
+# Moneda de los precios de proveedores chinos que no la indican
+MONEDA_PROVEEDOR = 'RMB'
+
+# Marcas de moneda en encabezados o celdas de precio
+MARCAS_MONEDA = {
+    'RMB': ['rmb', 'cny', '¥', '元', '人民币'],
+    'USD': ['usd', 'us$', 'u$s', '美元', '美金', '$']
+}
+
+MONEDA_POR_MARCA = {marca: moneda for moneda, marcas in MARCAS_MONEDA.items() for marca in marcas}
+
+# Una sola alternancia con todas las marcas; las más largas primero para que 'us$' gane sobre '$'
+PATRON_MONEDA = re.compile(
+    '(' + '|'.join(re.escape(marca) for marca in sorted(MONEDA_POR_MARCA, key=len, reverse=True)) + ')',
+    re.IGNORECASE
+)
+
+class TipoCambioNoDisponible(ValueError):
+    """No hay tasa vigente para la moneda en la fecha pedida"""
+
+_tabla = None
+_mtime_tabla = None
+_factores = {}
+
+def cargar_tipos_cambio():
+    """Tabla {moneda: [(fecha, tasa)]} ordenada por fecha; se relee si cambió el archivo"""
+    global _tabla, _mtime_tabla
+    mtime = os.path.getmtime(TIPOS_CAMBIO_FILE) if os.path.exists(TIPOS_CAMBIO_FILE) else None
+    if _tabla is None or mtime != _mtime_tabla:
+        datos = {}
+        if mtime is not None:
+            with open(TIPOS_CAMBIO_FILE, 'r') as f:
+                datos = json.load(f)
+        _tabla = {moneda.upper(): sorted(tasas.items()) for moneda, tasas in datos.items()}
+        _mtime_tabla = mtime
+        _factores.clear()
+    return _tabla
+
+def guardar_tipo_cambio(moneda, tasa, fecha=None):
+    """Registrar la tasa (unidades de moneda por 1 USD) vigente desde fecha (hoy por defecto)"""
+    fecha = fecha or date.today().isoformat()
+    datos = {}
+    if os.path.exists(TIPOS_CAMBIO_FILE):
+        with open(TIPOS_CAMBIO_FILE, 'r') as f:
+            datos = json.load(f)
+    datos.setdefault(moneda.upper(), {})[fecha] = float(tasa)
+    tmp_path = f"{TIPOS_CAMBIO_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(datos, f, indent=2)
+    os.replace(tmp_path, TIPOS_CAMBIO_FILE)
+
+def tasa_vigente(moneda, fecha=None):
+    """Unidades de moneda por 1 USD vigentes en fecha (ISO, hoy por defecto)"""
+    if moneda.upper() == MONEDA_BASE:
+        return 1.0
+    fecha = fecha or date.today().isoformat()
+    tasas = [tasa for desde, tasa in cargar_tipos_cambio().get(moneda.upper(), []) if desde <= fecha]
+    if not tasas:
+        raise TipoCambioNoDisponible(f"No hay tipo de cambio {moneda}/USD vigente al {fecha} en {TIPOS_CAMBIO_FILE}")
+    return tasas[-1]
+
+def factor_a_usd(moneda, fecha=None):
+    """Factor que convierte montos en moneda a USD (cacheado por moneda y fecha)"""
+    clave = (moneda.upper(), fecha or date.today().isoformat())
+    cargar_tipos_cambio()
+    if clave not in _factores:
+        _factores[clave] = 1.0 / tasa_vigente(*clave)
+    return _factores[clave]
+
+def detectar_moneda(texto, por_defecto=None):
+    """Moneda indicada en un texto (encabezado o celda) o por_defecto si no tiene marca"""
+    marca = PATRON_MONEDA.search(str(texto)) if texto is not None else None
+    return MONEDA_POR_MARCA[marca.group(1).lower()] if marca else por_defecto
+
+def monedas_desde_texto(serie, por_defecto=MONEDA_BASE):
+    """Moneda de cada valor de una columna según sus marcas (una sola regex para toda la columna)"""
+    monedas = pd.Series(por_defecto, index=serie.index, dtype=object)
+    es_texto = serie.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    if es_texto.any():
+        marcas = serie[es_texto].str.extract(PATRON_MONEDA, expand=False).str.lower().map(MONEDA_POR_MARCA)
+        monedas[es_texto] = marcas.fillna(por_defecto).to_numpy()
+    return monedas
+
+def convertir_a_usd(montos, monedas, fecha=None):
+    """Convierte una columna de montos a USD con una multiplicación por moneda.
+
+    monedas puede ser una moneda para toda la columna o una Serie alineada
+    con montos (ej. la de monedas_desde_texto).
+    """
+    montos = pd.Series(montos, dtype=float)
+    if isinstance(monedas, str):
+        return montos * factor_a_usd(monedas, fecha)
+    convertidos = montos.copy()
+    for moneda in pd.unique(monedas):
+        if moneda != MONEDA_BASE:
+            mascara = (monedas == moneda).to_numpy()
+            convertidos[mascara] = montos[mascara] * factor_a_usd(moneda, fecha)
+    return convertidos
@@ -0,0 +1,147 @@
+import pandas as pd
+import functools
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# Niveles de detalle: con 'off' no se registra nada, con 'info' se miden
+# etapas y contadores y con 'debug' también los mensajes de diagnóstico
+NIVELES = {'off': 0, 'error': 1, 'info': 2, 'debug': 3}
+
+NIVEL_TRAZAS = NIVELES.get(os.environ.get('NIVEL_TRAZAS', 'info').lower(), NIVELES['info'])
+
+# Etapas de la ingesta de archivos
+ETAPA_LECTURA = 'lectura'
+ETAPA_DETECCION = 'deteccion'
+ETAPA_EXTRACCION = 'extraccion'
+ETAPA_NORMALIZACION = 'normalizacion'
+
+_traza_actual = ContextVar('traza_actual', default=None)
+_SIN_TRAZA = nullcontext()
+
+def configurar_trazas(nivel):
+    """Cambiar el nivel de las trazas ('off', 'error', 'info' o 'debug')"""
+    global NIVEL_TRAZAS
+    NIVEL_TRAZAS = NIVELES[nivel]
+
+class Traza:
+    """Registro de una ingesta: duración de cada etapa, contadores por etapa y mensajes"""
+
+    __slots__ = ('nombre', 'etapas', 'contadores', 'eventos', 'pila', 'inicio', 'segundos')
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.etapas = {}       # etapa -> [segundos propios, llamadas]
+        self.contadores = {}   # (etapa, contador) -> cantidad
+        self.eventos = []      # (segundo, nivel, mensaje)
+        self.pila = []         # [etapa, segundos de sus subetapas] de las etapas abiertas
+        self.inicio = time.perf_counter()
+        self.segundos = 0.0
+
+    def tabla(self):
+        """Desglose por etapa (en orden de inicio) con sus contadores como columnas.
+
+        Los segundos de cada etapa no incluyen los de sus subetapas, así los
+        porcentajes no se superponen; el resto es tiempo fuera de las etapas.
+        Si se incorporaron etapas de procesos en paralelo la suma puede superar
+        la duración de la traza y el porcentaje se toma sobre esa suma.
+        """
+        total = max(self.segundos, sum(segundos for segundos, _ in self.etapas.values()))
+        filas = []
+        for nombre, (segundos, llamadas) in self.etapas.items():
+            fila = {
+                'Etapa': nombre,
+                'Segundos': segundos,
+                '% del total': segundos / total * 100 if total > 0 else 0,
+                'Llamadas': llamadas
+            }
+            fila.update({contador: cantidad for (etapa, contador), cantidad in self.contadores.items() if etapa == nombre})
+            filas.append(fila)
+        return pd.DataFrame(filas)
+
+@contextmanager
+def trazar(nombre):
+    """Activa una traza para todo lo que se procese dentro del bloque (una carga de archivo)"""
+    traza = Traza(nombre)
+    token = _traza_actual.set(traza)
+    try:
+        yield traza
+    finally:
+        traza.segundos = time.perf_counter() - traza.inicio
+        _traza_actual.reset(token)
+
+def traza_actual():
+    return _traza_actual.get()
+
+def incorporar(etapas, contadores):
+    """Suma a la traza activa las etapas y contadores medidos en otro proceso.
+
+    Los segundos de procesos que corren en paralelo se suman, así que el
+    total de las etapas puede superar la duración de la traza.
+    """
+    traza = _traza_actual.get()
+    if traza is None or NIVEL_TRAZAS < NIVELES['info']:
+        return
+    for nombre, (segundos, llamadas) in etapas.items():
+        registro = traza.etapas.setdefault(nombre, [0.0, 0])
+        registro[0] += segundos
+        registro[1] += llamadas
+    for clave, cantidad in contadores.items():
+        traza.contadores[clave] = traza.contadores.get(clave, 0) + cantidad
+
+@contextmanager
+def _medir_etapa(traza, nombre):
+    registro = traza.etapas.setdefault(nombre, [0.0, 0])
+    abierta = [nombre, 0.0]
+    traza.pila.append(abierta)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        registro[0] += segundos - abierta[1]
+        registro[1] += 1
+        traza.pila.pop()
+        if traza.pila:
+            traza.pila[-1][1] += segundos
+
+def etapa(nombre):
+    """Mide una etapa dentro de la traza activa; sin traza (o con nivel 'off') no hace nada"""
+    traza = _traza_actual.get()
+    if traza is None or NIVEL_TRAZAS < NIVELES['info']:
+        return _SIN_TRAZA
+    return _medir_etapa(traza, nombre)
+
+def en_etapa(nombre):
+    """Decorador que mide cada llamada a la función como una etapa"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envuelta(*args, **kwargs):
+            with etapa(nombre):
+                return funcion(*args, **kwargs)
+        return envuelta
+    return decorador
+
+def contar(nombre, cantidad=1):
+    """Suma cantidad al contador de la etapa en curso (filas conservadas, descartadas, etc.)"""
+    traza = _traza_actual.get()
+    if traza is None or NIVEL_TRAZAS < NIVELES['info']:
+        return
+    clave = (traza.pila[-1][0] if traza.pila else traza.nombre, nombre)
+    traza.contadores[clave] = traza.contadores.get(clave, 0) + int(cantidad)
+
+def evento(mensaje, *args, nivel='debug'):
+    """Mensaje de diagnóstico; se formatea (mensaje % args) solo si el nivel lo habilita.
+
+    Con una traza activa queda registrado en ella; si no, se escribe en stderr.
+    """
+    if NIVELES[nivel] > NIVEL_TRAZAS:
+        return
+    texto = mensaje % args if args else mensaje
+    traza = _traza_actual.get()
+    if traza is None:
+        print(texto, file=sys.stderr)
+    else:
+        traza.eventos.append((time.perf_counter() - traza.inicio, nivel, texto))